@@ -10,9 +10,10 @@ from airflow_ai_sdk.decorators.agent import agent
 from airflow_ai_sdk.decorators.branch import llm_branch
 from airflow_ai_sdk.decorators.embed import embed
 from airflow_ai_sdk.decorators.llm import llm
+from airflow_ai_sdk.decorators.llm_batch import llm_batch
 from airflow_ai_sdk.models.base import BaseModel
 
-__all__ = ["agent", "llm", "llm_branch", "BaseModel"]
+__all__ = ["agent", "llm", "llm_batch", "llm_branch", "BaseModel"]
 
 
 def get_provider_info() -> dict[str, Any]:
@@ -35,6 +36,10 @@ def get_provider_info() -> dict[str, Any]:
                 "name": "llm",
                 "class-name": "airflow_ai_sdk.decorators.llm.llm",
             },
+            {
+                "name": "llm_batch",
+                "class-name": "airflow_ai_sdk.decorators.llm_batch.llm_batch",
+            },
             {
                 "name": "llm_branch",
                 "class-name": "airflow_ai_sdk.decorators.branch.llm_branch",
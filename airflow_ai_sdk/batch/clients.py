@@ -0,0 +1,529 @@
+"""
+This module provides clients for the batch endpoints of model providers (OpenAI Batch and
+Anthropic Message Batches), which run large numbers of requests asynchronously at a discount.
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any
+
+import httpx
+from pydantic import TypeAdapter
+from pydantic_core import to_jsonable_python
+
+from airflow_ai_sdk.models.base import BaseModel
+
+if TYPE_CHECKING:
+    from airflow_ai_sdk.telemetry.metrics import UsageRecorder
+
+# states after which a batch doesn't change anymore
+_FINAL_STATES = {"completed", "failed", "expired", "cancelled", "ended", "canceled"}
+
+# the name of the structured output tool, as in pydantic_ai
+_OUTPUT_TOOL_NAME = "final_result"
+
+
+def _output_schema(output_type: Any) -> tuple[dict[str, Any], bool]:  # noqa: ANN401
+    """Return the JSON object schema of an output type and whether it wraps a non-object type."""
+    schema = TypeAdapter(output_type).json_schema()
+    if schema.get("type") == "object":
+        return schema, False
+    return {"type": "object", "properties": {"response": schema}, "required": ["response"]}, True
+
+
+def parse_output(data: Any, output_type: Any) -> Any:  # noqa: ANN401
+    """
+    Validate a structured output returned by a batch against the output type.
+
+    Args:
+        data: The decoded JSON output.
+        output_type: The expected output type.
+
+    Returns:
+        The JSON-serializable output, with Pydantic models dumped to dicts.
+    """
+    _, wrapped = _output_schema(output_type)
+    output = TypeAdapter(output_type).validate_python(data["response"] if wrapped else data)
+    if isinstance(output, BaseModel):
+        output = output.model_dump()
+    return to_jsonable_python(output)
+
+
+def split_model_name(model: Any) -> tuple[str, str]:  # noqa: ANN401
+    """
+    Split a model into the provider and the provider's model name.
+
+    Args:
+        model: A model name such as `"openai:gpt-4o-mini"` or `"claude-3-5-haiku-latest"`, or a
+            `pydantic_ai` model.
+
+    Returns:
+        The provider (`"openai"` or `"anthropic"`) and the model name.
+    """
+    if not isinstance(model, str):
+        provider, name = getattr(model, "system", None), getattr(model, "model_name", None)
+    elif ":" in model:
+        provider, name = model.split(":", 1)
+    elif model.startswith(("gpt", "o1", "o3", "o4", "chatgpt")):
+        provider, name = "openai", model
+    elif model.startswith("claude"):
+        provider, name = "anthropic", model
+    else:
+        provider, name = None, model
+
+    if provider not in BATCH_CLIENTS:
+        raise ValueError(f"Batch API mode supports OpenAI and Anthropic models, not {model!r}.")
+    return provider, name
+
+
+class BatchClient(ABC):
+    """
+    Base class of clients for provider batch endpoints.
+
+    Subclasses build the provider's request for a prompt, submit requests as one batch, report
+    the state of a batch and parse its results. Submitting and reading results is synchronous,
+    polling is asynchronous so it can run in an Airflow trigger.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.batch.clients import OpenAIBatchClient
+
+    client = OpenAIBatchClient()
+    requests = [client.build_request(str(i), "gpt-4o-mini", "Be brief.", prompt, str) for i, prompt in enumerate(prompts)]
+    batch_id = client.submit(requests)
+    ```
+    """
+
+    provider: str
+    default_base_url: str
+    base_url_env: str
+    api_key_env: str
+
+    def __init__(self, base_url: str | None = None, api_key: str | None = None, timeout: float = 600.0):
+        """
+        Initialize the BatchClient.
+
+        Args:
+            base_url: The base URL of the API. Defaults to the provider's base URL environment
+                variable, or its public API.
+            api_key: The API key. Defaults to the provider's API key environment variable.
+            timeout: The timeout of each HTTP request, in seconds.
+        """
+        self.base_url = (base_url or os.environ.get(self.base_url_env) or self.default_base_url).rstrip("/")
+        self.api_key = api_key or os.environ.get(self.api_key_env, "")
+        self.timeout = timeout
+
+    @property
+    @abstractmethod
+    def headers(self) -> dict[str, str]:
+        """The headers sent with every request."""
+
+    def _client(self) -> httpx.Client:
+        return httpx.Client(base_url=self.base_url, headers=self.headers, timeout=self.timeout)
+
+    def _async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=self.base_url, headers=self.headers, timeout=self.timeout)
+
+    @abstractmethod
+    def build_request(
+        self,
+        custom_id: str,
+        model_name: str,
+        system_prompt: str,
+        prompt: str,
+        output_type: Any,  # noqa: ANN401
+        model_settings: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Build the batch request for a prompt.
+
+        Args:
+            custom_id: The id that identifies the request's result.
+            model_name: The provider's model name.
+            system_prompt: The system prompt.
+            prompt: The user prompt.
+            output_type: The output type. Structured outputs are requested with a JSON schema.
+            model_settings: `max_tokens` and `temperature` are passed on to the provider.
+
+        Returns:
+            One request of the batch.
+        """
+
+    @abstractmethod
+    def submit(self, requests: list[dict[str, Any]]) -> str:
+        """
+        Submit requests as a batch.
+
+        Args:
+            requests: Requests built with `build_request`.
+
+        Returns:
+            The id of the batch.
+        """
+
+    @abstractmethod
+    async def get_state(self, batch_id: str) -> dict[str, Any]:
+        """
+        Get the state of a batch.
+
+        Args:
+            batch_id: The id of the batch.
+
+        Returns:
+            A dict with the provider's `status`, whether the batch is `done`, and its `counts`.
+        """
+
+    @abstractmethod
+    def _parse_result(self, line: dict[str, Any], output_type: Any) -> Any:  # noqa: ANN401
+        """Return the output of a result line or raise an error if the request failed."""
+
+    @abstractmethod
+    def _result_lines(self, batch_id: str) -> list[dict[str, Any]]:
+        """Download the result lines of a finished batch."""
+
+    def _result_usage(self, line: dict[str, Any]) -> dict[str, Any] | None:  # noqa: ARG002
+        """Return the token usage of a result line as a `pydantic_ai` usage dict, if it reports one."""
+        return None
+
+    def get_results(
+        self,
+        batch_id: str,
+        output_type: Any,  # noqa: ANN401
+        recorder: "UsageRecorder | None" = None,
+        model: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Download and validate the results of a finished batch.
+
+        Args:
+            batch_id: The id of the batch.
+            output_type: The output type each result is validated against.
+            recorder: If set, the usage of every request is recorded with it.
+            model: The model name the requests are recorded under, e.g. `"openai:gpt-4o-mini"`.
+
+        Returns:
+            The output of each request keyed by its custom id, or the exception raised while
+            parsing it if the request failed.
+        """
+        results: dict[str, Any] = {}
+        for line in self._result_lines(batch_id):
+            error = None
+            try:
+                results[line["custom_id"]] = self._parse_result(line, output_type)
+            except Exception as e:
+                results[line["custom_id"]] = e
+                error = f"{type(e).__name__}: {e}"
+            if recorder is not None:
+                recorder.record_request(model or self.provider, self._result_usage(line), error=error)
+        return results
+
+
+class OpenAIBatchClient(BatchClient):
+    """
+    Client for the OpenAI Batch API.
+
+    Requests are written to a JSONL file, uploaded and run against `/v1/chat/completions`
+    within a 24 hour completion window.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.batch.clients import OpenAIBatchClient
+
+    client = OpenAIBatchClient(base_url="http://localhost:8000/v1", api_key="test")
+    ```
+    """
+
+    provider = "openai"
+    default_base_url = "https://api.openai.com/v1"
+    base_url_env = "OPENAI_BASE_URL"
+    api_key_env = "OPENAI_API_KEY"
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """The headers sent with every request."""
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def build_request(
+        self,
+        custom_id: str,
+        model_name: str,
+        system_prompt: str,
+        prompt: str,
+        output_type: Any,  # noqa: ANN401
+        model_settings: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Build the batch request for a prompt.
+
+        Args:
+            custom_id: The id that identifies the request's result.
+            model_name: The provider's model name.
+            system_prompt: The system prompt.
+            prompt: The user prompt.
+            output_type: The output type. Structured outputs are requested with a JSON schema.
+            model_settings: `max_tokens` and `temperature` are passed on to the provider.
+
+        Returns:
+            One line of the JSONL request file.
+        """
+        body: dict[str, Any] = {
+            "model": model_name,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+        }
+        if output_type is not str:
+            schema, _ = _output_schema(output_type)
+            body["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": _OUTPUT_TOOL_NAME, "schema": schema},
+            }
+        settings = model_settings or {}
+        if "max_tokens" in settings:
+            body["max_completion_tokens"] = settings["max_tokens"]
+        if "temperature" in settings:
+            body["temperature"] = settings["temperature"]
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def submit(self, requests: list[dict[str, Any]]) -> str:
+        """
+        Upload the requests as a JSONL file and create a batch.
+
+        Args:
+            requests: Requests built with `build_request`.
+
+        Returns:
+            The id of the batch.
+        """
+        jsonl = "".join(json.dumps(request) + "\n" for request in requests).encode("utf-8")
+        with self._client() as client:
+            upload = client.post(
+                "/files",
+                data={"purpose": "batch"},
+                files={"file": ("requests.jsonl", jsonl, "application/jsonl")},
+            )
+            upload.raise_for_status()
+            batch = client.post(
+                "/batches",
+                json={
+                    "input_file_id": upload.json()["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": "24h",
+                },
+            )
+            batch.raise_for_status()
+            return batch.json()["id"]
+
+    async def get_state(self, batch_id: str) -> dict[str, Any]:
+        """
+        Get the state of a batch.
+
+        Args:
+            batch_id: The id of the batch.
+
+        Returns:
+            A dict with the provider's `status`, whether the batch is `done`, and its `counts`.
+        """
+        async with self._async_client() as client:
+            response = await client.get(f"/batches/{batch_id}")
+            response.raise_for_status()
+            batch = response.json()
+        return {
+            "status": batch["status"],
+            "done": batch["status"] in _FINAL_STATES,
+            "succeeded": batch["status"] == "completed",
+            "counts": batch.get("request_counts", {}),
+        }
+
+    def _result_lines(self, batch_id: str) -> list[dict[str, Any]]:
+        lines = []
+        with self._client() as client:
+            batch = client.get(f"/batches/{batch_id}")
+            batch.raise_for_status()
+            for file_id in (batch.json().get("output_file_id"), batch.json().get("error_file_id")):
+                if not file_id:
+                    continue
+                content = client.get(f"/files/{file_id}/content")
+                content.raise_for_status()
+                lines.extend(json.loads(line) for line in content.text.splitlines() if line.strip())
+        return lines
+
+    def _result_usage(self, line: dict[str, Any]) -> dict[str, Any] | None:
+        usage = ((line.get("response") or {}).get("body") or {}).get("usage")
+        if not usage:
+            return None
+        return {
+            "request_tokens": usage.get("prompt_tokens"),
+            "response_tokens": usage.get("completion_tokens"),
+            "details": {
+                "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+            },
+        }
+
+    def _parse_result(self, line: dict[str, Any], output_type: Any) -> Any:  # noqa: ANN401
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            raise RuntimeError(f"Request failed: {line.get('error') or response.get('body')}")
+        content = response["body"]["choices"][0]["message"]["content"]
+        if output_type is str:
+            return content
+        return parse_output(json.loads(content), output_type)
+
+
+class AnthropicBatchClient(BatchClient):
+    """
+    Client for the Anthropic Message Batches API.
+
+    Structured outputs are requested by forcing a call to a tool whose input schema is the
+    output schema.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.batch.clients import AnthropicBatchClient
+
+    client = AnthropicBatchClient(base_url="http://localhost:8000", api_key="test")
+    ```
+    """
+
+    provider = "anthropic"
+    default_base_url = "https://api.anthropic.com"
+    base_url_env = "ANTHROPIC_BASE_URL"
+    api_key_env = "ANTHROPIC_API_KEY"
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """The headers sent with every request."""
+        return {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+
+    def build_request(
+        self,
+        custom_id: str,
+        model_name: str,
+        system_prompt: str,
+        prompt: str,
+        output_type: Any,  # noqa: ANN401
+        model_settings: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Build the batch request for a prompt.
+
+        Args:
+            custom_id: The id that identifies the request's result.
+            model_name: The provider's model name.
+            system_prompt: The system prompt.
+            prompt: The user prompt.
+            output_type: The output type. Structured outputs are requested with a forced tool call.
+            model_settings: `max_tokens` (default 4096) and `temperature` are passed on to the provider.
+
+        Returns:
+            One request of the batch.
+        """
+        settings = model_settings or {}
+        params: dict[str, Any] = {
+            "model": model_name,
+            "max_tokens": settings.get("max_tokens", 4096),
+            "system": system_prompt,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if output_type is not str:
+            schema, _ = _output_schema(output_type)
+            params["tools"] = [
+                {"name": _OUTPUT_TOOL_NAME, "description": "The final response.", "input_schema": schema}
+            ]
+            params["tool_choice"] = {"type": "tool", "name": _OUTPUT_TOOL_NAME}
+        if "temperature" in settings:
+            params["temperature"] = settings["temperature"]
+        return {"custom_id": custom_id, "params": params}
+
+    def submit(self, requests: list[dict[str, Any]]) -> str:
+        """
+        Create a message batch.
+
+        Args:
+            requests: Requests built with `build_request`.
+
+        Returns:
+            The id of the batch.
+        """
+        with self._client() as client:
+            response = client.post("/v1/messages/batches", json={"requests": requests})
+            response.raise_for_status()
+            return response.json()["id"]
+
+    async def get_state(self, batch_id: str) -> dict[str, Any]:
+        """
+        Get the state of a batch.
+
+        Args:
+            batch_id: The id of the batch.
+
+        Returns:
+            A dict with the provider's `status`, whether the batch is `done`, and its `counts`.
+        """
+        async with self._async_client() as client:
+            response = await client.get(f"/v1/messages/batches/{batch_id}")
+            response.raise_for_status()
+            batch = response.json()
+        return {
+            "status": batch["processing_status"],
+            "done": batch["processing_status"] in _FINAL_STATES,
+            "succeeded": batch["processing_status"] == "ended",
+            "counts": batch.get("request_counts", {}),
+        }
+
+    def _result_lines(self, batch_id: str) -> list[dict[str, Any]]:
+        with self._client() as client:
+            batch = client.get(f"/v1/messages/batches/{batch_id}")
+            batch.raise_for_status()
+            content = client.get(batch.json()["results_url"])
+            content.raise_for_status()
+        return [json.loads(line) for line in content.text.splitlines() if line.strip()]
+
+    def _result_usage(self, line: dict[str, Any]) -> dict[str, Any] | None:
+        usage = (line.get("result", {}).get("message") or {}).get("usage")
+        if not usage:
+            return None
+        cached = usage.get("cache_read_input_tokens") or 0
+        return {
+            # Anthropic reports cache reads and writes separately from the other input tokens
+            "request_tokens": (usage.get("input_tokens") or 0)
+            + (usage.get("cache_creation_input_tokens") or 0)
+            + cached,
+            "response_tokens": usage.get("output_tokens"),
+            "details": {"cache_read_input_tokens": cached},
+        }
+
+    def _parse_result(self, line: dict[str, Any], output_type: Any) -> Any:  # noqa: ANN401
+        result = line["result"]
+        if result["type"] != "succeeded":
+            raise RuntimeError(f"Request {result['type']}: {result.get('error')}")
+        content = result["message"]["content"]
+        if output_type is str:
+            return "".join(block["text"] for block in content if block["type"] == "text")
+        tool_use = next(block for block in content if block["type"] == "tool_use")
+        return parse_output(tool_use["input"], output_type)
+
+
+BATCH_CLIENTS: dict[str, type[BatchClient]] = {
+    OpenAIBatchClient.provider: OpenAIBatchClient,
+    AnthropicBatchClient.provider: AnthropicBatchClient,
+}
+
+
+def get_batch_client(provider: str, base_url: str | None = None) -> BatchClient:
+    """
+    Create the batch client of a provider.
+
+    Args:
+        provider: `"openai"` or `"anthropic"`.
+        base_url: The base URL of the API, e.g. of a local stand-in server.
+
+    Returns:
+        The client, authenticated with the provider's API key environment variable.
+    """
+    return BATCH_CLIENTS[provider](base_url=base_url)
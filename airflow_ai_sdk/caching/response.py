@@ -0,0 +1,517 @@
+"""
+This module provides deterministic caches of LLM responses, so that retries, backfills and
+re-runs of `@task.llm` and `@task.agent` tasks don't pay again for byte-identical requests.
+"""
+
+import contextlib
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from pydantic import TypeAdapter
+
+from airflow_ai_sdk.storage import is_local, local_path, object_storage_path
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
+
+
+def _model_name(model: Any) -> str | None:  # noqa: ANN401
+    """Return a stable name for a model given as a string or a `pydantic_ai` model."""
+    if model is None or isinstance(model, str):
+        return model
+    return f"{getattr(model, 'system', type(model).__name__)}:{getattr(model, 'model_name', '')}"
+
+
+def _output_schema(output_type: Any) -> Any:  # noqa: ANN401
+    """Return the JSON schema of an output type, or its repr if it has none."""
+    try:
+        return TypeAdapter(output_type).json_schema()
+    except Exception:
+        return repr(output_type)
+
+
+def _tool_schema(tool: Any) -> tuple[str, list[Any]]:  # noqa: ANN401
+    """Return the name and the description and parameter schema of a tool, tool function or toolset."""
+    from pydantic_ai import Tool
+    from pydantic_ai.toolsets import AbstractToolset
+
+    if isinstance(tool, AbstractToolset):
+        # toolsets such as MCP servers only list their tools at run time
+        return f"toolset {tool!r}", []
+    if not isinstance(tool, Tool):
+        tool = Tool(tool)
+    return tool.name, [tool.description, tool.function_schema.json_schema]
+
+
+def response_cache_key(
+    prompt: Any,  # noqa: ANN401
+    *,
+    model: Any,  # noqa: ANN401
+    system_prompt: str | Sequence[str] = (),
+    output_type: Any = str,  # noqa: ANN401
+    model_settings: dict[str, Any] | None = None,
+    tools: Sequence[Any] = (),
+) -> str:
+    """
+    Build the cache key for running a model on a prompt.
+
+    The key is a hash of the canonical JSON of the model name, the system prompts, the prompt,
+    the JSON schema of the output type, the model settings and the names, descriptions and
+    parameter schemas of the tools.
+
+    Args:
+        prompt: The user prompt.
+        model: The model, as a name or a `pydantic_ai` model.
+        system_prompt: The system prompt, or a sequence of system prompts and instructions.
+        output_type: The output type.
+        model_settings: The model settings.
+        tools: The tools, as `pydantic_ai.Tool` instances, tool functions or toolsets. Toolsets
+            that are not function toolsets are identified by their `repr`.
+
+    Returns:
+        A hex digest identifying the request.
+    """
+    payload = {
+        "model": _model_name(model),
+        "system_prompts": [system_prompt] if isinstance(system_prompt, str) else list(system_prompt),
+        "prompt": prompt,
+        "output_schema": _output_schema(output_type),
+        "model_settings": model_settings,
+        "tools": dict(_tool_schema(tool) for tool in tools),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=repr)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def agent_cache_spec(agent: "Agent") -> dict[str, Any]:
+    """
+    Describe an agent by the keyword arguments of `response_cache_key`.
+
+    `pydantic_ai` doesn't expose the system prompts and tools of an agent, so they are read from
+    its internals. Dynamic system prompts are only identified by the name of their function.
+
+    Args:
+        agent: The agent.
+
+    Returns:
+        The `model`, `system_prompt`, `output_type`, `model_settings` and `tools` of the agent.
+
+    Raises:
+        TypeError: If the installed `pydantic_ai` version doesn't have the expected internals,
+            rather than returning a spec that leaves out part of the agent.
+    """
+    from pydantic_ai.toolsets import FunctionToolset
+
+    try:
+        system_prompts = [
+            *agent._system_prompts,
+            *([agent._instructions] if agent._instructions else []),
+            *(
+                f"<{getattr(runner.function, '__qualname__', repr(runner.function))}>"
+                for runner in [*agent._system_prompt_functions, *agent._instructions_functions]
+            ),
+        ]
+        toolsets = [agent._function_toolset, *agent._user_toolsets]
+    except AttributeError as e:
+        raise TypeError(f"Can't build response cache keys for agents of this pydantic_ai version: {e}") from e
+
+    tools: list[Any] = []
+    for toolset in toolsets:
+        tools.extend(toolset.tools.values() if isinstance(toolset, FunctionToolset) else [toolset])
+    return {
+        "model": agent.model,
+        "system_prompt": system_prompts,
+        "output_type": agent.output_type,
+        "model_settings": agent.model_settings,
+        "tools": tools,
+    }
+
+
+class ResponseCache(ABC):
+    """
+    Base class of LLM response caches.
+
+    Responses are stored as JSON under the key returned by `response_cache_key`. Entries older
+    than `ttl` seconds are treated as misses and removed, and once a cache holds more than
+    `max_entries` entries the least recently used ones are evicted. Hit, miss and eviction counters
+    are kept for the lifetime of the instance. `None` responses are never cached.
+
+    Caches are shared, not copied, when an operator is deep-copied, so one instance can serve
+    all tasks of a process. Subclasses implement `_load`, `_store`, `_delete` and `_evict`, and
+    optionally `_touch`.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.caching.response import SQLiteResponseCache
+
+    @task.llm(
+        model="gpt-4o-mini",
+        system_prompt="Summarize the text.",
+        response_cache=SQLiteResponseCache("/data/llm-cache.sqlite", ttl=7 * 24 * 3600),
+    )
+    def summarize(text: str) -> str:
+        return text
+    ```
+    """
+
+    def __init__(self, ttl: float | None = None, max_entries: int | None = None):
+        """
+        Initialize the ResponseCache.
+
+        Args:
+            ttl: How long entries stay valid, in seconds. `None` keeps them forever.
+            max_entries: The maximum number of entries. `None` disables eviction.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def _load(self, key: str) -> tuple[float, str] | None:
+        """Return the creation time and JSON value of an entry, if it exists."""
+
+    @abstractmethod
+    def _store(self, key: str, created_at: float, value: str) -> None:
+        """Store an entry."""
+
+    def _touch(self, key: str) -> None:  # noqa: B027
+        """Mark an entry as recently used. Caches without a usage order don't need to override it."""
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        """Remove an entry if it exists."""
+
+    @abstractmethod
+    def _evict(self, max_entries: int) -> int:
+        """Remove the least recently used entries beyond `max_entries` and return how many were removed."""
+
+    def get(self, key: str) -> Any:  # noqa: ANN401
+        """
+        Look up a response and update the hit and miss counters.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached response, or `None` if there is no valid entry for the key.
+        """
+        entry = self._load(key)
+        if entry is not None and self.ttl is not None and time.time() - entry[0] > self.ttl:
+            self._delete(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touch(key)
+        return json.loads(entry[1])
+
+    def put(self, key: str, response: Any) -> None:  # noqa: ANN401
+        """
+        Store a response and evict entries beyond `max_entries`.
+
+        Args:
+            key: The cache key.
+            response: The JSON-serializable response.
+        """
+        if response is None:
+            return
+        self._store(key, time.time(), json.dumps(response))
+        if self.max_entries is not None:
+            self.evictions += self._evict(self.max_entries)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the hit, miss and eviction counters.
+
+        Returns:
+            A dict with the `hits`, `misses` and `evictions` of this instance.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "ResponseCache":
+        return self
+
+
+class InMemoryResponseCache(ResponseCache):
+    """
+    LLM response cache held in the memory of the current process.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.caching.response import InMemoryResponseCache
+
+    cache = InMemoryResponseCache(max_entries=1000)
+    ```
+    """
+
+    def __init__(self, ttl: float | None = None, max_entries: int | None = None):
+        """
+        Initialize the InMemoryResponseCache.
+
+        Args:
+            ttl: How long entries stay valid, in seconds. `None` keeps them forever.
+            max_entries: The maximum number of entries. `None` disables eviction.
+        """
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> tuple[float, str] | None:
+        with self._lock:
+            return self._entries.get(key)
+
+    def _store(self, key: str, created_at: float, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (created_at, value)
+            self._entries.move_to_end(key)
+
+    def _touch(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _evict(self, max_entries: int) -> int:
+        with self._lock:
+            evicted = max(len(self._entries) - max_entries, 0)
+            for _ in range(evicted):
+                self._entries.popitem(last=False)
+            return evicted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    LLM response cache stored in a SQLite file on local or shared storage.
+
+    The connection is opened on first use, so the cache can be created at DAG parse time.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.caching.response import SQLiteResponseCache
+
+    cache = SQLiteResponseCache("/data/llm-cache.sqlite", ttl=24 * 3600, max_entries=100_000)
+    ```
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl: float | None = None,
+        max_entries: int | None = None,
+        timeout: float = 60.0,
+    ):
+        """
+        Initialize the SQLiteResponseCache.
+
+        Args:
+            path: The path of the SQLite file. Parent directories are created if needed.
+            ttl: How long entries stay valid, in seconds. `None` keeps them forever.
+            max_entries: The maximum number of entries. `None` disables eviction.
+            timeout: How long to wait for a lock held by another process, in seconds.
+        """
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self.path = Path(path).expanduser()
+        self.timeout = timeout
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, created_at REAL, accessed_at REAL, value TEXT)"
+                )
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+                )
+        return self._conn
+
+    def _load(self, key: str) -> tuple[float, str] | None:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT created_at, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _store(self, key: str, created_at: float, value: str) -> None:
+        with self._lock, self._connection as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, created_at, accessed_at, value) VALUES (?, ?, ?, ?)",
+                (key, created_at, created_at, value),
+            )
+
+    def _touch(self, key: str) -> None:
+        with self._lock, self._connection as conn:
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+    def _delete(self, key: str) -> None:
+        with self._lock, self._connection as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _evict(self, max_entries: int) -> int:
+        with self._lock, self._connection as conn:
+            return conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (max_entries,),
+            ).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class FileResponseCache(ResponseCache):
+    """
+    LLM response cache stored as one JSON file per entry in a local directory or in object storage.
+
+    Paths with a URL scheme (e.g. `s3://bucket/llm-cache`) are accessed through Airflow's
+    object storage, so the cache can be shared by all workers. Object stores don't track access
+    times, so eviction removes the oldest entries rather than the least recently used ones, and
+    it lists the whole directory, which is slow for large remote caches.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.caching.response import FileResponseCache
+
+    cache = FileResponseCache("s3://my-bucket/llm-cache", ttl=30 * 24 * 3600)
+    ```
+    """
+
+    def __init__(self, path: str, ttl: float | None = None, max_entries: int | None = None):
+        """
+        Initialize the FileResponseCache.
+
+        Args:
+            path: The local directory or object storage URL of the cache.
+            ttl: How long entries stay valid, in seconds. `None` keeps them forever.
+            max_entries: The maximum number of entries. `None` disables eviction.
+        """
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self.path = path
+
+    @property
+    def _root(self) -> Any:  # noqa: ANN401
+        return local_path(self.path) if is_local(self.path) else object_storage_path(self.path)
+
+    def _entry_path(self, key: str) -> Any:  # noqa: ANN401
+        return self._root / key[:2] / f"{key}.json"
+
+    def _load(self, key: str) -> tuple[float, str] | None:
+        try:
+            with self._entry_path(key).open("r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        return entry["created_at"], entry["value"]
+
+    def _store(self, key: str, created_at: float, value: str) -> None:
+        path = self._entry_path(key)
+        data = json.dumps({"created_at": created_at, "value": value})
+        if not is_local(self.path):
+            with path.open("w") as f:
+                f.write(data)
+            return
+
+        # write to a temporary file first so concurrent readers never see a partial entry
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(data)
+        tmp_path.replace(path)
+
+    def _delete(self, key: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            self._entry_path(key).unlink()
+
+    def _entries(self) -> list[Any]:
+        return list(self._root.glob("*/*.json"))
+
+    def _evict(self, max_entries: int) -> int:
+        entries = self._entries()
+        if len(entries) <= max_entries:
+            return 0
+
+        entries.sort(key=lambda path: path.stat().st_mtime)
+        for path in entries[: len(entries) - max_entries]:
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+        return len(entries) - max_entries
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+
+_caches: dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(spec: str | ResponseCache) -> ResponseCache:
+    """
+    Resolve the `response_cache` argument of the LLM operators into a cache.
+
+    Strings are resolved to a process-wide cache: `"memory"` is an `InMemoryResponseCache`, paths
+    ending in `.sqlite` or `.db` are a `SQLiteResponseCache`, and any other path or URL is a
+    `FileResponseCache`. Use a cache instance to configure `ttl` or `max_entries`.
+
+    Args:
+        spec: A cache or a string describing one.
+
+    Returns:
+        The cache.
+    """
+    if isinstance(spec, ResponseCache):
+        return spec
+
+    with _caches_lock:
+        if spec not in _caches:
+            if spec == "memory":
+                _caches[spec] = InMemoryResponseCache()
+            elif spec.endswith((".sqlite", ".db")) and is_local(spec):
+                _caches[spec] = SQLiteResponseCache(local_path(spec))
+            else:
+                _caches[spec] = FileResponseCache(spec)
+        return _caches[spec]
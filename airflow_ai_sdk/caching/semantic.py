@@ -0,0 +1,289 @@
+"""
+This module provides a semantic cache of LLM responses that reuses the output of a previous
+prompt when a new prompt is a near-duplicate of it, judged by embedding similarity.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from airflow_ai_sdk.embeddings.model_cache import get_model
+
+
+class SemanticResponseCache:
+    """
+    Cache of LLM outputs looked up by the embedding similarity of prompts.
+
+    Entries are grouped by a scope, typically a hash of the model, system prompt and output type,
+    and a prompt only reuses the output of a prompt in the same scope. Prompts are embedded with
+    a SentenceTransformer model into unit-length vectors, and the most similar stored prompt is
+    reused if its cosine similarity is at least `threshold`. Entries record the embedding model
+    and the vector dimension, so a file reused with another model treats the old entries as
+    misses. Entries are stored in a SQLite file, or in memory if `path` is `None`, with an
+    optional TTL and least recently used eviction beyond `max_entries` in total and beyond
+    `max_entries_per_scope` in a scope, which bounds the vectors compared by a lookup.
+
+    Every decision is printed to the task log and, if `audit_log` is set, appended to a JSON Lines
+    file with the prompt, the matched prompt, the similarity and the threshold, so reuse decisions
+    can be reviewed and the threshold tuned.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.caching.semantic import SemanticResponseCache
+
+    @task.llm(
+        model="gpt-4o-mini",
+        system_prompt="Classify the support ticket.",
+        output_type=TicketCategory,
+        semantic_cache=SemanticResponseCache(
+            "/data/semantic-cache.sqlite",
+            threshold=0.95,
+            audit_log="/data/semantic-cache.jsonl",
+        ),
+    )
+    def classify(ticket: str) -> str:
+        return ticket
+    ```
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        model_name: str = "all-MiniLM-L12-v2",
+        threshold: float = 0.95,
+        ttl: float | None = None,
+        max_entries: int | None = None,
+        max_entries_per_scope: int | None = 10_000,
+        audit_log: str | Path | None = None,
+        model_kwargs: dict[str, Any] | None = None,
+        encode_kwargs: dict[str, Any] | None = None,
+        timeout: float = 60.0,
+    ):
+        """
+        Initialize the SemanticResponseCache.
+
+        Args:
+            path: The path of the SQLite file. `None` keeps the entries in memory.
+            model_name: The name of the SentenceTransformer model that embeds the prompts.
+            threshold: The minimum cosine similarity for a stored output to be reused.
+            ttl: How long entries stay valid, in seconds. `None` keeps them forever.
+            max_entries: The maximum number of entries. `None` disables eviction.
+            max_entries_per_scope: The maximum number of entries in a scope, which a lookup
+                compares the prompt with. `None` disables eviction per scope.
+            audit_log: The path of a JSON Lines file that every decision is appended to.
+            model_kwargs: Keyword arguments for the `SentenceTransformer` constructor.
+            encode_kwargs: Keyword arguments for the model's `encode` method.
+            timeout: How long to wait for a lock held by another process, in seconds.
+        """
+        self.path = Path(path).expanduser() if path is not None else None
+        self.model_name = model_name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_entries_per_scope = max_entries_per_scope
+        self.audit_log = Path(audit_log).expanduser() if audit_log is not None else None
+        self.model_kwargs = model_kwargs or {}
+        self.encode_kwargs = encode_kwargs or {}
+        self.timeout = timeout
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.path or ":memory:", timeout=self.timeout, check_same_thread=False
+            )
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, scope TEXT, prompt TEXT, "
+                    "vector BLOB, output TEXT, created_at REAL, accessed_at REAL, hits INTEGER DEFAULT 0, "
+                    "embedding_model TEXT, dimension INTEGER)"
+                )
+                # files created before entries recorded their embedding model
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+                for column, column_type in (("embedding_model", "TEXT"), ("dimension", "INTEGER")):
+                    if column not in columns:
+                        self._conn.execute(f"ALTER TABLE entries ADD COLUMN {column} {column_type}")
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS entries_scope ON entries (scope, embedding_model, dimension)"
+                )
+        return self._conn
+
+    def _embed(self, text: str) -> np.ndarray:
+        """Embed a text into a unit-length vector."""
+        model = get_model(self.model_name, **self.model_kwargs)
+        vector = np.asarray(model.encode([text], **self.encode_kwargs)[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _audit(self, decision: dict[str, Any]) -> None:
+        """Print a decision and append it to the audit log."""
+        if decision["decision"] == "reuse":
+            print(
+                f"Semantic cache reused the output of {decision['matched_prompt']!r} "
+                f"(similarity {decision['similarity']:.3f} >= {decision['threshold']})"
+            )
+        elif decision["similarity"] is not None:
+            print(
+                f"Semantic cache miss, closest prompt has similarity "
+                f"{decision['similarity']:.3f} < {decision['threshold']}"
+            )
+        else:
+            print("Semantic cache miss, no previous prompts")
+
+        if self.audit_log is not None:
+            self.audit_log.parent.mkdir(parents=True, exist_ok=True)
+            with self.audit_log.open("a") as f:
+                f.write(json.dumps(decision) + "\n")
+
+    def lookup(self, scope: str, prompt: str, threshold: float | None = None) -> tuple[Any, np.ndarray]:
+        """
+        Find the output of the most similar previous prompt in a scope.
+
+        Args:
+            scope: The scope of the prompt.
+            prompt: The prompt.
+            threshold: Overrides the cache's `threshold` for this lookup.
+
+        Returns:
+            The reused output, or `None` on a miss, and the prompt's embedding, which can be
+            passed to `add` to store the new output without embedding the prompt again.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        vector = self._embed(prompt)
+        now = time.time()
+
+        with self._lock, self._connection as conn:
+            if self.ttl is not None:
+                conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl,))
+            rows = conn.execute(
+                "SELECT id, prompt, vector FROM entries WHERE scope = ? AND embedding_model = ? "
+                "AND dimension = ? ORDER BY accessed_at DESC LIMIT ?",
+                (scope, self.model_name, len(vector), self.max_entries_per_scope or -1),
+            ).fetchall()
+
+            best_id, best_prompt, similarity = None, None, None
+            if rows:
+                vectors = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+                similarities = vectors @ vector
+                best = int(similarities.argmax())
+                best_id, best_prompt, similarity = rows[best][0], rows[best][1], float(similarities[best])
+
+            output = None
+            if similarity is not None and similarity >= threshold:
+                (value,) = conn.execute("SELECT output FROM entries WHERE id = ?", (best_id,)).fetchone()
+                conn.execute(
+                    "UPDATE entries SET accessed_at = ?, hits = hits + 1 WHERE id = ?", (now, best_id)
+                )
+                output = json.loads(value)
+
+        if output is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        self._audit(
+            {
+                "time": now,
+                "scope": scope,
+                "prompt": prompt,
+                "matched_prompt": best_prompt,
+                "similarity": similarity,
+                "threshold": threshold,
+                "decision": "miss" if output is None else "reuse",
+            }
+        )
+        return output, vector
+
+    def add(self, scope: str, prompt: str, output: Any, vector: np.ndarray | None = None) -> None:  # noqa: ANN401
+        """
+        Store the output of a prompt and evict entries beyond `max_entries` and `max_entries_per_scope`.
+
+        Args:
+            scope: The scope of the prompt.
+            prompt: The prompt.
+            output: The JSON-serializable output. `None` outputs are not stored.
+            vector: The prompt's embedding returned by `lookup`, if available.
+        """
+        if output is None:
+            return
+        if vector is None:
+            vector = self._embed(prompt)
+
+        now = time.time()
+        with self._lock, self._connection as conn:
+            conn.execute(
+                "INSERT INTO entries (scope, prompt, vector, output, created_at, accessed_at, "
+                "embedding_model, dimension) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    scope,
+                    prompt,
+                    vector.astype(np.float32).tobytes(),
+                    json.dumps(output),
+                    now,
+                    now,
+                    self.model_name,
+                    len(vector),
+                ),
+            )
+            if self.max_entries_per_scope is not None:
+                self.evictions += conn.execute(
+                    "DELETE FROM entries WHERE id IN (SELECT id FROM entries WHERE scope = ? "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (scope, self.max_entries_per_scope),
+                ).rowcount
+            if self.max_entries is not None:
+                self.evictions += conn.execute(
+                    "DELETE FROM entries WHERE id IN "
+                    "(SELECT id FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the hit, miss and eviction counters.
+
+        Returns:
+            A dict with the `hits`, `misses` and `evictions` of this instance.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "SemanticResponseCache":
+        return self
+
+    def __getstate__(self) -> dict[str, Any]:
+        if self.path is None:
+            raise TypeError("An in-memory SemanticResponseCache can't be pickled; give it a path.")
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,39 @@
+"""
+This module contains the decorators for the llm_batch decorator.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+from pydantic_ai import models
+
+from airflow_ai_sdk.airflow import task_decorator_factory
+from airflow_ai_sdk.operators.llm_batch import LLMBatchDecoratedOperator
+
+if TYPE_CHECKING:
+    from airflow_ai_sdk.airflow import TaskDecorator
+
+
+def llm_batch(
+    model: models.Model | models.KnownModelName,
+    system_prompt: str,
+    max_concurrency: int = 16,
+    **kwargs: dict[str, Any],
+) -> "TaskDecorator":
+    """
+    Decorator to make one LLM call per prompt in a list, concurrently, in a single task.
+
+    Example:
+
+    ```python
+    @task.llm_batch(model="o3-mini", system_prompt="Translate to French", max_concurrency=32)
+    def translate(texts: list[str]) -> list[str]:
+        return texts
+    ```
+    """
+    kwargs["model"] = model
+    kwargs["system_prompt"] = system_prompt
+    kwargs["max_concurrency"] = max_concurrency
+    return task_decorator_factory(
+        decorated_operator_class=LLMBatchDecoratedOperator,
+        **kwargs,
+    )
@@ -0,0 +1,108 @@
+"""
+This module provides length-sorted dynamic batching for embedding, which groups texts of similar
+token length under a token budget so that little compute is wasted on padding.
+"""
+
+import time
+from collections.abc import Sequence
+
+
+def token_budget_batches(lengths: Sequence[int], max_tokens: int) -> list[list[int]]:
+    """
+    Group texts into batches of similar length whose padded size fits a token budget.
+
+    Texts are sorted by length, longest first so that a batch that does not fit in memory fails
+    early, and each batch is filled until `len(batch) * longest_text_in_batch` would exceed
+    `max_tokens`. A text longer than `max_tokens` on its own gets a batch of its own.
+
+    Args:
+        lengths: The token length of each text.
+        max_tokens: The maximum number of padded tokens per batch.
+
+    Returns:
+        The indices of the texts in each batch.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.batching import token_budget_batches
+
+    token_budget_batches([5, 500, 6, 480], max_tokens=1000)  # [[1, 3], [2, 0]]
+    ```
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be a positive integer.")
+
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    batch_max = 0
+    for index in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        length = max(lengths[index], 1)
+        if batch and max(batch_max, length) * (len(batch) + 1) > max_tokens:
+            batches.append(batch)
+            batch, batch_max = [], 0
+        batch.append(index)
+        batch_max = max(batch_max, length)
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class BatchingStats:
+    """
+    Accumulates throughput and padding statistics over the batches of an embedding run.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.batching import BatchingStats
+
+    stats = BatchingStats()
+    stats.add_batch([5, 7, 6])
+    print(stats.summary())
+    ```
+    """
+
+    def __init__(self) -> None:
+        """Initialize the BatchingStats and start the clock."""
+        self.texts = 0
+        self.batches = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self._start = time.perf_counter()
+
+    def add_batch(self, lengths: Sequence[int]) -> None:
+        """
+        Record one encoded batch.
+
+        Args:
+            lengths: The token length of each text in the batch.
+        """
+        self.texts += len(lengths)
+        self.batches += 1
+        self.tokens += sum(lengths)
+        self.padded_tokens += max(lengths, default=0) * len(lengths)
+
+    @property
+    def elapsed(self) -> float:
+        """The number of seconds since the stats were created."""
+        return time.perf_counter() - self._start
+
+    @property
+    def padding_efficiency(self) -> float:
+        """The share of the padded tokens that are real tokens."""
+        return self.tokens / self.padded_tokens if self.padded_tokens else 1.0
+
+    @property
+    def texts_per_second(self) -> float:
+        """The number of texts encoded per second."""
+        elapsed = self.elapsed
+        return self.texts / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary for the task log."""
+        return (
+            f"Encoded {self.texts} texts in {self.batches} batches in {self.elapsed:.2f}s "
+            f"({self.texts_per_second:.1f} texts/s), padding efficiency {self.padding_efficiency:.1%}"
+        )
@@ -0,0 +1,135 @@
+"""
+This module provides a persistent, content-addressed cache of embedding vectors backed by
+SQLite, so that unchanged texts do not need to be re-encoded on every run.
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embedding vectors stored in a SQLite file.
+
+    Vectors are keyed by a hash of the model name, the model's keyword arguments, the `encode`
+    keyword arguments and the text, so a change to any of them results in a cache miss. The file can live on local
+    or shared storage. Hit and miss counters are kept for the lifetime of the instance.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.cache import EmbeddingCache
+
+    with EmbeddingCache("/tmp/embeddings.sqlite") as cache:
+        key = cache.make_key("all-MiniLM-L12-v2", {}, "hello")
+        vectors = cache.get_many([key])
+    ```
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    _query_chunk_size = 500
+
+    def __init__(self, path: str | Path, timeout: float = 60.0):
+        """
+        Initialize the EmbeddingCache.
+
+        Args:
+            path: The path of the SQLite file. Parent directories are created if needed.
+            timeout: How long to wait for a lock held by another process, in seconds.
+        """
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(self.path, timeout=timeout)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, dtype TEXT, vector BLOB)"
+            )
+
+    @staticmethod
+    def make_key(
+        model_name: str,
+        encode_kwargs: dict[str, Any],
+        text: str,
+        model_kwargs: dict[str, Any] | None = None,
+    ) -> str:
+        """
+        Build the cache key for a text.
+
+        Args:
+            model_name: The name of the model used to encode the text.
+            encode_kwargs: Keyword arguments passed to the model's `encode` method.
+            text: The text to encode.
+            model_kwargs: Keyword arguments the model was loaded with, e.g. `truncate_dim` or
+                `revision`.
+
+        Returns:
+            A hex digest identifying the embedding.
+        """
+        # models loaded without keyword arguments keep the keys of existing cache files
+        parts = (
+            [model_name, model_kwargs, encode_kwargs, text]
+            if model_kwargs
+            else [model_name, encode_kwargs, text]
+        )
+        payload = json.dumps(parts, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """
+        Look up the vectors for the given keys and update the hit and miss counters.
+
+        Args:
+            keys: The cache keys to look up.
+
+        Returns:
+            A mapping of the keys found in the cache to their vectors.
+        """
+        found: dict[str, np.ndarray] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), self._query_chunk_size):
+            chunk = unique_keys[start : start + self._query_chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({placeholders})",  # noqa: S608
+                chunk,
+            )
+            for key, dtype, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=dtype)
+
+        hits = sum(1 for key in keys if key in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, vectors: Mapping[str, np.ndarray]) -> None:
+        """
+        Store vectors in the cache.
+
+        Args:
+            vectors: A mapping of cache keys to vectors.
+        """
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dtype, vector) VALUES (?, ?, ?)",
+                [(key, vector.dtype.str, vector.tobytes()) for key, vector in vectors.items()],
+            )
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,107 @@
+"""
+This module provides token-aware chunking of documents before embedding, so that long documents
+are split into windows that fit the model instead of being silently truncated.
+"""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+    from transformers import PreTrainedTokenizerBase
+
+
+class TokenChunker:
+    """
+    Splits text into overlapping windows of tokens using a model's own tokenizer.
+
+    Chunks are returned as character spans of the original text, so each chunk keeps its offset
+    in the document. The tokenizer must support `return_offsets_mapping`, which all Hugging Face
+    "fast" tokenizers do.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.chunking import TokenChunker
+    from airflow_ai_sdk.embeddings.model_cache import get_model
+
+    chunker = TokenChunker.from_model(get_model("all-MiniLM-L12-v2"), overlap=32)
+    for start, end in chunker.spans(document):
+        print(document[start:end])
+    ```
+    """
+
+    def __init__(self, tokenizer: "PreTrainedTokenizerBase", window: int, overlap: int = 0):
+        """
+        Initialize the TokenChunker.
+
+        Args:
+            tokenizer: A Hugging Face tokenizer that supports `return_offsets_mapping`.
+            window: The maximum number of tokens per chunk.
+            overlap: The number of tokens shared by consecutive chunks.
+        """
+        if window < 1:
+            raise ValueError("The chunk window must be a positive number of tokens.")
+        if not 0 <= overlap < window:
+            raise ValueError("The chunk overlap must be non-negative and smaller than the chunk window.")
+
+        self.tokenizer = tokenizer
+        self.window = window
+        self.overlap = overlap
+
+    @classmethod
+    def from_model(
+        cls,
+        model: "SentenceTransformer",
+        window: int | None = None,
+        overlap: int = 0,
+    ) -> "TokenChunker":
+        """
+        Create a chunker from a SentenceTransformer model's tokenizer.
+
+        Args:
+            model: The model whose tokenizer is used.
+            window: The maximum number of tokens per chunk. Defaults to the model's maximum
+                sequence length minus the special tokens the tokenizer adds.
+            overlap: The number of tokens shared by consecutive chunks. If the window is capped at
+                the model's limit, the overlap is scaled down by the same ratio so that it stays
+                smaller than the window.
+
+        Returns:
+            A chunker whose chunks fit the model.
+        """
+        tokenizer = model.tokenizer
+        max_window = model.max_seq_length - tokenizer.num_special_tokens_to_add()
+        if window and window > max_window:
+            overlap = overlap * max_window // window
+            window = max_window
+        return cls(tokenizer, window or max_window, overlap)
+
+    def spans(self, text: str) -> list[tuple[int, int]]:
+        """
+        Split a text into chunks.
+
+        Args:
+            text: The text to split.
+
+        Returns:
+            The `(start, end)` character offsets of each chunk. A text that fits in one window,
+            including an empty text, is returned as a single chunk.
+        """
+        encoding = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False,
+        )
+        offsets = encoding["offset_mapping"]
+        if len(offsets) <= self.window:
+            return [(0, len(text))]
+
+        spans = []
+        step = self.window - self.overlap
+        for start in range(0, len(offsets), step):
+            end = min(start + self.window, len(offsets))
+            spans.append((offsets[start][0], offsets[end - 1][1]))
+            if end == len(offsets):
+                break
+        return spans
@@ -0,0 +1,227 @@
+"""
+This module provides compact, XCom-friendly encodings of embedding vectors, including int8 and
+binary quantization, and the matching decode helpers for downstream tasks.
+"""
+
+import base64
+from typing import Any
+
+import numpy as np
+
+OUTPUT_FORMATS = ("list", "float32", "float16", "int8", "binary")
+"""The supported values of `output_format` for `@task.embed`."""
+
+QUANTIZED_FORMATS = ("int8", "binary")
+"""The output formats that quantize the vectors."""
+
+_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float16": np.dtype("<f2"),
+    "int8": np.dtype("i1"),
+    "binary": np.dtype("u1"),
+}
+
+
+def _pack(array: np.ndarray) -> dict[str, Any]:
+    """Pack an array into a JSON-serializable dict holding its base64-encoded bytes."""
+    array = np.ascontiguousarray(array)
+    return {
+        "dtype": array.dtype.str,
+        "shape": list(array.shape),
+        "data": base64.b64encode(array.tobytes()).decode("ascii"),
+    }
+
+
+def _unpack(packed: dict[str, Any]) -> np.ndarray:
+    """Unpack an array packed by `_pack`."""
+    data = base64.b64decode(packed["data"])
+    return np.frombuffer(data, dtype=np.dtype(packed["dtype"])).reshape(packed["shape"])
+
+
+def int8_ranges(vectors: np.ndarray) -> np.ndarray:
+    """
+    Compute the per-dimension calibration ranges used for int8 quantization.
+
+    A single vector has no spread per dimension, so its overall minimum and maximum are used for
+    every dimension instead.
+
+    Args:
+        vectors: A 2D array of calibration vectors, usually the vectors being quantized.
+
+    Returns:
+        A `(2, dim)` float32 array holding the minimum and maximum of each dimension.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if vectors.shape[0] == 1:
+        return np.stack([np.full(vectors.shape[1], vectors.min()), np.full(vectors.shape[1], vectors.max())])
+    return np.stack([vectors.min(axis=0), vectors.max(axis=0)])
+
+
+def quantize(vectors: np.ndarray, output_format: str, ranges: np.ndarray | None = None) -> np.ndarray:
+    """
+    Quantize vectors to int8 or binary codes.
+
+    `int8` maps each dimension's calibration range linearly onto the 256 int8 values. `binary`
+    keeps one bit per dimension, set when the value is positive, packed 8 dimensions per byte.
+
+    Args:
+        vectors: The vector or vectors to quantize.
+        output_format: One of `QUANTIZED_FORMATS`.
+        ranges: The `(2, dim)` int8 calibration ranges. Defaults to the ranges of `vectors`.
+
+    Returns:
+        The int8 codes, or the packed uint8 bits.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if output_format == "binary":
+        return np.packbits(vectors > 0, axis=-1)
+
+    if output_format != "int8":
+        raise ValueError(f"Unknown quantized format {output_format!r}. Expected one of {QUANTIZED_FORMATS}.")
+
+    if ranges is None:
+        ranges = int8_ranges(vectors)
+    low, high = np.asarray(ranges, dtype=np.float32)
+    steps = np.where(high > low, (high - low) / 255, 1.0)
+    codes = np.round((vectors - low) / steps) - 128
+    return np.clip(codes, -128, 127).astype(np.int8)
+
+
+def dequantize(codes: np.ndarray, quantization: dict[str, Any]) -> np.ndarray:
+    """
+    Reconstruct approximate float vectors from int8 or binary codes.
+
+    Args:
+        codes: The codes returned by `quantize`.
+        quantization: The quantization parameters stored alongside the codes.
+
+    Returns:
+        Float32 vectors. Binary codes are reconstructed as -1 and 1 values.
+    """
+    if quantization["format"] == "binary":
+        bits = np.unpackbits(np.asarray(codes, dtype=np.uint8), axis=-1, count=quantization["dim"])
+        return bits.astype(np.float32) * 2 - 1
+
+    low, high = _unpack(quantization["ranges"])
+    steps = np.where(high > low, (high - low) / 255, 1.0)
+    return ((np.asarray(codes, dtype=np.float32) + 128) * steps + low).astype(np.float32)
+
+
+def quantization_params(
+    vectors: np.ndarray, output_format: str, ranges: np.ndarray | None = None
+) -> dict[str, Any]:
+    """
+    Build the parameters stored alongside quantized vectors so they can be dequantized.
+
+    Args:
+        vectors: The vectors being quantized.
+        output_format: One of `QUANTIZED_FORMATS`.
+        ranges: The int8 calibration ranges. Defaults to the ranges of `vectors`.
+
+    Returns:
+        A JSON-serializable dict with the format and, for int8, the calibration ranges, or, for
+        binary, the original dimension.
+    """
+    vectors = np.asarray(vectors)
+    if output_format == "binary":
+        return {"format": "binary", "dim": int(vectors.shape[-1])}
+
+    if ranges is None:
+        ranges = int8_ranges(vectors)
+    return {"format": "int8", "ranges": _pack(np.asarray(ranges, dtype=np.float32))}
+
+
+def encode_embeddings(
+    vectors: np.ndarray,
+    output_format: str = "list",
+    ranges: np.ndarray | None = None,
+) -> list[Any] | dict[str, Any]:
+    """
+    Encode one vector or a 2D array of vectors in the given output format.
+
+    With the `list` format the vectors are returned as (nested) lists of floats. With `float32`
+    or `float16` the vectors are packed into little-endian bytes of the given dtype and returned as a
+    JSON-serializable dict holding the base64-encoded buffer, its shape and its dtype. The `int8`
+    and `binary` formats quantize the vectors first and store the parameters needed to
+    dequantize them, such as the int8 calibration ranges, under `quantization`.
+
+    Args:
+        vectors: The vector or vectors to encode.
+        output_format: One of `OUTPUT_FORMATS`.
+        ranges: The `(2, dim)` int8 calibration ranges. Defaults to the ranges of `vectors`.
+
+    Returns:
+        The encoded vectors.
+
+    Example:
+
+    ```python
+    import numpy as np
+    from airflow_ai_sdk.embeddings.formats import decode_embeddings, encode_embeddings
+
+    payload = encode_embeddings(np.ones((2, 384)), "float16")
+    vectors = decode_embeddings(payload)  # np.ndarray of shape (2, 384)
+    ```
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output_format {output_format!r}. Expected one of {OUTPUT_FORMATS}.")
+
+    vectors = np.asarray(vectors)
+    if output_format == "list":
+        return vectors.tolist()
+
+    if output_format in QUANTIZED_FORMATS:
+        if output_format == "int8" and ranges is None:
+            ranges = int8_ranges(vectors)
+        return {
+            "format": output_format,
+            **_pack(quantize(vectors, output_format, ranges)),
+            "quantization": quantization_params(vectors, output_format, ranges),
+        }
+
+    return {"format": output_format, **_pack(vectors.astype(_DTYPES[output_format]))}
+
+
+def decode_embeddings(payload: list[Any] | dict[str, Any]) -> np.ndarray:
+    """
+    Decode vectors produced by `@task.embed` into a NumPy array, whatever their output format.
+
+    Vectors written to a `.npy` file with `output_path` are opened with `load_embeddings`, so
+    local files are memory-mapped rather than read into memory. Quantized vectors are returned
+    as stored (int8 codes or packed bits), which is what int8 dot-product and Hamming distance
+    search work on; use `dequantize_embeddings` to reconstruct float vectors.
+
+    Args:
+        payload: The output of an embedding task.
+
+    Returns:
+        A 1D array for a single vector or a 2D array for multiple vectors.
+    """
+    if not isinstance(payload, dict):
+        return np.asarray(payload)
+
+    if payload.get("format") == "npy":
+        from airflow_ai_sdk.embeddings.sink import load_embeddings
+
+        return load_embeddings(payload)
+
+    if payload.get("format") not in _DTYPES:
+        raise ValueError(f"Unknown embedding format {payload.get('format')!r}.")
+
+    return _unpack(payload)
+
+
+def dequantize_embeddings(payload: list[Any] | dict[str, Any]) -> np.ndarray:
+    """
+    Decode vectors produced by `@task.embed` into float vectors, dequantizing them if needed.
+
+    Args:
+        payload: The output of an embedding task.
+
+    Returns:
+        A float array for quantized payloads, or the output of `decode_embeddings` otherwise.
+    """
+    vectors = decode_embeddings(payload)
+    if isinstance(payload, dict) and "quantization" in payload:
+        return dequantize(vectors, payload["quantization"])
+    return vectors
@@ -0,0 +1,487 @@
+"""
+This module provides local vector indexes for nearest-neighbour search over the output of
+`@task.embed`: an exact index that scores queries with blocked matrix multiplies and an
+approximate inverted-file (IVF) index that only scores the clusters nearest to each query.
+
+Indexes are saved to a single file whose arrays are memory-mapped when the index is loaded, so
+opening even a large index is instant and its pages are shared between processes.
+"""
+
+import json
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from typing import Any, ClassVar
+
+import numpy as np
+
+from airflow_ai_sdk.embeddings.formats import dequantize_embeddings
+from airflow_ai_sdk.storage import is_local, local_path, object_storage_path
+
+METRICS = ("cosine", "dot")
+"""The supported similarity metrics. Higher scores are more similar."""
+
+_MAGIC = b"AAISDKIX"
+# arrays are aligned so they can be memory-mapped as-is
+_ALIGNMENT = 64
+
+
+def _top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return the `k` highest scores of each row of `scores` and their columns, best first."""
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        columns = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        columns = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    top = np.take_along_axis(scores, columns, axis=1)
+    order = np.argsort(-top, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(columns, order, axis=1)
+
+
+def _merge_top_k(
+    scores: np.ndarray,
+    ids: np.ndarray,
+    new_scores: np.ndarray,
+    new_ids: np.ndarray,
+    k: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Merge two sets of per-row top-k results into one."""
+    merged_scores, columns = _top_k(np.concatenate([scores, new_scores], axis=1), k)
+    return merged_scores, np.take_along_axis(np.concatenate([ids, new_ids], axis=1), columns, axis=1)
+
+
+def _as_vectors(payload: Any) -> np.ndarray:  # noqa: ANN401
+    """Decode the output of `@task.embed`, or an array of vectors, into a 2D float32 array."""
+    if isinstance(payload, dict) and "chunks" in payload:
+        payload = payload["embeddings"]
+    if isinstance(payload, list | dict):
+        payload = dequantize_embeddings(payload)
+    return np.atleast_2d(np.asarray(payload, dtype=np.float32))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors to unit length, leaving zero vectors as they are."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def _write_index_file(path: str, meta: dict[str, Any], arrays: dict[str, np.ndarray]) -> None:
+    """Write metadata and arrays to a local file, aligning each array for memory-mapping."""
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({"meta": meta, "arrays": layout}).encode("utf-8")
+    data_start = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGNMENT) * _ALIGNMENT
+    with open(path, "wb") as f:
+        f.write(_MAGIC + len(header).to_bytes(8, "little") + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+
+
+def _read_index_file(path: str, mmap: bool) -> tuple[dict[str, Any], dict[str, np.ndarray]]:
+    """Read the metadata and arrays written by `_write_index_file`."""
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a vector index file.")
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size))
+        data_start = -(-(len(_MAGIC) + 8 + header_size) // _ALIGNMENT) * _ALIGNMENT
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            if mmap and np.prod(shape) > 0:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode="r", offset=data_start + spec["offset"], shape=shape
+                )
+            else:
+                f.seek(data_start + spec["offset"])
+                count = int(np.prod(shape))
+                arrays[name] = np.frombuffer(f.read(count * dtype.itemsize), dtype=dtype).reshape(shape)
+    return header["meta"], arrays
+
+
+class VectorIndex(ABC):
+    """
+    Base class of the vector indexes. Use `ExactIndex` or `IVFIndex` to build an index and
+    `load_index` to load a saved index of either kind.
+    """
+
+    kind: ClassVar[str]
+    _kinds: ClassVar[dict[str, type["VectorIndex"]]] = {}
+
+    def __init_subclass__(cls, **kwargs: dict[str, Any]) -> None:
+        """Register the subclass so saved indexes of its kind can be loaded."""
+        super().__init_subclass__(**kwargs)
+        VectorIndex._kinds[cls.kind] = cls
+
+    def __init__(self, vectors: np.ndarray, metric: str = "cosine", texts: Sequence[str] | None = None):
+        """
+        Initialize the VectorIndex.
+
+        Args:
+            vectors: The vectors to index, one per row.
+            metric: One of `METRICS`. With `cosine`, vectors are normalized when the index is built.
+            texts: Optional text of each vector, saved with the index and returned by `texts`.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}. Expected one of {METRICS}.")
+        if len(vectors) == 0:
+            raise ValueError("Can't build an index without vectors.")
+        if texts is not None and len(texts) != len(vectors):
+            raise ValueError(f"Got {len(texts)} texts for {len(vectors)} vectors.")
+        self.metric = metric
+        self.vectors = vectors
+        self.text_data = self.text_offsets = None
+        if texts is not None:
+            # texts are stored as one UTF-8 buffer and the offset of each text in it
+            encoded = [text.encode("utf-8") for text in texts]
+            self.text_data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            self.text_offsets = np.concatenate([[0], np.cumsum([len(text) for text in encoded])]).astype(
+                np.int64
+            )
+
+    @classmethod
+    def from_embeddings(cls, payload: Any, **kwargs: dict[str, Any]) -> "VectorIndex":  # noqa: ANN401
+        """
+        Build an index from the output of `@task.embed`.
+
+        Args:
+            payload: The output of an embedding task in any output format, including a `.npy`
+                file written with `output_path`, the output of a chunked task, or an array.
+            **kwargs: Keyword arguments for the index constructor.
+
+        Returns:
+            The index.
+        """
+        return cls(_as_vectors(payload), **kwargs)
+
+    def __len__(self) -> int:
+        """Return the number of indexed vectors."""
+        return self.vectors.shape[0]
+
+    @property
+    def dim(self) -> int:
+        """The dimension of the indexed vectors."""
+        return self.vectors.shape[1]
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """Convert vectors to float32 and normalize them for the cosine metric."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        return _normalize(vectors) if self.metric == "cosine" else vectors
+
+    def search(self, queries: np.ndarray, k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the `k` indexed vectors most similar to each query.
+
+        Args:
+            queries: One query vector, or a 2D array with one query per row.
+            k: The number of neighbours to return per query.
+
+        Returns:
+            The similarity scores and row numbers of the neighbours of each query, best first, as
+            two arrays of shape `(num_queries, k)`, or of shape `(k,)` for a single query vector.
+            Fewer than `k` neighbours are returned if the index holds fewer vectors.
+        """
+        if k < 1:
+            raise ValueError(f"k must be a positive number of neighbours, got {k}.")
+        single = np.ndim(queries) == 1
+        scores, ids = self._search(self._prepare(queries), k)
+        return (scores[0], ids[0]) if single else (scores, ids)
+
+    @abstractmethod
+    def _search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return the scores and row numbers of the `k` best neighbours of prepared 2D queries."""
+
+    def texts(self, ids: Sequence[int]) -> list[str]:
+        """
+        Return the texts stored with the index for the given row numbers.
+
+        Args:
+            ids: Row numbers, as returned by `search`.
+
+        Returns:
+            The text of each row.
+        """
+        if self.text_data is None:
+            raise ValueError("The index was built without texts.")
+        offsets = self.text_offsets
+        return [bytes(self.text_data[offsets[i] : offsets[i + 1]]).decode("utf-8") for i in ids]
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        """Return the arrays saved with the index."""
+        arrays = {"vectors": self.vectors}
+        if self.text_data is not None:
+            arrays.update(text_data=self.text_data, text_offsets=self.text_offsets)
+        return arrays
+
+    def _meta(self) -> dict[str, Any]:
+        """Return the metadata saved with the index."""
+        return {"kind": self.kind, "metric": self.metric}
+
+    @classmethod
+    def _from_saved(cls, meta: dict[str, Any], arrays: dict[str, np.ndarray]) -> "VectorIndex":
+        """Recreate an index from its saved metadata and arrays without rebuilding it."""
+        index = cls.__new__(cls)
+        index.metric = meta["metric"]
+        index.text_data = index.text_offsets = None
+        for name, array in arrays.items():
+            setattr(index, name, array)
+        return index
+
+    def save(self, path: str) -> str:
+        """
+        Save the index to a single file.
+
+        Args:
+            path: A local path or object storage URL.
+
+        Returns:
+            The path the index was saved to.
+        """
+        if is_local(path):
+            file_path = local_path(path)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            _write_index_file(str(file_path), self._meta(), self._arrays())
+            return path
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = f"{tmp_dir}/index"
+            _write_index_file(file_path, self._meta(), self._arrays())
+            with open(file_path, "rb") as src, object_storage_path(path).open("wb") as dst:
+                shutil.copyfileobj(src, dst)
+        return path
+
+
+class ExactIndex(VectorIndex):
+    """
+    Exact nearest-neighbour index that scores every indexed vector.
+
+    Queries are scored against blocks of the index with one matrix multiply per block, keeping
+    a running top-k, so memory use stays bounded however large the index is.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.index import ExactIndex
+
+    index = ExactIndex.from_embeddings(embeddings)
+    scores, ids = index.search(query_vectors, k=5)
+    index.save("/data/index.bin")
+    ```
+    """
+
+    kind = "exact"
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        metric: str = "cosine",
+        texts: Sequence[str] | None = None,
+        block_size: int = 16384,
+        query_batch_size: int = 1024,
+    ):
+        """
+        Initialize the ExactIndex.
+
+        Args:
+            vectors: The vectors to index, one per row.
+            metric: One of `METRICS`.
+            texts: Optional text of each vector, saved with the index and returned by `texts`.
+            block_size: The number of indexed vectors scored per matrix multiply.
+            query_batch_size: The number of queries scored per matrix multiply.
+        """
+        super().__init__(vectors, metric, texts)
+        self.vectors = self._prepare(vectors)
+        self.block_size = block_size
+        self.query_batch_size = query_batch_size
+
+    @classmethod
+    def _from_saved(cls, meta: dict[str, Any], arrays: dict[str, np.ndarray]) -> "ExactIndex":
+        index = super()._from_saved(meta, arrays)
+        index.block_size = meta["block_size"]
+        index.query_batch_size = meta["query_batch_size"]
+        return index
+
+    def _meta(self) -> dict[str, Any]:
+        return {**super()._meta(), "block_size": self.block_size, "query_batch_size": self.query_batch_size}
+
+    def _search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        all_scores = np.empty((len(queries), k), dtype=np.float32)
+        all_ids = np.empty((len(queries), k), dtype=np.int64)
+        for q_start in range(0, len(queries), self.query_batch_size):
+            batch = queries[q_start : q_start + self.query_batch_size]
+            scores = np.full((len(batch), 0), -np.inf, dtype=np.float32)
+            ids = np.empty((len(batch), 0), dtype=np.int64)
+            for start in range(0, len(self), self.block_size):
+                block_scores, columns = _top_k(batch @ self.vectors[start : start + self.block_size].T, k)
+                scores, ids = _merge_top_k(scores, ids, block_scores, columns + start, k)
+            all_scores[q_start : q_start + len(batch)] = scores
+            all_ids[q_start : q_start + len(batch)] = ids
+        return all_scores, all_ids
+
+
+class IVFIndex(VectorIndex):
+    """
+    Approximate nearest-neighbour index using an inverted file.
+
+    The vectors are clustered with k-means when the index is built and stored grouped by
+    cluster. A query is only scored against the vectors of its `n_probe` nearest clusters,
+    and queries probing the same cluster are scored together with one matrix multiply.
+    Raising `n_probe` trades speed for recall. If the probed clusters hold fewer than `k` vectors,
+    the missing neighbours are returned with row number -1 and score `-inf`.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.index import IVFIndex
+
+    index = IVFIndex.from_embeddings(embeddings, n_lists=1024, n_probe=16)
+    scores, ids = index.search(query_vectors, k=5)
+    ```
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        metric: str = "cosine",
+        texts: Sequence[str] | None = None,
+        n_lists: int | None = None,
+        n_probe: int = 8,
+        n_iter: int = 10,
+        seed: int = 0,
+    ):
+        """
+        Initialize the IVFIndex and cluster the vectors.
+
+        Args:
+            vectors: The vectors to index, one per row.
+            metric: One of `METRICS`.
+            texts: Optional text of each vector, saved with the index and returned by `texts`.
+            n_lists: The number of clusters. Defaults to the square root of the number of vectors.
+            n_probe: The number of nearest clusters scored per query.
+            n_iter: The number of k-means iterations.
+            seed: The random seed used to initialize and train the clusters.
+        """
+        super().__init__(vectors, metric, texts)
+        vectors = self._prepare(vectors)
+        n_lists = min(n_lists or max(1, int(np.sqrt(len(vectors)))), len(vectors))
+        self.n_probe = n_probe
+
+        self.centroids = self._train(vectors, n_lists, n_iter, np.random.default_rng(seed))
+        assignments = self._assign(vectors)
+        # store the vectors grouped by cluster so each cluster is one contiguous block
+        self.ids = np.argsort(assignments, kind="stable")
+        self.vectors = vectors[self.ids]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+
+    def _assign(self, vectors: np.ndarray, block_size: int = 16384) -> np.ndarray:
+        """Return the nearest cluster of each vector."""
+        return np.concatenate(
+            [
+                self._centroid_scores(vectors[start : start + block_size]).argmax(axis=1)
+                for start in range(0, len(vectors), block_size)
+            ]
+        )
+
+    def _centroid_scores(self, vectors: np.ndarray) -> np.ndarray:
+        """Score vectors against the cluster centroids."""
+        if self.metric == "cosine":
+            return vectors @ self.centroids.T
+        # maximum inner product search clusters by Euclidean distance
+        return vectors @ self.centroids.T - 0.5 * np.sum(self.centroids**2, axis=1)
+
+    def _train(self, vectors: np.ndarray, n_lists: int, n_iter: int, rng: np.random.Generator) -> np.ndarray:
+        """Train the cluster centroids with k-means on a sample of the vectors."""
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), 256 * n_lists), replace=False)]
+        self.centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = self._assign(sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, sample)
+            empty = counts == 0
+            # restart empty clusters from random vectors
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            counts[empty] = 1
+            centroids = sums / counts[:, None]
+            self.centroids = _normalize(centroids) if self.metric == "cosine" else centroids
+        return self.centroids
+
+    @classmethod
+    def _from_saved(cls, meta: dict[str, Any], arrays: dict[str, np.ndarray]) -> "IVFIndex":
+        index = super()._from_saved(meta, arrays)
+        index.n_probe = meta["n_probe"]
+        return index
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        return {**super()._arrays(), "ids": self.ids, "offsets": self.offsets, "centroids": self.centroids}
+
+    def _meta(self) -> dict[str, Any]:
+        return {**super()._meta(), "n_probe": self.n_probe}
+
+    def _search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        _, probes = _top_k(self._centroid_scores(queries), self.n_probe)
+
+        # group the (query, cluster) pairs by cluster
+        pairs_cluster = probes.ravel()
+        pairs_query = np.repeat(np.arange(len(queries)), probes.shape[1])
+        order = np.argsort(pairs_cluster, kind="stable")
+        clusters, starts = np.unique(pairs_cluster[order], return_index=True)
+
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        for cluster, members in zip(clusters, np.split(pairs_query[order], starts[1:]), strict=True):
+            start, end = self.offsets[cluster], self.offsets[cluster + 1]
+            if start == end:
+                continue
+            cluster_scores, columns = _top_k(queries[members] @ self.vectors[start:end].T, k)
+            scores[members], rows[members] = _merge_top_k(
+                scores[members], rows[members], cluster_scores, columns + start, k
+            )
+
+        ids = np.where(rows >= 0, self.ids[np.maximum(rows, 0)], -1)
+        return scores, ids
+
+
+def load_index(path: str, mmap: bool = True) -> VectorIndex:
+    """
+    Load an index saved with `VectorIndex.save`.
+
+    Args:
+        path: A local path or object storage URL.
+        mmap: Whether to memory-map the arrays of a local index instead of reading them into
+            memory. Indexes in object storage are always downloaded into memory.
+
+    Returns:
+        The index, an `ExactIndex` or an `IVFIndex`.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.index import load_index
+
+    index = load_index("/data/index.bin")
+    scores, ids = index.search(query_vectors, k=5)
+    ```
+    """
+    if is_local(path):
+        meta, arrays = _read_index_file(str(local_path(path)), mmap)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = f"{tmp_dir}/index"
+            with object_storage_path(path).open("rb") as src, open(file_path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            meta, arrays = _read_index_file(file_path, mmap=False)
+
+    return VectorIndex._kinds[meta["kind"]]._from_saved(meta, arrays)
@@ -0,0 +1,155 @@
+"""
+This module provides a process-wide cache of SentenceTransformer models so that repeated
+and mapped embedding tasks running on the same worker reuse an already loaded model.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+def _model_size_bytes(model: object) -> int:
+    """Estimate the memory used by a model's parameters and buffers."""
+    size = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(model, attr, None)
+        if not callable(tensors):
+            continue
+        try:
+            size += sum(t.numel() * t.element_size() for t in tensors())
+        except (TypeError, AttributeError):
+            continue
+    return size
+
+
+class SentenceTransformerCache:
+    """
+    Thread-safe LRU cache of `SentenceTransformer` models.
+
+    Models are keyed by model name plus constructor options and loaded lazily on first use.
+    Concurrent requests for the same model wait for a single load instead of loading the
+    weights twice. When the cache holds more than `max_models` models or more than
+    `max_bytes` bytes of parameters, the least recently used models are evicted.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.model_cache import model_cache
+
+    model = model_cache.get("all-MiniLM-L12-v2", device="cpu")
+    ```
+    """
+
+    def __init__(self, max_models: int | None = 4, max_bytes: int | None = None):
+        """
+        Initialize the SentenceTransformerCache.
+
+        Args:
+            max_models: The maximum number of models to keep loaded. `None` means unbounded.
+            max_bytes: The maximum total parameter size of the loaded models. `None` means unbounded.
+        """
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._models: OrderedDict[str, tuple[SentenceTransformer, int]] = OrderedDict()
+
+    @staticmethod
+    def make_key(model_name: str, **model_kwargs: dict[str, Any]) -> str:
+        """
+        Build the cache key for a model name and its constructor options.
+
+        Args:
+            model_name: The name of the model.
+            **model_kwargs: Keyword arguments passed to the `SentenceTransformer` constructor.
+
+        Returns:
+            A string uniquely identifying the model configuration.
+        """
+        return json.dumps([model_name, model_kwargs], sort_keys=True, default=repr)
+
+    def get(self, model_name: str, **model_kwargs: dict[str, Any]) -> "SentenceTransformer":
+        """
+        Return a loaded model, loading it if it is not already cached.
+
+        Args:
+            model_name: The name of the model. Passed to the `SentenceTransformer` constructor.
+            **model_kwargs: Keyword arguments passed to the `SentenceTransformer` constructor.
+
+        Returns:
+            The loaded `SentenceTransformer` model.
+        """
+        key = self.make_key(model_name, **model_kwargs)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # another thread may have loaded the model while we waited for the lock
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+
+            from sentence_transformers import SentenceTransformer
+
+            print(f"Loading SentenceTransformer model {model_name}")
+            model = SentenceTransformer(model_name, **model_kwargs)
+
+            with self._lock:
+                self._models[key] = (model, _model_size_bytes(model))
+                self._key_locks.pop(key, None)
+                self._evict()
+
+        return model
+
+    def _evict(self) -> None:
+        """Evict least recently used models until the cache is within its budget. Expects the lock held."""
+        while len(self._models) > 1:
+            over_count = self.max_models is not None and len(self._models) > self.max_models
+            over_bytes = self.max_bytes is not None and self.size_bytes > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            self._models.popitem(last=False)
+
+    @property
+    def size_bytes(self) -> int:
+        """The total estimated parameter size of the cached models."""
+        return sum(size for _, size in self._models.values())
+
+    def clear(self) -> None:
+        """Remove all models from the cache."""
+        with self._lock:
+            self._models.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+model_cache = SentenceTransformerCache()
+"""The process-wide model cache used by `EmbedDecoratedOperator`."""
+
+
+def get_model(model_name: str, **model_kwargs: dict[str, Any]) -> "SentenceTransformer":
+    """
+    Return a model from the process-wide cache.
+
+    Args:
+        model_name: The name of the model. Passed to the `SentenceTransformer` constructor.
+        **model_kwargs: Keyword arguments passed to the `SentenceTransformer` constructor.
+
+    Returns:
+        The loaded `SentenceTransformer` model.
+    """
+    return model_cache.get(model_name, **model_kwargs)
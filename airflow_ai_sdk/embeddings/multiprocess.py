@@ -0,0 +1,108 @@
+"""
+This module provides helpers for sharding embedding work across a pool of worker processes,
+so that CPU-only embedding throughput scales with the number of cores.
+"""
+
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# environment variables read by torch and the BLAS libraries when a worker process starts
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def default_num_processes(threads_per_process: int | None = None) -> int:
+    """
+    Return the number of worker processes that saturates the CPUs of this machine.
+
+    Args:
+        threads_per_process: The number of torch intra-op threads each process will use.
+
+    Returns:
+        The number of available CPUs divided by `threads_per_process`, and at least 1.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return max(1, cpus // (threads_per_process or 1))
+
+
+@contextmanager
+def _thread_env(threads_per_process: int | None) -> Iterator[None]:
+    """Temporarily set the thread count environment variables inherited by spawned processes."""
+    if threads_per_process is None:
+        yield
+        return
+
+    previous = {name: os.environ.get(name) for name in _THREAD_ENV_VARS}
+    os.environ.update(dict.fromkeys(_THREAD_ENV_VARS, str(threads_per_process)))
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextmanager
+def multi_process_pool(
+    model: "SentenceTransformer",
+    num_processes: int | None = None,
+    threads_per_process: int | None = None,
+    target_devices: list[str] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Start a SentenceTransformer multi-process pool and stop it on exit.
+
+    Processes are started with the `spawn` start method by SentenceTransformer. When
+    `threads_per_process` is set, each process is started with `OMP_NUM_THREADS` and
+    `MKL_NUM_THREADS` set to it. Starting a pool moves the model to the CPU, so it is moved back
+    to its device when the pool stops, e.g. for a cached GPU model that later tasks reuse.
+
+    Args:
+        model: The model to share with the worker processes.
+        num_processes: The number of CPU worker processes. Defaults to the number of available CPUs
+            divided by `threads_per_process`. Ignored if `target_devices` is given.
+        threads_per_process: The number of torch intra-op threads per worker process.
+        target_devices: Explicit devices to start one process on each, e.g. `["cuda:0", "cuda:1"]`.
+
+    Yields:
+        The pool, to be passed to `model.encode` as `pool`.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.model_cache import get_model
+    from airflow_ai_sdk.embeddings.multiprocess import multi_process_pool
+
+    model = get_model("all-MiniLM-L12-v2")
+    with multi_process_pool(model, num_processes=8, threads_per_process=4) as pool:
+        vectors = model.encode(texts, pool=pool)
+    ```
+    """
+    if target_devices is None:
+        target_devices = ["cpu"] * (num_processes or default_num_processes(threads_per_process))
+
+    device = getattr(model, "device", None)
+    try:
+        with _thread_env(threads_per_process):
+            pool = model.start_multi_process_pool(target_devices=target_devices)
+
+        print(
+            f"Started {len(target_devices)} embedding processes"
+            + (f" with {threads_per_process} threads each" if threads_per_process else "")
+        )
+        try:
+            yield pool
+        finally:
+            model.stop_multi_process_pool(pool)
+    finally:
+        if device is not None:
+            model.to(device)
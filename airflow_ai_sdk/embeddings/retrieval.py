@@ -0,0 +1,160 @@
+"""
+This module provides a retrieval tool for agents that searches a local vector index, so agents
+can look up passages in milliseconds instead of fetching and summarizing pages again.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+from airflow_ai_sdk.embeddings.index import VectorIndex, load_index
+from airflow_ai_sdk.embeddings.model_cache import get_model
+from airflow_ai_sdk.models.tool import WrappedTool
+
+
+class Retriever:
+    """
+    Embeds queries and returns the most similar passages of a vector index within a token budget.
+
+    The index is loaded (memory-mapped) on the first query and the embedding model is taken from
+    the process-wide model cache, so repeated queries only pay for one forward pass and a search.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.retrieval import Retriever
+
+    retriever = Retriever("/data/docs.index", model_name="all-MiniLM-L12-v2", k=5)
+    passages = retriever("How do I configure retries?")
+    ```
+    """
+
+    def __init__(
+        self,
+        index: str | VectorIndex,
+        model_name: str,
+        k: int = 5,
+        max_tokens: int | None = 2000,
+        model_kwargs: dict[str, Any] | None = None,
+        encode_kwargs: dict[str, Any] | None = None,
+        count_tokens: Callable[[str], int] | None = None,
+    ):
+        """
+        Initialize the Retriever.
+
+        Args:
+            index: The path of an index saved with `VectorIndex.save`, or an index. The index must
+                have been built with the passage texts and with the same model as `model_name`.
+            model_name: The name of the SentenceTransformer model that embeds the queries.
+            k: The maximum number of passages returned per query.
+            max_tokens: The maximum total number of tokens of the returned passages. Passages are
+                added best first until the next one doesn't fit; a first passage that doesn't fit
+                on its own is truncated. `None` disables the budget.
+            model_kwargs: Keyword arguments for the `SentenceTransformer` constructor.
+            encode_kwargs: Keyword arguments for the model's `encode` method.
+            count_tokens: Counts the tokens of a passage. Defaults to the embedding model's tokenizer.
+        """
+        self._index = index if isinstance(index, VectorIndex) else None
+        self.index_path = None if isinstance(index, VectorIndex) else index
+        self.model_name = model_name
+        self.k = k
+        self.max_tokens = max_tokens
+        self.model_kwargs = model_kwargs or {}
+        self.encode_kwargs = encode_kwargs or {}
+        self.count_tokens = count_tokens
+
+    @property
+    def index(self) -> VectorIndex:
+        """The index, loaded on first use."""
+        if self._index is None:
+            self._index = load_index(self.index_path)
+        return self._index
+
+    def _count_tokens(self, text: str) -> int:
+        if self.count_tokens is not None:
+            return self.count_tokens(text)
+        tokenizer = get_model(self.model_name, **self.model_kwargs).tokenizer
+        return len(tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"])
+
+    def _within_budget(self, passages: list[str]) -> list[str]:
+        """Keep the best passages whose total token count fits `max_tokens`."""
+        if self.max_tokens is None:
+            return passages
+
+        selected: list[str] = []
+        remaining = self.max_tokens
+        for passage in passages:
+            tokens = self._count_tokens(passage)
+            if tokens > remaining:
+                if not selected:
+                    selected.append(passage[: len(passage) * remaining // tokens])
+                break
+            selected.append(passage)
+            remaining -= tokens
+        return selected
+
+    def __call__(self, query: str) -> list[str]:
+        """
+        Find the passages most relevant to a query.
+
+        Args:
+            query: The query.
+
+        Returns:
+            The most relevant passages, best first.
+        """
+        model = get_model(self.model_name, **self.model_kwargs)
+        vector = model.encode([query], **self.encode_kwargs)[0]
+        _, ids = self.index.search(vector, k=self.k)
+        return self._within_budget(self.index.texts(ids[ids >= 0]))
+
+
+def retrieval_tool(
+    index: str | VectorIndex,
+    model_name: str,
+    name: str = "retrieve",
+    description: str | None = None,
+    **kwargs: dict[str, Any],
+) -> WrappedTool:
+    """
+    Create an agent tool that searches a local vector index.
+
+    Args:
+        index: The path of an index saved with `VectorIndex.save`, or an index.
+        model_name: The name of the SentenceTransformer model that embeds the queries.
+        name: The name of the tool.
+        description: The description of the tool shown to the model.
+        **kwargs: Keyword arguments for `Retriever`, such as `k` and `max_tokens`.
+
+    Returns:
+        A tool that takes a query and returns the most relevant passages, best first.
+
+    Example:
+
+    ```python
+    from pydantic_ai import Agent
+    from airflow_ai_sdk.embeddings.retrieval import retrieval_tool
+
+    agent = Agent(
+        "gpt-4o-mini",
+        system_prompt="Answer questions using the documentation.",
+        tools=[retrieval_tool("/data/docs.index", model_name="all-MiniLM-L12-v2", k=5)],
+    )
+    ```
+    """
+    retriever = Retriever(index, model_name, **kwargs)
+
+    def retrieve(query: str) -> list[str]:
+        """
+        Search the index.
+
+        Args:
+            query: What to search for, in natural language.
+        """
+        return retriever(query)
+
+    return WrappedTool(
+        retrieve,
+        name=name,
+        description=description
+        or "Search the local document index and return the passages most relevant to the query, best first.",
+    )
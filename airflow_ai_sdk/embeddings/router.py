@@ -0,0 +1,170 @@
+"""
+This module provides an embedding-based semantic router that picks a branch by comparing an
+input with example utterances of each branch, so that obvious branching decisions don't need
+an LLM call.
+"""
+
+import json
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import numpy as np
+
+from airflow_ai_sdk.embeddings.model_cache import get_model
+
+
+class SemanticRouter:
+    """
+    Routes texts to the branch whose example utterances they are most similar to.
+
+    Each branch is represented by the normalized centroid of its example embeddings. A text is
+    routed to the most similar branch if its cosine similarity beats the runner-up by at least
+    `margin`; otherwise the decision is left to the caller, e.g. an LLM. The centroids are
+    computed once, with a single `encode` call, on first use.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.router import SemanticRouter
+
+    router = SemanticRouter(
+        {
+            "handle_refund": ["I want my money back", "Please refund my order"],
+            "handle_bug": ["The app crashes on start", "I found a bug"],
+        },
+        model_name="all-MiniLM-L12-v2",
+    )
+    route, margin = router.route("Refund me please")  # ("handle_refund", 0.41)
+    ```
+    """
+
+    def __init__(
+        self,
+        routes: Mapping[str, Sequence[str]],
+        model_name: str = "all-MiniLM-L12-v2",
+        margin: float = 0.1,
+        model_kwargs: dict[str, Any] | None = None,
+        encode_kwargs: dict[str, Any] | None = None,
+    ):
+        """
+        Initialize the SemanticRouter.
+
+        Args:
+            routes: Example utterances for each branch name. At least two branches are required.
+            model_name: The name of the SentenceTransformer model that embeds the texts.
+            margin: The minimum difference between the cosine similarity of the best and the
+                second best branch for a text to be routed.
+            model_kwargs: Keyword arguments for the `SentenceTransformer` constructor.
+            encode_kwargs: Keyword arguments for the model's `encode` method.
+        """
+        routes = {name: list(examples) for name, examples in routes.items() if examples}
+        if len(routes) < 2:
+            raise ValueError("A semantic router needs example utterances for at least two routes.")
+
+        self.routes = routes
+        self.model_name = model_name
+        self.margin = margin
+        self.model_kwargs = model_kwargs or {}
+        self.encode_kwargs = encode_kwargs or {}
+        self.decisions = 0
+        self.routed = 0
+        self._centroids: np.ndarray | None = None
+        self._lock = threading.Lock()
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        """Embed texts into unit-length vectors."""
+        model = get_model(self.model_name, **self.model_kwargs)
+        vectors = np.asarray(model.encode(texts, **self.encode_kwargs), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """The normalized centroid of each route's examples, one row per route."""
+        with self._lock:
+            if self._centroids is None:
+                examples = [example for examples in self.routes.values() for example in examples]
+                vectors = self._embed(examples)
+                bounds = np.cumsum([0, *(len(examples) for examples in self.routes.values())])
+                centroids = np.stack([group.mean(axis=0) for group in np.split(vectors, bounds[1:-1])])
+                norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+                self._centroids = centroids / np.where(norms > 0, norms, 1)
+        return self._centroids
+
+    def scores(self, texts: list[str]) -> np.ndarray:
+        """
+        Compute the cosine similarity of texts with each route.
+
+        Args:
+            texts: The texts to score.
+
+        Returns:
+            An array of shape `(len(texts), len(routes))`, with routes in the order of `routes`.
+        """
+        centroids = self.centroids
+        return self._embed(texts) @ centroids.T
+
+    def route_many(self, texts: list[str]) -> list[tuple[str | None, float]]:
+        """
+        Route a batch of texts.
+
+        Args:
+            texts: The texts to route.
+
+        Returns:
+            The chosen route and the margin over the runner-up for each text. The route is `None`
+            if the margin is below `margin`.
+        """
+        scores = self.scores(texts)
+        top_two = np.sort(scores, axis=1)[:, -2:]
+        margins = top_two[:, 1] - top_two[:, 0]
+        names = list(self.routes)
+
+        decisions = []
+        for best, margin in zip(scores.argmax(axis=1), margins, strict=True):
+            route = names[best] if margin >= self.margin else None
+            decisions.append((route, float(margin)))
+
+        self.decisions += len(decisions)
+        self.routed += sum(route is not None for route, _ in decisions)
+        return decisions
+
+    def route(self, text: str) -> tuple[str | None, float]:
+        """
+        Route a text.
+
+        Args:
+            text: The text to route.
+
+        Returns:
+            The chosen route, or `None` if the margin over the runner-up is below `margin`, and
+            the margin.
+        """
+        return self.route_many([text])[0]
+
+
+_routers: dict[str, SemanticRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(
+    routes: Mapping[str, Sequence[str]], model_name: str, **kwargs: dict[str, Any]
+) -> SemanticRouter:
+    """
+    Return a process-wide router for the given routes and options, so that the route centroids
+    are only computed once per process.
+
+    Args:
+        routes: Example utterances for each branch name.
+        model_name: The name of the SentenceTransformer model that embeds the texts.
+        **kwargs: Keyword arguments for `SemanticRouter`.
+
+    Returns:
+        The router.
+    """
+    key = json.dumps([routes, model_name, kwargs], sort_keys=True, default=str)
+    with _routers_lock:
+        if key not in _routers:
+            _routers[key] = SemanticRouter(routes, model_name, **kwargs)
+        return _routers[key]
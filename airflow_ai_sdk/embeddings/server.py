@@ -0,0 +1,488 @@
+"""
+This module provides a long-lived local embedding server that keeps SentenceTransformer models
+resident in memory, so that embedding tasks running in separate processes on the same node
+don't each reload the model weights.
+
+The server listens on a Unix socket and is started on demand by the first task that needs it.
+It shuts itself down after a period without requests.
+"""
+
+import argparse
+import contextlib
+import fcntl
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO
+
+import numpy as np
+
+from airflow_ai_sdk.embeddings.model_cache import get_model, model_cache
+
+DEFAULT_IDLE_TIMEOUT = 3600
+"""The number of seconds without requests after which an auto-started server shuts down."""
+
+# a frame is the length of a JSON header and of a binary payload, followed by both
+_FRAME = struct.Struct("!IQ")
+
+
+class EmbeddingServerError(OSError):
+    """Raised when the embedding server can't be reached or fails to handle a request."""
+
+
+def _private_dir() -> str:
+    """
+    Return a directory that only the current user can access, creating it if needed.
+
+    The directory is `airflow-ai-sdk` in `$XDG_RUNTIME_DIR`, or `airflow-ai-sdk-<uid>` in the
+    system temporary directory, which is world-writable, so an existing directory is only used
+    if it is owned by the current user and not accessible by anyone else.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        path = os.path.join(runtime_dir, "airflow-ai-sdk")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"airflow-ai-sdk-{os.getuid()}")
+    with contextlib.suppress(FileExistsError):
+        os.mkdir(path, 0o700)
+
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise EmbeddingServerError(
+            f"{path} must be a directory that only the current user can access; remove it or set "
+            "AIRFLOW_AI_SDK_EMBEDDING_SOCKET."
+        )
+    return path
+
+
+def default_socket_path() -> str:
+    """
+    Return the socket path used when none is given.
+
+    Returns:
+        The value of the `AIRFLOW_AI_SDK_EMBEDDING_SOCKET` environment variable, or `embed.sock`
+        in a directory that only the current user can access, see `_private_dir`.
+    """
+    return os.environ.get("AIRFLOW_AI_SDK_EMBEDDING_SOCKET") or os.path.join(_private_dir(), "embed.sock")
+
+
+def _check_owner(path: str) -> None:
+    """Check that a socket belongs to the current user, so requests aren't sent to another user's server."""
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise EmbeddingServerError(
+            f"{path} is not a socket owned by the current user; refusing to connect to it."
+        )
+
+
+def _open_private(path: str, flags: int) -> int:
+    """Open a file that only the current user can read, without following symlinks."""
+    return os.open(path, flags | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+
+
+def _send(stream: BinaryIO, header: dict[str, Any], payload: bytes = b"") -> None:
+    """Write one frame to a stream."""
+    data = json.dumps(header).encode("utf-8")
+    stream.write(_FRAME.pack(len(data), len(payload)) + data + payload)
+    stream.flush()
+
+
+def _recv(stream: BinaryIO) -> tuple[dict[str, Any], bytes]:
+    """Read one frame from a stream."""
+    prefix = stream.read(_FRAME.size)
+    if len(prefix) < _FRAME.size:
+        raise EOFError("Connection closed.")
+    header_size, payload_size = _FRAME.unpack(prefix)
+    header = json.loads(stream.read(header_size))
+    return header, stream.read(payload_size)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles the requests sent over one client connection."""
+
+    server: "EmbeddingServer"
+
+    def handle(self) -> None:
+        """Answer requests until the client disconnects."""
+        self.server.connection_opened()
+        try:
+            while True:
+                try:
+                    request, _ = _recv(self.rfile)
+                except (EOFError, ConnectionError):
+                    return
+
+                try:
+                    header, payload = self.server.handle_request(request)
+                except Exception as e:  # noqa: BLE001
+                    header, payload = {"error": f"{type(e).__name__}: {e}"}, b""
+                _send(self.wfile, header, payload)
+        finally:
+            self.server.connection_closed()
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves embedding requests over a Unix socket, keeping models loaded between requests.
+
+    Models are loaded lazily through the process-wide model cache on the first request for them.
+    Requests are encoded one at a time, so that concurrent tasks don't oversubscribe the CPU.
+    The socket is only accessible by the user running the server.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.server import EmbeddingServer
+
+    with EmbeddingServer("/tmp/embed.sock", idle_timeout=600) as server:
+        server.serve_forever()
+    ```
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, idle_timeout: float | None = None):
+        """
+        Initialize the EmbeddingServer and bind its socket.
+
+        Args:
+            path: The path of the Unix socket to listen on. A stale socket at this path is replaced.
+            idle_timeout: If set, the server stops after this many seconds without an open
+                connection.
+        """
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.started = time.monotonic()
+        self._last_activity = time.monotonic()
+        self._connections = 0
+        self._lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+        super().__init__(path, _RequestHandler)
+
+    def server_bind(self) -> None:
+        """Bind the socket so that only the current user can connect to it."""
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        """Close the socket and remove its file."""
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    def service_actions(self) -> None:
+        """Stop serving once the server has been idle for longer than `idle_timeout`."""
+        if self.idle_timeout is None:
+            return
+        with self._lock:
+            idle = self._connections == 0 and time.monotonic() - self._last_activity > self.idle_timeout
+        if idle:
+            print(f"Embedding server idle for {self.idle_timeout}s, shutting down")
+            # shutdown() waits for serve_forever() to return, so it must not run in its thread
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def connection_opened(self) -> None:
+        """Record that a client connected."""
+        with self._lock:
+            self._connections += 1
+            self._last_activity = time.monotonic()
+
+    def connection_closed(self) -> None:
+        """Record that a client disconnected."""
+        with self._lock:
+            self._connections -= 1
+            self._last_activity = time.monotonic()
+
+    def handle_request(self, request: dict[str, Any]) -> tuple[dict[str, Any], bytes]:
+        """
+        Handle one request.
+
+        Args:
+            request: The decoded request header.
+
+        Returns:
+            The response header and binary payload.
+        """
+        op = request.get("op")
+        if op == "ping":
+            return {
+                "pid": os.getpid(),
+                "uptime": time.monotonic() - self.started,
+                "models": len(model_cache),
+            }, b""
+
+        if op not in ("encode", "token_lengths"):
+            raise ValueError(f"Unknown operation {op!r}.")
+
+        model = get_model(request["model_name"], **request.get("model_kwargs", {}))
+        if op == "token_lengths":
+            encoding = model.tokenizer(
+                request["texts"],
+                truncation=True,
+                max_length=model.max_seq_length,
+                verbose=False,
+            )
+            return {"lengths": [len(ids) for ids in encoding["input_ids"]]}, b""
+
+        with self._encode_lock:
+            vectors = np.asarray(model.encode(request["texts"], **request.get("encode_kwargs", {})))
+        vectors = np.ascontiguousarray(vectors)
+        return {"dtype": vectors.dtype.str, "shape": list(vectors.shape)}, vectors.tobytes()
+
+
+class EmbeddingClient:
+    """
+    Client for an `EmbeddingServer`. The connection is opened on the first request and reused.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.embeddings.server import EmbeddingClient
+
+    with EmbeddingClient("/tmp/embed.sock") as client:
+        vectors = client.encode("all-MiniLM-L12-v2", ["first text", "second text"])
+    ```
+    """
+
+    def __init__(self, path: str | None = None, timeout: float | None = 600):
+        """
+        Initialize the EmbeddingClient.
+
+        Args:
+            path: The path of the server's Unix socket. Defaults to `default_socket_path()`.
+            timeout: The number of seconds to wait for a response.
+        """
+        self.path = path or default_socket_path()
+        self.timeout = timeout
+        self._socket: socket.socket | None = None
+        self._stream: BinaryIO | None = None
+
+    def _request(self, header: dict[str, Any]) -> tuple[dict[str, Any], bytes]:
+        """Send a request and return the response, raising EmbeddingServerError on failure."""
+        if self._socket is None:
+            _check_owner(self.path)
+        try:
+            if self._socket is None:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.settimeout(self.timeout)
+                self._socket.connect(self.path)
+                self._stream = self._socket.makefile("rwb")
+            _send(self._stream, header)
+            response, payload = _recv(self._stream)
+        except (OSError, EOFError, TypeError, ValueError) as e:
+            self.close()
+            raise EmbeddingServerError(f"Embedding server at {self.path} failed: {e}") from e
+
+        if "error" in response:
+            raise EmbeddingServerError(f"Embedding server at {self.path} failed: {response['error']}")
+        return response, payload
+
+    def ping(self) -> dict[str, Any]:
+        """
+        Check that the server is up.
+
+        Returns:
+            The server's process id, uptime in seconds and number of loaded models.
+        """
+        response, _ = self._request({"op": "ping"})
+        return response
+
+    def is_healthy(self) -> bool:
+        """Return whether the server answers a ping."""
+        try:
+            self.ping()
+        except EmbeddingServerError:
+            return False
+        return True
+
+    def encode(
+        self,
+        model_name: str,
+        texts: list[str],
+        model_kwargs: dict[str, Any] | None = None,
+        encode_kwargs: dict[str, Any] | None = None,
+    ) -> np.ndarray:
+        """
+        Encode texts on the server.
+
+        Args:
+            model_name: The name of the model to encode the texts with.
+            texts: The texts to encode.
+            model_kwargs: Keyword arguments for the `SentenceTransformer` constructor.
+            encode_kwargs: Keyword arguments for the model's `encode` method.
+
+        Returns:
+            A 2D array with one vector per input text, in input order.
+        """
+        response, payload = self._request(
+            {
+                "op": "encode",
+                "model_name": model_name,
+                "model_kwargs": model_kwargs or {},
+                "encode_kwargs": encode_kwargs or {},
+                "texts": texts,
+            }
+        )
+        return np.frombuffer(payload, dtype=np.dtype(response["dtype"])).reshape(response["shape"])
+
+    def token_lengths(
+        self,
+        model_name: str,
+        texts: list[str],
+        model_kwargs: dict[str, Any] | None = None,
+    ) -> list[int]:
+        """
+        Count the tokens of texts with the model's tokenizer on the server.
+
+        Args:
+            model_name: The name of the model whose tokenizer is used.
+            texts: The texts to tokenize.
+            model_kwargs: Keyword arguments for the `SentenceTransformer` constructor.
+
+        Returns:
+            The number of tokens of each text, capped at the model's maximum sequence length.
+        """
+        response, _ = self._request(
+            {
+                "op": "token_lengths",
+                "model_name": model_name,
+                "model_kwargs": model_kwargs or {},
+                "texts": texts,
+            }
+        )
+        return response["lengths"]
+
+    def close(self) -> None:
+        """Close the connection."""
+        if self._stream is not None:
+            with contextlib.suppress(OSError):
+                self._stream.close()
+        if self._socket is not None:
+            self._socket.close()
+        self._socket = self._stream = None
+
+    def __enter__(self) -> "EmbeddingClient":
+        """Return the client."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the connection."""
+        self.close()
+
+
+def start_server(path: str, idle_timeout: float | None = DEFAULT_IDLE_TIMEOUT) -> subprocess.Popen:
+    """
+    Start an embedding server in a detached background process.
+
+    The server outlives the process that started it and logs to `<path>.log`, which only the
+    current user can read.
+
+    Args:
+        path: The path of the Unix socket to listen on.
+        idle_timeout: The number of seconds without requests after which the server stops.
+
+    Returns:
+        The server process.
+    """
+    command = [sys.executable, "-u", "-m", "airflow_ai_sdk.embeddings.server", "--socket", path]
+    if idle_timeout is not None:
+        command += ["--idle-timeout", str(idle_timeout)]
+
+    with os.fdopen(_open_private(f"{path}.log", os.O_WRONLY | os.O_APPEND), "ab") as log:
+        return subprocess.Popen(  # noqa: S603
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+
+def connect(
+    path: str | None = None,
+    auto_start: bool = True,
+    startup_timeout: float = 30,
+    idle_timeout: float | None = DEFAULT_IDLE_TIMEOUT,
+) -> EmbeddingClient:
+    """
+    Connect to the embedding server, starting it first if it isn't running.
+
+    Args:
+        path: The path of the server's Unix socket. Defaults to `default_socket_path()`.
+        auto_start: Whether to start a server if none answers at `path`.
+        startup_timeout: The number of seconds to wait for a newly started server to answer.
+        idle_timeout: The idle timeout of a newly started server.
+
+    Returns:
+        A client connected to a healthy server.
+
+    Raises:
+        EmbeddingServerError: If no server answers at `path` within `startup_timeout`, or if the
+            socket at `path` belongs to another user.
+    """
+    client = EmbeddingClient(path)
+    _check_owner(client.path)
+    if client.is_healthy():
+        return client
+    if not auto_start:
+        raise EmbeddingServerError(f"No embedding server is running at {client.path}.")
+
+    print(f"Starting embedding server at {client.path}")
+    process = start_server(client.path, idle_timeout)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        if client.is_healthy():
+            return client
+        # the process exits right away if another task started a server first
+        if process.poll() not in (None, 0):
+            break
+    raise EmbeddingServerError(f"Embedding server at {client.path} did not start; see {client.path}.log.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Run an embedding server in the foreground.
+
+    Only one server runs per socket path: if another server holds the path's lock file, this
+    function returns immediately.
+
+    Args:
+        argv: The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    parser = argparse.ArgumentParser(description="Serve SentenceTransformer embeddings over a Unix socket.")
+    parser.add_argument("--socket", default=default_socket_path(), help="The path of the Unix socket.")
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Stop after this many idle seconds.")
+    args = parser.parse_args(argv)
+
+    with os.fdopen(_open_private(f"{args.socket}.lock", os.O_WRONLY), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"An embedding server is already running at {args.socket}")
+            return
+
+        with EmbeddingServer(args.socket, idle_timeout=args.idle_timeout) as server:
+            print(f"Embedding server listening at {args.socket} (pid {os.getpid()})")
+            server.serve_forever(poll_interval=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+This module provides a sink that streams embedding batches into a memory-mapped `.npy` file,
+so that large corpora never have to be held in memory or pushed through XCom.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+import numpy as np
+
+from airflow_ai_sdk.storage import is_local, local_path, object_storage_path
+
+# fixed size of the header written for streams of unknown length, so it can be rewritten in place
+_STREAM_HEADER_SIZE = 128
+
+
+def _npy_header(dtype: np.dtype, shape: tuple[int, ...], size: int) -> bytes:
+    """Build a version 1.0 `.npy` header padded to exactly `size` bytes."""
+    header = repr({"descr": dtype.str, "fortran_order": False, "shape": shape}).encode("latin1")
+    prefix = np.lib.format.magic(1, 0)
+    padding = size - len(prefix) - 2 - len(header) - 1
+    if padding < 0:
+        raise ValueError(f"Shape {shape} does not fit in a {size} byte header.")
+    header += b" " * padding + b"\n"
+    return prefix + len(header).to_bytes(2, "little") + header
+
+
+class NpySink:
+    """
+    Streams batches of vectors into a memory-mapped `.npy` file.
+
+    If the number of rows is known, the file is preallocated on the first write, once the vector
+    dimension is known, and each batch is written straight into the mapped file. Otherwise, each
+    batch is appended to the file as it arrives and the header is filled in on `close`, so streams
+    of unknown length can be written with bounded memory. Paths with a URL scheme (e.g. `s3://bucket/key.npy`)
+    are written to a local temporary file first and uploaded through Airflow's object storage
+    on `close`. The metadata returned by `close` is what `@task.embed` pushes to XCom; pass it to
+    `load_embeddings` or `decode_embeddings` to open the matrix.
+
+    Example:
+
+    ```python
+    import numpy as np
+    from airflow_ai_sdk.embeddings.sink import NpySink, load_embeddings
+
+    sink = NpySink("/tmp/vectors.npy", num_rows=2)
+    sink.write(np.ones((2, 384)))
+    metadata = sink.close()
+
+    vectors = load_embeddings(metadata)  # memory-mapped, read-only
+    ```
+    """
+
+    def __init__(self, path: str, num_rows: int | None = None, dtype: str = "float32"):
+        """
+        Initialize the NpySink.
+
+        Args:
+            path: The local path or object storage URL of the `.npy` file.
+            num_rows: The total number of vectors that will be written, if known.
+            dtype: The dtype the vectors are stored as.
+        """
+        self.path = path
+        self.num_rows = num_rows
+        self.dtype = np.dtype(dtype)
+
+        self._rows_written = 0
+        self._dim: int | None = None
+        self._array: np.memmap | None = None
+        self._stream: BinaryIO | None = None
+
+        if is_local(path):
+            self._local_path = local_path(path)
+            self._local_path.parent.mkdir(parents=True, exist_ok=True)
+            self._tmp_dir = None
+        else:
+            self._tmp_dir = tempfile.TemporaryDirectory()
+            self._local_path = Path(self._tmp_dir.name) / "embeddings.npy"
+
+    def write(self, batch: np.ndarray) -> None:
+        """
+        Write the next batch of vectors.
+
+        Args:
+            batch: A 2D array of vectors.
+        """
+        batch = np.asarray(batch)
+        if self._dim is None:
+            self._dim = batch.shape[1]
+        elif batch.shape[1] != self._dim:
+            raise ValueError(f"Expected vectors of dimension {self._dim} but received {batch.shape[1]}.")
+
+        end = self._rows_written + len(batch)
+        if self.num_rows is None:
+            self._append(batch)
+        else:
+            if end > self.num_rows:
+                raise ValueError(f"Received more than the expected {self.num_rows} vectors.")
+            if self._array is None:
+                self._array = np.lib.format.open_memmap(
+                    self._local_path,
+                    mode="w+",
+                    dtype=self.dtype,
+                    shape=(self.num_rows, self._dim),
+                )
+            self._array[self._rows_written : end] = batch
+        self._rows_written = end
+
+    def _append(self, batch: np.ndarray) -> None:
+        """Append a batch to a stream of unknown length, reserving space for the header first."""
+        if self._stream is None:
+            self._stream = self._local_path.open("wb")
+            self._stream.write(b"\0" * _STREAM_HEADER_SIZE)
+        self._stream.write(np.ascontiguousarray(batch, dtype=self.dtype).tobytes())
+
+    def close(self) -> dict[str, Any]:
+        """
+        Flush the file, upload it if needed and return its metadata.
+
+        Returns:
+            A JSON-serializable dict with the path, shape and dtype of the stored matrix.
+        """
+        if self.num_rows is not None and self._rows_written != self.num_rows:
+            raise ValueError(f"Expected {self.num_rows} vectors but received {self._rows_written}.")
+
+        shape = (self._rows_written, self._dim or 0)
+        if self._stream is not None:
+            self._stream.seek(0)
+            self._stream.write(_npy_header(self.dtype, shape, _STREAM_HEADER_SIZE))
+            self._stream.close()
+            self._stream = None
+        elif self._array is not None:
+            self._array.flush()
+            self._array = None
+        else:
+            # nothing was written, store an empty matrix
+            with self._local_path.open("wb") as f:
+                np.save(f, np.empty(shape, dtype=self.dtype))
+
+        if self._tmp_dir is not None:
+            with self._local_path.open("rb") as src, object_storage_path(self.path).open("wb") as dst:
+                shutil.copyfileobj(src, dst)
+            self._tmp_dir.cleanup()
+
+        return {
+            "format": "npy",
+            "path": self.path,
+            "shape": list(shape),
+            "dtype": self.dtype.str,
+        }
+
+
+def load_embeddings(metadata: dict[str, Any], mmap_mode: str | None = "r") -> np.ndarray:
+    """
+    Open a matrix written by `NpySink`.
+
+    Local files are memory-mapped, so opening them is zero-copy. Files in object storage are
+    downloaded into memory.
+
+    Args:
+        metadata: The metadata returned by `NpySink.close`, as pushed to XCom by `@task.embed`.
+        mmap_mode: The `mmap_mode` passed to `np.load` for local files.
+
+    Returns:
+        The stored 2D array of vectors.
+    """
+    path = metadata["path"]
+    if is_local(path):
+        return np.load(local_path(path), mmap_mode=mmap_mode)
+
+    with object_storage_path(path).open("rb") as f:
+        return np.load(f)
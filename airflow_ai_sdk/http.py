@@ -0,0 +1,318 @@
+"""
+This module provides a process-wide pooled HTTP client for model providers, so that all agents
+built by the SDK reuse keep-alive (and, with `h2` installed, HTTP/2) connections instead of
+paying for new TCP and TLS handshakes in every task and every agent. Pooling is opt-in, see
+`configure_http_client`.
+"""
+
+import asyncio
+import importlib
+import inspect
+import logging
+import os
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from typing import Any
+
+import httpx
+from pydantic_ai.exceptions import UserError
+
+log = logging.getLogger(__name__)
+
+# pydantic_ai model classes by provider, for the providers whose clients accept an httpx client
+_MODEL_CLASSES = {
+    "openai": "pydantic_ai.models.openai.OpenAIModel",
+    "deepseek": "pydantic_ai.models.openai.OpenAIModel",
+    "azure": "pydantic_ai.models.openai.OpenAIModel",
+    "openrouter": "pydantic_ai.models.openai.OpenAIModel",
+    "grok": "pydantic_ai.models.openai.OpenAIModel",
+    "fireworks": "pydantic_ai.models.openai.OpenAIModel",
+    "together": "pydantic_ai.models.openai.OpenAIModel",
+    "anthropic": "pydantic_ai.models.anthropic.AnthropicModel",
+    "google-gla": "pydantic_ai.models.google.GoogleModel",
+    "groq": "pydantic_ai.models.groq.GroqModel",
+    "mistral": "pydantic_ai.models.mistral.MistralModel",
+    "cohere": "pydantic_ai.models.cohere.CohereModel",
+}
+
+_DEFAULTS: dict[str, Any] = {
+    "enabled": ("AIRFLOW_AI_SDK_HTTP_POOL", False),
+    "http2": ("AIRFLOW_AI_SDK_HTTP2", True),
+    "max_connections": ("AIRFLOW_AI_SDK_HTTP_MAX_CONNECTIONS", 100),
+    "max_keepalive_connections": ("AIRFLOW_AI_SDK_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20),
+    "keepalive_expiry": ("AIRFLOW_AI_SDK_HTTP_KEEPALIVE_EXPIRY", 30.0),
+    "timeout": ("AIRFLOW_AI_SDK_HTTP_TIMEOUT", 600.0),
+    "connect_timeout": ("AIRFLOW_AI_SDK_HTTP_CONNECT_TIMEOUT", 5.0),
+}
+
+_settings: dict[str, Any] = {}
+_client: httpx.AsyncClient | None = None
+_providers: dict[str, Any] = {}
+_stats = {"requests": 0, "connections_opened": 0, "tls_handshakes": 0, "http2_requests": 0}
+_lock = threading.Lock()
+
+# set by callers that want to know when response headers arrive, e.g. to measure time to first byte
+response_times: ContextVar[list[float] | None] = ContextVar("response_times", default=None)
+
+
+def _setting(name: str) -> Any:  # noqa: ANN401
+    """Return a setting from `configure_http_client`, the environment or the default."""
+    if name in _settings:
+        return _settings[name]
+    env, default = _DEFAULTS[name]
+    value = os.environ.get(env)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.strip().lower() not in ("0", "false", "no", "off")
+    return type(default)(value)
+
+
+def configure_http_client(
+    *,
+    enabled: bool | None = None,
+    http2: bool | None = None,
+    max_connections: int | None = None,
+    max_keepalive_connections: int | None = None,
+    keepalive_expiry: float | None = None,
+    timeout: float | None = None,
+    connect_timeout: float | None = None,
+) -> None:
+    """
+    Configure the shared HTTP client of the process.
+
+    Settings that aren't passed keep their current value, which defaults to the
+    `AIRFLOW_AI_SDK_HTTP_*` environment variables. Agents built afterwards use a new client with
+    the new settings.
+
+    Args:
+        enabled: Whether SDK-built agents use the shared client (`AIRFLOW_AI_SDK_HTTP_POOL`).
+            Off by default, so agents use the HTTP clients pydantic_ai builds for them.
+        http2: Whether to use HTTP/2 if `h2` is installed (`AIRFLOW_AI_SDK_HTTP2`).
+        max_connections: The maximum number of open connections per event loop.
+        max_keepalive_connections: The maximum number of idle connections kept open.
+        keepalive_expiry: How long idle connections are kept open, in seconds.
+        timeout: The read, write and pool timeout of requests, in seconds.
+        connect_timeout: The connect timeout of requests, in seconds.
+    """
+    global _client
+    values = {
+        "enabled": enabled,
+        "http2": http2,
+        "max_connections": max_connections,
+        "max_keepalive_connections": max_keepalive_connections,
+        "keepalive_expiry": keepalive_expiry,
+        "timeout": timeout,
+        "connect_timeout": connect_timeout,
+    }
+    with _lock:
+        _settings.update({name: value for name, value in values.items() if value is not None})
+        # existing agents keep their client; new agents get one with the new settings
+        _client = None
+        _providers.clear()
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    Keeps one connection pool per event loop, since connections can't move between loops, e.g.
+    between the loop of `Agent.run_sync` and the loop of an agent run in a tool's thread.
+    """
+
+    def __init__(self, http2: bool, limits: httpx.Limits):
+        self.http2 = http2
+        self.limits = limits
+        self._transports: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+                self._transports[loop] = transport
+            return transport
+
+    def open_connections(self) -> int:
+        """The number of connections open in all pools."""
+        with self._lock:
+            pools = [getattr(transport, "_pool", None) for transport in self._transports.values()]
+        return sum(len(getattr(pool, "connections", [])) for pool in pools)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+async def _trace(event_name: str, info: dict[str, Any]) -> None:  # noqa: ARG001
+    """Count new connections, TLS handshakes and HTTP/2 requests from httpcore trace events."""
+    if event_name == "connection.connect_tcp.complete":
+        key = "connections_opened"
+    elif event_name == "connection.start_tls.complete":
+        key = "tls_handshakes"
+    elif event_name == "http2.send_request_headers.started":
+        key = "http2_requests"
+    else:
+        return
+    with _lock:
+        _stats[key] += 1
+
+
+async def _on_request(request: httpx.Request) -> None:
+    with _lock:
+        _stats["requests"] += 1
+    trace = request.extensions.get("trace")
+    if trace is None:
+        request.extensions["trace"] = _trace
+    else:
+
+        async def both(event_name: str, info: dict[str, Any]) -> None:
+            await _trace(event_name, info)
+            await trace(event_name, info)
+
+        request.extensions["trace"] = both
+
+
+async def _on_response(response: httpx.Response) -> None:  # noqa: ARG001
+    times = response_times.get()
+    if times is not None:
+        times.append(time.monotonic())
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the HTTP client shared by all SDK-built agents in the process.
+
+    Returns:
+        An `httpx.AsyncClient` with keep-alive connection pools, using HTTP/2 if enabled and `h2`
+        is installed.
+    """
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            http2 = bool(_setting("http2"))
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    print("h2 isn't installed, the shared HTTP client uses HTTP/1.1 keep-alive connections")
+                    http2 = False
+            limits = httpx.Limits(
+                max_connections=_setting("max_connections"),
+                max_keepalive_connections=_setting("max_keepalive_connections"),
+                keepalive_expiry=_setting("keepalive_expiry"),
+            )
+            _client = httpx.AsyncClient(
+                transport=_LoopLocalTransport(http2, limits),
+                timeout=httpx.Timeout(_setting("timeout"), connect=_setting("connect_timeout")),
+                event_hooks={"request": [_on_request], "response": [_on_response]},
+            )
+        return _client
+
+
+def http_client_stats() -> dict[str, int]:
+    """
+    Return the statistics of the shared HTTP client since the process started.
+
+    Returns:
+        The numbers of `requests`, `connections_opened`, `tls_handshakes` and `http2_requests`,
+        the number of requests that `reused_connections` and the currently `open_connections`.
+    """
+    with _lock:
+        stats = dict(_stats)
+        client = _client
+    stats["reused_connections"] = max(stats["requests"] - stats["connections_opened"], 0)
+    transport = getattr(client, "_transport", None)
+    stats["open_connections"] = (
+        transport.open_connections() if isinstance(transport, _LoopLocalTransport) else 0
+    )
+    return stats
+
+
+async def close_loop_connections() -> None:
+    """
+    Close the connections of the shared HTTP client that belong to the running event loop.
+
+    Connections can't outlive their event loop, so call this at the end of a coroutine passed to
+    `asyncio.run` that made requests with SDK-built agents. The client stays usable and opens new
+    connections in other event loops.
+    """
+    with _lock:
+        client = _client
+    transport = getattr(client, "_transport", None)
+    if isinstance(transport, _LoopLocalTransport):
+        await transport.aclose()
+
+
+def _split_model_name(model: str) -> tuple[str | None, str]:
+    """Split a model name into the provider and the provider's model name, like pydantic_ai does."""
+    if ":" in model:
+        provider, name = model.split(":", 1)
+        return provider, name
+    if model.startswith(("gpt", "o1", "o3", "o4", "chatgpt")):
+        return "openai", model
+    if model.startswith("claude"):
+        return "anthropic", model
+    if model.startswith("gemini"):
+        return "google-gla", model
+    return None, model
+
+
+def shared_model(model: Any) -> Any:  # noqa: ANN401
+    """
+    Build a model from a model name whose provider uses the shared HTTP client.
+
+    Providers are created once per process and reuse the client, so agents built in tools or in
+    many tasks share its connections. Model names are returned unchanged, so pydantic_ai builds
+    them as usual, unless pooling is enabled with `configure_http_client` or
+    `AIRFLOW_AI_SDK_HTTP_POOL`. Model instances, unknown providers and providers whose package
+    isn't installed are returned unchanged too.
+
+    Example:
+
+    ```python
+    from pydantic_ai import Agent
+    from airflow_ai_sdk.http import shared_model
+
+    agent = Agent(shared_model("openai:gpt-4o-mini"), system_prompt="Summarize the text.")
+    ```
+
+    Args:
+        model: A model name such as `"openai:gpt-4o-mini"`, or a `pydantic_ai` model.
+
+    Returns:
+        The model using the shared client, or `model`.
+    """
+    if not isinstance(model, str) or not _setting("enabled"):
+        return model
+    provider_name, name = _split_model_name(model)
+    if provider_name not in _MODEL_CLASSES:
+        return model
+
+    try:
+        from pydantic_ai.providers import infer_provider_class
+
+        module_name, class_name = _MODEL_CLASSES[provider_name].rsplit(".", 1)
+        model_class = getattr(importlib.import_module(module_name), class_name)
+        with _lock:
+            provider = _providers.get(provider_name)
+        if provider is None:
+            provider_class = infer_provider_class(provider_name)
+            if "http_client" not in inspect.signature(provider_class).parameters:
+                return model
+            provider = provider_class(http_client=get_http_client())
+            with _lock:
+                provider = _providers.setdefault(provider_name, provider)
+        return model_class(name, provider=provider)
+    except (ImportError, UserError) as e:
+        log.warning("Not using the shared HTTP client for %s: %s", model, e)
+        return model
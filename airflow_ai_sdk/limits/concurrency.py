@@ -0,0 +1,373 @@
+"""
+This module provides adaptive concurrency control for model requests. The number of requests
+in flight grows additively while the provider keeps up and shrinks multiplicatively when it
+answers with rate-limit or overload errors (AIMD), so agents ride at the provider's capacity.
+"""
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+
+def _status_code(error: BaseException) -> int | None:
+    """Find the HTTP status code of an error or of the provider SDK error it was raised from."""
+    while error is not None:
+        status_code = getattr(error, "status_code", None)
+        if status_code is None:
+            status_code = getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status_code, int):
+            return status_code
+        error = error.__cause__
+    return None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """
+    Read the delay a provider asked for in the `Retry-After` header of an error response.
+
+    pydantic-ai raises `ModelHTTPError` from the provider SDK's error, which holds the response,
+    so the exception chain is searched for response headers. Both `retry-after-ms` and
+    `Retry-After` in seconds or as an HTTP date are supported.
+
+    Args:
+        error: The error raised by a model request.
+
+    Returns:
+        The delay in seconds, or `None` if the response had no `Retry-After` header.
+    """
+    while error is not None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or getattr(
+            error, "headers", None
+        )
+        if headers:
+            try:
+                if headers.get("retry-after-ms"):
+                    return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+                value = headers.get("retry-after")
+                if value:
+                    try:
+                        return max(float(value), 0.0)
+                    except ValueError:
+                        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return None
+        error = error.__cause__
+    return None
+
+
+def is_overload(error: BaseException) -> bool:
+    """
+    Whether an error means the provider is rate limiting or overloaded: HTTP 429 or any 5xx.
+
+    Args:
+        error: The error raised by a model request.
+
+    Returns:
+        `True` if the request should be retried with less concurrency.
+    """
+    status_code = _status_code(error)
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on the number of concurrent model requests.
+
+    Each successful request raises the limit by `increase / limit`, i.e. by `increase` per
+    window of `limit` successes. A 429 or 5xx response multiplies the limit by `decrease`, once
+    per burst of failures: requests that started before the last decrease don't decrease it
+    again. Failed requests are retried after the provider's `Retry-After` delay, or with
+    exponential backoff, and no new requests start until the `Retry-After` delay has passed.
+
+    The limiter is shared by all requests in the process that use it, across threads and event
+    loops, and is shared, not copied, when an operator is deep-copied.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.limits.concurrency import AdaptiveConcurrencyLimiter
+
+    @task.llm_batch(
+        model="gpt-4o-mini",
+        system_prompt="Classify the ticket.",
+        max_concurrency=64,
+        adaptive_concurrency=AdaptiveConcurrencyLimiter(initial=8, max_concurrency=64),
+    )
+    def classify(tickets: list[str]) -> list[str]:
+        return tickets
+    ```
+    """
+
+    def __init__(
+        self,
+        initial: float = 4,
+        min_concurrency: float = 1,
+        max_concurrency: float = 64,
+        increase: float = 1,
+        decrease: float = 0.5,
+        max_retries: int = 5,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+    ):
+        """
+        Initialize the AdaptiveConcurrencyLimiter.
+
+        Args:
+            initial: The initial concurrency limit.
+            min_concurrency: The lowest limit the limiter decreases to.
+            max_concurrency: The highest limit the limiter increases to.
+            increase: How much the limit grows per window of successful requests.
+            decrease: The factor the limit is multiplied by on a rate-limit or overload response.
+            max_retries: How many times a request is retried on rate-limit or overload responses.
+            retry_delay: The first backoff delay in seconds if the response has no `Retry-After`.
+            max_retry_delay: The longest delay in seconds, also capping `Retry-After`.
+        """
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1.")
+        if not 1 <= min_concurrency <= initial <= max_concurrency:
+            raise ValueError("The limits must satisfy 1 <= min_concurrency <= initial <= max_concurrency.")
+        self.limit = float(initial)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.successes = 0
+        self.overloads = 0
+        self.retries = 0
+        self._decreased_at = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+
+    def _wake(self) -> None:
+        """Wake the waiters that fit under the limit. Must be called holding the lock."""
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            loop, future = self._waiters.pop(0)
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+            free -= 1
+
+    async def acquire(self) -> float:
+        """
+        Wait for a free slot under the limit and take it.
+
+        Returns:
+            The time the slot was taken, to pass to `release`.
+        """
+        while True:
+            delay = self._blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            with self._lock:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                    return time.monotonic()
+                future = asyncio.get_running_loop().create_future()
+                self._waiters.append((asyncio.get_running_loop(), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    self._waiters = [waiter for waiter in self._waiters if waiter[1] is not future]
+                    if future.done() and not future.cancelled():
+                        # pass the wake-up on to the next waiter
+                        self._wake()
+                raise
+
+    def release(self, started: float, error: BaseException | None = None) -> float | None:
+        """
+        Free a slot and adapt the limit to the outcome of the request.
+
+        Args:
+            started: The time returned by `acquire`.
+            error: The error the request raised, or `None` if it succeeded. Errors other than
+                rate-limit and overload responses leave the limit unchanged.
+
+        Returns:
+            The `Retry-After` delay if the request was rate limited or overloaded and the
+            provider asked for one, else `None`.
+        """
+        delay = None
+        with self._lock:
+            self.in_flight -= 1
+            if error is None:
+                self.successes += 1
+                self.limit = min(self.max_concurrency, self.limit + self.increase / self.limit)
+            elif is_overload(error):
+                self.overloads += 1
+                if started >= self._decreased_at:
+                    self.limit = max(self.min_concurrency, self.limit * self.decrease)
+                    self._decreased_at = time.monotonic()
+                delay = retry_after(error)
+                if delay is not None:
+                    delay = min(delay, self.max_retry_delay)
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._wake()
+        return delay
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Count a retry of a rate-limited or overloaded request and return the delay before it.
+
+        Args:
+            attempt: The number of the failed attempt, starting at 0.
+            retry_after: The delay the provider asked for, if any.
+
+        Returns:
+            `retry_after`, or exponential backoff with jitter, capped at `max_retry_delay`.
+        """
+        with self._lock:
+            self.retries += 1
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_delay)
+        delay = min(self.retry_delay * 2**attempt, self.max_retry_delay)
+        return delay / 2 + random.uniform(0, delay / 2)  # noqa: S311
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the current limit and counters of the limiter.
+
+        Returns:
+            The `limit`, `peak_in_flight` and the numbers of `successes`, `overloads` and `retries`.
+        """
+        return {
+            "limit": round(self.limit, 2),
+            "peak_in_flight": self.peak_in_flight,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "retries": self.retries,
+        }
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "AdaptiveConcurrencyLimiter":
+        return self
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_waiters"] = []
+        state["in_flight"] = 0
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class AdaptiveConcurrencyModel(WrapperModel):
+    """
+    Model wrapper that runs every request under an `AdaptiveConcurrencyLimiter` and retries
+    rate-limited or overloaded requests.
+
+    Streamed requests hold their slot until the stream ends, and are retried if opening the
+    stream fails; errors after the response started streaming aren't retried.
+
+    Example:
+
+    ```python
+    from pydantic_ai import Agent
+    from airflow_ai_sdk.limits.concurrency import AdaptiveConcurrencyLimiter, AdaptiveConcurrencyModel
+
+    agent = Agent(AdaptiveConcurrencyModel("openai:gpt-4o-mini", AdaptiveConcurrencyLimiter()))
+    ```
+    """
+
+    def __init__(self, wrapped: Any, limiter: AdaptiveConcurrencyLimiter):  # noqa: ANN401
+        """
+        Initialize the AdaptiveConcurrencyModel.
+
+        Args:
+            wrapped: The model or model name to wrap.
+            limiter: The limiter the requests run under.
+        """
+        super().__init__(wrapped)
+        self.limiter = limiter
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        """Make the request in a slot of the limiter, retrying on rate-limit and overload errors."""
+        attempt = 0
+        while True:
+            started = await self.limiter.acquire()
+            try:
+                response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+            except Exception as e:
+                await self._retry(started, e, attempt)
+                attempt += 1
+            except BaseException as e:
+                self.limiter.release(started, e)
+                raise
+            else:
+                self.limiter.release(started)
+                return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        """Stream the response in a slot of the limiter, retrying on rate-limit and overload errors."""
+        attempt = 0
+        while True:
+            started = await self.limiter.acquire()
+            stream = self.wrapped.request_stream(messages, model_settings, model_request_parameters)
+            try:
+                response = await stream.__aenter__()
+            except Exception as e:
+                await self._retry(started, e, attempt)
+                attempt += 1
+            except BaseException as e:
+                self.limiter.release(started, e)
+                raise
+            else:
+                break
+
+        error = None
+        try:
+            yield response
+        except BaseException as e:
+            error = e
+            if not await stream.__aexit__(type(e), e, e.__traceback__):
+                raise
+        else:
+            await stream.__aexit__(None, None, None)
+        finally:
+            self.limiter.release(started, error)
+
+    async def _retry(self, started: float, error: Exception, attempt: int) -> None:
+        """Release the slot of a failed request and wait before retrying it, or re-raise the error."""
+        delay = self.limiter.release(started, error)
+        if not is_overload(error) or attempt >= self.limiter.max_retries:
+            raise error
+        # wait without holding a slot
+        delay = self.limiter.backoff(attempt, delay)
+        print(
+            f"Model request to {self.model_name} was rate limited or overloaded, "
+            f"retrying in {delay:.1f}s with concurrency limit {self.limiter.limit:.1f}"
+        )
+        await asyncio.sleep(delay)
@@ -0,0 +1,393 @@
+"""
+This module provides a token-bucket rate limiter for model requests that is shared by all tasks
+on a node, so that many concurrent tasks stay within a provider's requests-per-minute and
+tokens-per-minute limits instead of failing with 429 responses.
+"""
+
+import asyncio
+import json
+import math
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, TypeVar
+
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+T = TypeVar("T")
+
+
+class RateLimitStore(ABC):
+    """
+    Base class of stores that hold the state of rate limit buckets.
+
+    A store applies updates to the state of a bucket atomically, so that limiters in different
+    threads or processes sharing the store see a consistent state. Implement `update` to back
+    the limiter by another store, e.g. Redis to share limits between nodes.
+    """
+
+    @abstractmethod
+    def update(self, key: str, fn: Callable[[dict[str, float] | None], tuple[dict[str, float], T]]) -> T:
+        """
+        Atomically update the state of a bucket.
+
+        Args:
+            key: The bucket's key.
+            fn: Receives the current state, or `None` for a new bucket, and returns the new state
+                and a result.
+
+        Returns:
+            The result returned by `fn`.
+        """
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "RateLimitStore":
+        return self
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Rate limit store held in the memory of the current process.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.limits.rate_limit import InMemoryRateLimitStore, RateLimiter
+
+    limiter = RateLimiter(requests_per_minute=500, store=InMemoryRateLimitStore())
+    ```
+    """
+
+    def __init__(self) -> None:
+        """Initialize the InMemoryRateLimitStore."""
+        self._states: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, key: str, fn: Callable[[dict[str, float] | None], tuple[dict[str, float], T]]) -> T:
+        """
+        Atomically update the state of a bucket.
+
+        Args:
+            key: The bucket's key.
+            fn: Receives the current state and returns the new state and a result.
+
+        Returns:
+            The result returned by `fn`.
+        """
+        with self._lock:
+            self._states[key], result = fn(self._states.get(key))
+            return result
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """
+    Rate limit store in a SQLite file, shared by all processes that open the same file.
+
+    Updates run in an immediate transaction, so the file lock serializes them across processes.
+    The connection is opened on first use, so the store can be created at DAG parse time.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.limits.rate_limit import RateLimiter, SQLiteRateLimitStore
+
+    limiter = RateLimiter(tokens_per_minute=200_000, store=SQLiteRateLimitStore("/tmp/limits.sqlite"))
+    ```
+    """
+
+    def __init__(self, path: str | Path | None = None, timeout: float = 60.0):
+        """
+        Initialize the SQLiteRateLimitStore.
+
+        Args:
+            path: The path of the SQLite file. Defaults to a file in the temporary directory that
+                all tasks of the node share.
+            timeout: How long to wait for a lock held by another process, in seconds.
+        """
+        self.path = (
+            Path(path).expanduser()
+            if path is not None
+            else Path(tempfile.gettempdir()) / "airflow-ai-sdk-rate-limits.sqlite"
+        )
+        self.timeout = timeout
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, state TEXT)")
+        return self._conn
+
+    def update(self, key: str, fn: Callable[[dict[str, float] | None], tuple[dict[str, float], T]]) -> T:
+        """
+        Atomically update the state of a bucket.
+
+        Args:
+            key: The bucket's key.
+            fn: Receives the current state and returns the new state and a result.
+
+        Returns:
+            The result returned by `fn`.
+        """
+        with self._lock:
+            conn = self._connection
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT state FROM buckets WHERE key = ?", (key,)).fetchone()
+                state, result = fn(json.loads(row[0]) if row else None)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, state) VALUES (?, ?)", (key, json.dumps(state))
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def estimate_tokens(
+    messages: list[ModelMessage], model_settings: ModelSettings | None, output_tokens: int = 500
+) -> int:
+    """
+    Estimate the tokens a model request will use before it is sent.
+
+    Input tokens are estimated as one token per four characters of the messages, and output
+    tokens as the request's `max_tokens` setting or `output_tokens`.
+
+    Args:
+        messages: The messages of the request.
+        model_settings: The settings of the request.
+        output_tokens: The estimated output tokens if `max_tokens` isn't set.
+
+    Returns:
+        The estimated total tokens.
+    """
+    characters = 0
+    for message in messages:
+        for part in message.parts:
+            content = getattr(part, "content", None) or getattr(part, "args", None) or ""
+            characters += len(content if isinstance(content, str) else json.dumps(content, default=str))
+    return math.ceil(characters / 4) + ((model_settings or {}).get("max_tokens") or output_tokens)
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter of requests and tokens per minute for a model or provider.
+
+    Each limit is a bucket that holds up to one minute of budget and refills continuously.
+    A request takes one request and its estimated tokens from the buckets, waiting until both
+    have enough budget; once the response arrives, the difference between the actual and
+    estimated tokens is settled, so the bucket may go into debt that later requests wait out.
+    The bucket state lives in a `RateLimitStore`, by default a SQLite file shared by all tasks
+    on the node, and is keyed by `key`, so limiters with the same key share one budget.
+
+    Limiters are shared, not copied, when an operator is deep-copied.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.limits.rate_limit import RateLimiter
+
+    openai_limits = RateLimiter(requests_per_minute=500, tokens_per_minute=200_000, key="openai:gpt-4o-mini")
+
+    @task.llm(model="gpt-4o-mini", system_prompt="Summarize the text.", rate_limiter=openai_limits)
+    def summarize(text: str) -> str:
+        return text
+    ```
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        key: str | None = None,
+        store: RateLimitStore | None = None,
+        output_tokens: int = 500,
+    ):
+        """
+        Initialize the RateLimiter.
+
+        Args:
+            requests_per_minute: The maximum number of requests per minute. `None` means unlimited.
+            tokens_per_minute: The maximum number of tokens per minute. `None` means unlimited.
+            key: The key of the budget in the store. Defaults to the name of the model the limiter
+                is applied to, so each model gets its own budget.
+            store: The store of the bucket state. Defaults to a `SQLiteRateLimitStore` in the
+                temporary directory.
+            output_tokens: The estimated output tokens of requests without `max_tokens`.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.key = key
+        self.store = store if store is not None else SQLiteRateLimitStore()
+        self.output_tokens = output_tokens
+
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self, state: dict[str, float] | None, now: float) -> dict[str, float]:
+        rpm = self.requests_per_minute or 0
+        tpm = self.tokens_per_minute or 0
+        if state is None:
+            return {"requests": rpm, "tokens": tpm, "time": now}
+        elapsed = max(now - state["time"], 0.0)
+        return {
+            "requests": min(rpm, state["requests"] + elapsed * rpm / 60),
+            "tokens": min(tpm, state["tokens"] + elapsed * tpm / 60),
+            "time": now,
+        }
+
+    def _take(self, key: str, tokens: int) -> float:
+        """Take a request and `tokens` from the buckets if they have enough budget, else return the wait."""
+
+        def take(state: dict[str, float] | None) -> tuple[dict[str, float], float]:
+            state = self._refill(state, time.time())
+            wait = 0.0
+            if self.requests_per_minute and state["requests"] < 1:
+                wait = (1 - state["requests"]) * 60 / self.requests_per_minute
+            if self.tokens_per_minute:
+                # requests larger than the bucket only wait for a full bucket
+                needed = min(tokens, self.tokens_per_minute)
+                if state["tokens"] < needed:
+                    wait = max(wait, (needed - state["tokens"]) * 60 / self.tokens_per_minute)
+            if wait == 0:
+                state["requests"] -= 1
+                state["tokens"] -= tokens
+            return state, wait
+
+        return self.store.update(key, take)
+
+    def acquire(self, key: str, tokens: int) -> None:
+        """
+        Wait until the budget allows a request using an estimated number of tokens, then take it.
+
+        Args:
+            key: The key of the budget, used if the limiter has no `key`.
+            tokens: The estimated tokens of the request.
+        """
+        while (wait := self._take(self.key or key, tokens)) > 0:
+            self.waits += 1
+            self.wait_seconds += wait
+            time.sleep(wait)
+
+    async def acquire_async(self, key: str, tokens: int) -> None:
+        """
+        Like `acquire`, but waits without blocking the event loop. The store is updated in a
+        worker thread, since a SQLite store may wait for a lock held by another process.
+
+        Args:
+            key: The key of the budget, used if the limiter has no `key`.
+            tokens: The estimated tokens of the request.
+        """
+        while (wait := await asyncio.to_thread(self._take, self.key or key, tokens)) > 0:
+            self.waits += 1
+            self.wait_seconds += wait
+            await asyncio.sleep(wait)
+
+    def reconcile(self, key: str, estimated: int, actual: int) -> None:
+        """
+        Settle the difference between the estimated and actual tokens of a request.
+
+        Args:
+            key: The key of the budget, used if the limiter has no `key`.
+            estimated: The tokens taken by `acquire`.
+            actual: The tokens the request actually used.
+        """
+        if not self.tokens_per_minute or actual == estimated:
+            return
+
+        def settle(state: dict[str, float] | None) -> tuple[dict[str, float], None]:
+            state = self._refill(state, time.time())
+            state["tokens"] = min(self.tokens_per_minute, state["tokens"] - (actual - estimated))
+            return state, None
+
+        self.store.update(self.key or key, settle)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "RateLimiter":
+        return self
+
+
+class RateLimitedModel(WrapperModel):
+    """
+    Model wrapper that takes every request, streamed or not, from a `RateLimiter` budget.
+
+    Example:
+
+    ```python
+    from pydantic_ai import Agent
+    from airflow_ai_sdk.limits.rate_limit import RateLimitedModel, RateLimiter
+
+    model = RateLimitedModel("openai:gpt-4o-mini", RateLimiter(requests_per_minute=60))
+    agent = Agent(model)
+    ```
+    """
+
+    def __init__(self, wrapped: Any, limiter: RateLimiter):  # noqa: ANN401
+        """
+        Initialize the RateLimitedModel.
+
+        Args:
+            wrapped: The model or model name to wrap.
+            limiter: The limiter each request takes its budget from.
+        """
+        super().__init__(wrapped)
+        self.limiter = limiter
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        """Wait for the budget, make the request and settle its actual token usage."""
+        key = f"{self.system}:{self.model_name}"
+        estimated = estimate_tokens(messages, model_settings, self.limiter.output_tokens)
+        await self.limiter.acquire_async(key, estimated)
+        response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+        actual = response.usage.total_tokens
+        if actual:
+            await asyncio.to_thread(self.limiter.reconcile, key, estimated, actual)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        """Wait for the budget, stream the response and settle its token usage once the stream ends."""
+        key = f"{self.system}:{self.model_name}"
+        estimated = estimate_tokens(messages, model_settings, self.limiter.output_tokens)
+        await self.limiter.acquire_async(key, estimated)
+        async with self.wrapped.request_stream(
+            messages, model_settings, model_request_parameters
+        ) as response:
+            try:
+                yield response
+            finally:
+                actual = response.usage().total_tokens
+                if actual:
+                    await asyncio.to_thread(self.limiter.reconcile, key, estimated, actual)
@@ -2,18 +2,89 @@
 This module provides a wrapper around pydantic_ai.Tool for better observability in Airflow.
 """
 
+import functools
+import inspect
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from pydantic_ai import RunContext
 from pydantic_ai import Tool as PydanticTool
-from pydantic_ai.messages import RetryPromptPart, ToolCallPart, ToolReturnPart
 from pydantic_ai.tools import AgentDepsT
 
 
+@contextmanager
+def _observe_call(name: str, arguments: dict[str, Any]) -> Iterator[None]:
+    """
+    Print a tool call in a log group, trace it in an `execute_tool` span and record it with the
+    active `UsageRecorder`.
+    """
+    from airflow_ai_sdk.telemetry.metrics import UsageRecorder
+    from airflow_ai_sdk.telemetry.tracing import start_span
+
+    print(f"::group::Calling tool {name} with args {arguments}")
+    recorder = UsageRecorder.current()
+    attributes = {"gen_ai.operation.name": "execute_tool", "gen_ai.tool.name": name}
+    start = time.monotonic()
+    try:
+        with start_span(f"execute_tool {name}", attributes):
+            yield
+    except Exception as e:
+        # includes ModelRetry, which asks the model to call the tool again
+        print(f"Error: {e}")
+        if recorder is not None:
+            recorder.record_tool_call(name, time.monotonic() - start, error=True)
+        raise
+    else:
+        if recorder is not None:
+            recorder.record_tool_call(name, time.monotonic() - start)
+    finally:
+        print("::endgroup::")
+
+
+def _observed(function: Callable[..., Any], name: str) -> Callable[..., Any]:
+    """Wrap a tool function so that its calls are observed, keeping its signature and docstring."""
+    from pprint import pprint
+
+    signature = inspect.signature(function)
+
+    def arguments(args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, Any]:
+        bound = signature.bind_partial(*args, **kwargs).arguments
+        return {key: value for key, value in bound.items() if not isinstance(value, RunContext)}
+
+    if inspect.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def observed_async(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            with _observe_call(name, arguments(args, kwargs)):
+                result = await function(*args, **kwargs)
+                print("Result")
+                pprint(result)
+            return result
+
+        return observed_async
+
+    # sync tools keep running in a worker thread, with the context of the agent run
+    @functools.wraps(function)
+    def observed(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        with _observe_call(name, arguments(args, kwargs)):
+            result = function(*args, **kwargs)
+            print("Result")
+            pprint(result)
+        return result
+
+    return observed
+
+
 class WrappedTool(PydanticTool[AgentDepsT]):
     """
     Wrapper around `pydantic_ai.Tool` for better observability in Airflow.
 
     This class extends the `pydantic_ai.Tool` class to provide enhanced logging
     capabilities in Airflow. It wraps tool calls and results in log groups for
-    better visibility in the Airflow UI.
+    better visibility in the Airflow UI, traces them in OpenTelemetry spans and
+    records their duration with the active `UsageRecorder`.
 
     Example:
 
@@ -26,34 +97,16 @@ class WrappedTool(PydanticTool[AgentDepsT]):
     ```
     """
 
-    async def run(
-        self,
-        message: ToolCallPart,
-        *args: object,
-        **kwargs: object,
-    ) -> ToolReturnPart | RetryPromptPart:
+    def __init__(self, function: Callable[..., Any], **kwargs: Any):  # noqa: ANN401
         """
-        Execute the tool with enhanced logging.
+        Initialize the WrappedTool.
 
         Args:
-            message: The tool call message containing the tool name and arguments.
-            *args: Additional positional arguments for the tool.
-            **kwargs: Additional keyword arguments for the tool.
-
-        Returns:
-            The tool's return value wrapped in a ToolReturnPart or RetryPromptPart.
+            function: The tool function. It is wrapped so that its calls are observed.
+            **kwargs: Keyword arguments for `pydantic_ai.Tool`.
         """
-        from pprint import pprint
-
-        print(f"::group::Calling tool {message.tool_name} with args {message.args}")
-
-        result = await super().run(message, *args, **kwargs)
-        print("Result")
-        pprint(result.content)
-
-        print(f"::endgroup::")
-
-        return result
+        name = kwargs.get("name") or function.__name__
+        super().__init__(_observed(function, name), **kwargs)
 
     @classmethod
     def from_pydantic_tool(cls, tool: PydanticTool[AgentDepsT]) -> "WrappedTool[AgentDepsT]":
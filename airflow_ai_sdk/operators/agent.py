@@ -3,13 +3,28 @@ This module provides the AgentDecoratedOperator class for executing pydantic_ai.
 instances within Airflow tasks.
 """
 
-from typing import Any
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
 
 from pydantic_ai import Agent
 
 from airflow_ai_sdk.airflow import Context, _PythonDecoratedOperator
 from airflow_ai_sdk.models.base import BaseModel
 from airflow_ai_sdk.models.tool import WrappedTool
+from airflow_ai_sdk.telemetry.metrics import InstrumentedModel, UsageRecorder
+from airflow_ai_sdk.telemetry.tracing import (
+    agent_run_span,
+    current_task_attributes,
+    set_usage_attributes,
+    task_attributes,
+    trace_context,
+)
+
+if TYPE_CHECKING:
+    from airflow_ai_sdk.caching.response import ResponseCache
+    from airflow_ai_sdk.limits.concurrency import AdaptiveConcurrencyLimiter
+    from airflow_ai_sdk.limits.rate_limit import RateLimiter
 
 
 class AgentDecoratedOperator(_PythonDecoratedOperator):
@@ -44,6 +59,11 @@ class AgentDecoratedOperator(_PythonDecoratedOperator):
         op_args: list[Any],
         op_kwargs: dict[str, Any],
         *args: dict[str, Any],
+        response_cache: "ResponseCache | str | None" = None,
+        deferrable: bool = False,
+        rate_limiter: "RateLimiter | None" = None,
+        adaptive_concurrency: "AdaptiveConcurrencyLimiter | None" = None,
+        usage_xcom_key: str | None = "llm_usage",
         **kwargs: dict[str, Any],
     ):
         """
@@ -54,13 +74,57 @@ class AgentDecoratedOperator(_PythonDecoratedOperator):
             op_args: Positional arguments to pass to the `python_callable`.
             op_kwargs: Keyword arguments to pass to the `python_callable`.
             *args: Additional positional arguments for the operator.
+            response_cache: Optional cache of agent outputs, keyed on the model, system prompt,
+                prompt, output schema, model settings and tools, so identical requests made by
+                retries and re-runs skip the LLM call. A `ResponseCache`, `"memory"`, a SQLite file
+                path ending in `.sqlite` or `.db`, or a directory path or object storage URL.
+            deferrable: Whether to run the agent in the triggerer instead of the worker. The task
+                defers after rendering the prompt and resumes only to validate and return the
+                output, so no worker slot is held during the model requests. The agent must be a
+                top-level variable of the module that defines the task, its output type must be a
+                type rather than an output spec such as `ToolOutput`, and the prompt must be
+                JSON-serializable.
+            rate_limiter: Optional limiter of requests and tokens per minute that every model
+                request of the agent waits for. Limiters are shared by all tasks on a node by default.
+                Can't be combined with `deferrable`.
+            adaptive_concurrency: Optional AIMD limiter of concurrent model requests. It backs off on
+                429 and 5xx responses, honouring `Retry-After`, and retries the failed requests.
+                Can't be combined with `deferrable`.
+            usage_xcom_key: The XCom key of the summary of the task's model requests, tokens, cost
+                and tool calls, or `None` to not push it. Per-request metrics are always emitted
+                through Airflow's metrics.
             **kwargs: Additional keyword arguments for the operator.
         """
+        if deferrable and (rate_limiter is not None or adaptive_concurrency is not None):
+            raise ValueError(
+                "rate_limiter and adaptive_concurrency are not supported by deferrable tasks, "
+                "since the triggerer makes their model requests."
+            )
+
         super().__init__(*args, op_args=op_args, op_kwargs=op_kwargs, **kwargs)
 
         self.op_args = op_args
         self.op_kwargs = op_kwargs
         self.agent = agent
+        self.response_cache = response_cache
+        self.deferrable = deferrable
+        self.rate_limiter = rate_limiter
+        self.adaptive_concurrency = adaptive_concurrency
+        self.usage_xcom_key = usage_xcom_key
+        self.usage_recorder: UsageRecorder | None = None
+
+        if deferrable:
+            from pydantic import TypeAdapter
+
+            # the output of the triggerer's run is validated against the output type on resume
+            try:
+                TypeAdapter(self._output_type())
+            except Exception as e:
+                raise ValueError(
+                    "Deferrable tasks need the agent's output type to be a type such as str or a "
+                    f"Pydantic model, not {self._output_type()!r}. Output specs such as ToolOutput, "
+                    "NativeOutput or lists of types are not supported."
+                ) from e
 
         # wrapping the tool will print the tool call and the result in an airflow log group for better observability
         if hasattr(self.agent, "_function_toolset") and self.agent._function_toolset.tools:
@@ -82,17 +146,229 @@ class AgentDecoratedOperator(_PythonDecoratedOperator):
             The result of the agent's execution, which can be a string, dictionary,
             or list of strings.
         """
+        from airflow.exceptions import TaskDeferred
+
         print("Executing LLM call")
 
         prompt = super().execute(context)
         print(f"Prompt: {prompt}")
 
+        self.usage_recorder = UsageRecorder(tags={"dag_id": self.dag_id, "task_id": self.task_id})
+        with agent_run_span(task_attributes(context), getattr(self.agent, "name", None)):
+            try:
+                with self.usage_recorder.active():
+                    output = self._run_agent(prompt)
+            except TaskDeferred:
+                raise
+            except Exception:
+                # failed runs still cost tokens
+                self._push_usage(context)
+                raise
+            self._push_usage(context)
+        return output
+
+    def _push_usage(self, context: Context) -> None:
+        """
+        Print the usage summary of the task, set it on the current span and push it to XCom
+        under `usage_xcom_key`.
+        """
+        from opentelemetry import trace
+
+        summary = self.usage_recorder.summary()
+        print(f"LLM usage: {summary}")
+        set_usage_attributes(trace.get_current_span(), summary)
+        if self.usage_xcom_key is not None:
+            context["ti"].xcom_push(key=self.usage_xcom_key, value=summary)
+
+    def _run_agent(self, prompt: Any) -> str | dict[str, Any] | list[str]:  # noqa: ANN401
+        """
+        Run the agent on the prompt returned by the `python_callable`, or return the cached output
+        of an identical request if `response_cache` is set.
+
+        Args:
+            prompt: The prompt to run the agent on.
+
+        Returns:
+            The output of the agent, with Pydantic models dumped to dicts.
+        """
+        if self.response_cache is None:
+            if self.deferrable:
+                self._defer_agent_run(prompt)
+            return self._call_agent(prompt)
+
+        from pydantic_core import to_jsonable_python
+
+        from airflow_ai_sdk.caching.response import get_response_cache, response_cache_key
+
+        cache = get_response_cache(self.response_cache)
+        key = response_cache_key(prompt, **self._response_cache_spec())
+        output = cache.get(key)
+        if output is not None:
+            print(f"Response cache hit for {key[:16]}, skipping the LLM call")
+        else:
+            print(f"Response cache miss for {key[:16]}")
+            if self.deferrable:
+                self._defer_agent_run(prompt, cache_key=key)
+            output = to_jsonable_python(self._call_agent(prompt))
+            cache.put(key, output)
+        print(f"Response cache stats: {cache.stats()}")
+        return output
+
+    def _output_type(self) -> Any:  # noqa: ANN401
+        """Return the output type of the agent."""
+        return self.agent.output_type
+
+    def _response_cache_spec(self) -> dict[str, Any]:
+        """
+        Describe the request of the task, except for the prompt, for `response_cache_key`.
+
+        Returns:
+            The keyword arguments of `response_cache_key` that identify the agent.
+        """
+        from airflow_ai_sdk.caching.response import agent_cache_spec
+
+        return agent_cache_spec(self.agent)
+
+    def _agent_spec(self) -> dict[str, Any]:
+        """
+        Describe how the triggerer loads the agent of a deferred task.
+
+        Returns:
+            A JSON-serializable spec, see `airflow_ai_sdk.triggers.agent.load_agent`.
+        """
+        from airflow_ai_sdk.triggers.agent import find_reference
+
+        return {"reference": find_reference(self.agent, self.python_callable.__module__)}
+
+    def _defer_agent_run(self, prompt: Any, cache_key: str | None = None) -> None:  # noqa: ANN401
+        """Defer the task to a trigger that runs the agent on the prompt."""
+        from pydantic_core import to_jsonable_python
+
+        from airflow_ai_sdk.triggers.agent import AgentRunTrigger
+
+        print("Deferring the LLM call to the triggerer")
+        self.defer(
+            trigger=AgentRunTrigger(
+                agent=self._agent_spec(),
+                prompt=to_jsonable_python(prompt),
+                attributes=current_task_attributes(),
+                trace_context=trace_context(),
+            ),
+            method_name="execute_complete",
+            kwargs={"cache_key": cache_key},
+        )
+
+    def execute_complete(
+        self,
+        context: Context,
+        event: dict[str, Any],
+        cache_key: str | None = None,
+    ) -> str | dict[str, Any] | list[str]:
+        """
+        Validate and return the output of an agent run by the triggerer.
+
+        Args:
+            context: The Airflow context for this task execution.
+            event: The event fired by the `AgentRunTrigger`.
+            cache_key: The response cache key of the request, if `response_cache` is set.
+
+        Returns:
+            The output of the agent, with Pydantic models dumped to dicts.
+        """
+        from pydantic import TypeAdapter
+        from pydantic_core import to_jsonable_python
+
+        # emit the metrics of the requests and tool calls the triggerer made
+        self.usage_recorder = UsageRecorder(tags={"dag_id": self.dag_id, "task_id": self.task_id})
+        self.usage_recorder.replay(event.get("records") or {})
+        self._push_usage(context)
+
+        if event["status"] != "success":
+            print(f"Error: {event['error']}")
+            raise RuntimeError(f"The agent run failed in the triggerer: {event['error']}")
+
+        output = TypeAdapter(self._output_type()).validate_python(event["output"])
+        print(f"Result: {output}")
+        print(f"Usage: {event.get('usage')}")
+        output = to_jsonable_python(output.model_dump() if isinstance(output, BaseModel) else output)
+
+        if cache_key is not None:
+            from airflow_ai_sdk.caching.response import get_response_cache
+
+            get_response_cache(self.response_cache).put(cache_key, output)
+        return output
+
+    def _wrap_model(self, model: Any) -> Any:  # noqa: ANN401
+        """
+        Wrap the agent's model with the per-request behaviour configured on the operator.
+
+        Args:
+            model: The agent's model.
+
+        Returns:
+            The wrapped model, or `model` if nothing needs to wrap it.
+        """
+        if self.usage_recorder is not None:
+            model = InstrumentedModel(model, self.usage_recorder)
+        if self.rate_limiter is not None:
+            from airflow_ai_sdk.limits.rate_limit import RateLimitedModel
+
+            model = RateLimitedModel(model, self.rate_limiter)
+        if self.adaptive_concurrency is not None:
+            from airflow_ai_sdk.limits.concurrency import AdaptiveConcurrencyModel
+
+            # retries of overloaded requests go through the rate limiter again
+            model = AdaptiveConcurrencyModel(model, self.adaptive_concurrency)
+        return model
+
+    def _print_request_stats(self) -> None:
+        """Print how the limiters shaped the model requests and how the shared HTTP client was used."""
+        if self.rate_limiter is not None and self.rate_limiter.waits:
+            print(
+                f"Rate limiter waited {self.rate_limiter.waits} times, "
+                f"{self.rate_limiter.wait_seconds:.1f}s in total"
+            )
+        if self.adaptive_concurrency is not None:
+            print(f"Adaptive concurrency: {self.adaptive_concurrency.stats()}")
+
+        from airflow_ai_sdk.http import http_client_stats
+
+        stats = http_client_stats()
+        if stats["requests"]:
+            print(f"Shared HTTP client: {stats}")
+
+    @contextmanager
+    def _model_override(self) -> Iterator[None]:
+        """Run the agent with its model wrapped by `_wrap_model` within the context."""
+        from pydantic_ai.models import Model
+
+        model = getattr(self.agent, "model", None)
+        wrapped = self._wrap_model(model) if isinstance(model, Model | str) else model
+        if wrapped is model:
+            yield
+        else:
+            with self.agent.override(model=wrapped):
+                yield
+
+    def _call_agent(self, prompt: Any) -> str | dict[str, Any] | list[str]:  # noqa: ANN401
+        """
+        Run the agent on a prompt.
+
+        Args:
+            prompt: The prompt to run the agent on.
+
+        Returns:
+            The output of the agent, with Pydantic models dumped to dicts.
+        """
         try:
-            result = self.agent.run_sync(prompt)
+            with self._model_override():
+                result = self.agent.run_sync(prompt)
             print(f"Result: {result}")
         except Exception as e:
             print(f"Error: {e}")
             raise e
+        finally:
+            self._print_request_stats()
 
         # turn the result into a dict
         if isinstance(result.output, BaseModel):
@@ -3,9 +3,22 @@ This module provides the EmbedDecoratedOperator class for generating text embedd
 using SentenceTransformer models within Airflow tasks.
 """
 
-from typing import Any
+from collections.abc import Iterable, Mapping, Sized
+from contextlib import contextmanager
+from itertools import islice
+from typing import TYPE_CHECKING, Any
 
 from airflow_ai_sdk.airflow import Context, _PythonDecoratedOperator
+from airflow_ai_sdk.embeddings.model_cache import get_model
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import numpy as np
+
+    from airflow_ai_sdk.embeddings.batching import BatchingStats
+    from airflow_ai_sdk.embeddings.cache import EmbeddingCache
+    from airflow_ai_sdk.embeddings.server import EmbeddingClient
 
 
 class EmbedDecoratedOperator(_PythonDecoratedOperator):
@@ -15,6 +28,12 @@ class EmbedDecoratedOperator(_PythonDecoratedOperator):
     This operator generates embeddings for text input using a specified SentenceTransformer
     model. It provides a convenient way to create embeddings within Airflow tasks.
 
+    If the `python_callable` returns a single string, the operator returns a single vector. If it
+    returns a list (or other iterable) of strings, the texts are encoded in batches of `batch_size`
+    within the one task and the operator returns a list of vectors in the same order. Generators
+    and other iterators are consumed one batch at a time; combined with `output_path`, each batch
+    is flushed to disk before the next is read, so memory use stays flat regardless of input size.
+
     Example:
 
     ```python
@@ -32,6 +51,7 @@ class EmbedDecoratedOperator(_PythonDecoratedOperator):
     """
 
     custom_operator_name = "@task.embed"
+    template_fields = (*_PythonDecoratedOperator.template_fields, "output_path")
 
     def __init__(
         self,
@@ -39,6 +59,18 @@ class EmbedDecoratedOperator(_PythonDecoratedOperator):
         op_kwargs: dict[str, Any],
         model_name: str,
         encode_kwargs: dict[str, Any] = None,
+        model_kwargs: dict[str, Any] = None,
+        batch_size: int = 256,
+        cache_path: str | None = None,
+        output_format: str = "list",
+        output_path: str | None = None,
+        num_processes: int | None = None,
+        threads_per_process: int | None = None,
+        chunk_size: int | None = None,
+        chunk_overlap: int = 0,
+        max_batch_tokens: int | None = None,
+        quantization_ranges: list[list[float]] | None = None,
+        embedding_server: bool | str = False,
         *args: dict[str, Any],
         **kwargs: dict[str, Any],
     ):
@@ -50,16 +82,85 @@ class EmbedDecoratedOperator(_PythonDecoratedOperator):
             op_kwargs: Keyword arguments to pass to the python_callable.
             model_name: The name of the model to use for the embedding. Passed to the `SentenceTransformer` constructor.
             encode_kwargs: Keyword arguments to pass to the `encode` method of the SentenceTransformer model.
+            model_kwargs: Keyword arguments to pass to the `SentenceTransformer` constructor. Models are
+                cached per process by model name and constructor options, so repeated and mapped
+                tasks on the same worker reuse an already loaded model.
+            batch_size: The maximum number of texts passed to a single `encode` call when the
+                `python_callable` returns multiple texts.
+            cache_path: Optional path of a SQLite file used as a persistent embedding cache. Vectors
+                are keyed by model name, `model_kwargs`, `encode_kwargs` and text, and only cache
+                misses are encoded.
+            output_format: How the vectors are returned. `list` returns lists of floats. `float32` and
+                `float16` return the vectors packed into base64-encoded bytes, which is much smaller
+                in XCom. `int8` quantizes each dimension to one byte using per-dimension calibration
+                ranges, and `binary` keeps one bit per dimension; the parameters needed to dequantize
+                them are stored alongside the data. Use `airflow_ai_sdk.embeddings.formats.decode_embeddings`
+                to read them, or `dequantize_embeddings` to reconstruct float vectors. Setting
+                `precision` to `int8`, `binary` or `ubinary` in `encode_kwargs` selects the matching format.
+            output_path: Optional local path or object storage URL of a `.npy` file. When set and the
+                `python_callable` returns multiple texts, vectors are streamed batch by batch into
+                a memory-mapped file (stored as float16, int8 or packed bits to match `output_format`,
+                otherwise float32) and only its path, shape and dtype are returned. Templated.
+            num_processes: If greater than 1, texts are sharded across this many CPU worker processes
+                using SentenceTransformer's multi-process pool. The pool is torn down at the end of
+                the task. Use `batch_size` to control how many texts are sent to the pool at once.
+            threads_per_process: The number of torch intra-op threads used by each worker process.
+            chunk_size: If set, documents are split into chunks of at most this many tokens, using the
+                model's own tokenizer, before they are embedded. The chunk size is capped at the model's
+                maximum sequence length. The `python_callable` may then also return a dict mapping
+                document ids to texts.
+            chunk_overlap: The number of tokens shared by consecutive chunks of a document. If the
+                chunk size is capped, the overlap is scaled down by the same ratio.
+            max_batch_tokens: If set, each group of `batch_size` texts is sorted by token length and
+                split into sub-batches whose padded size (number of texts times longest text) fits
+                this token budget, so that little compute is wasted on padding. Vectors are returned
+                in input order, and the padding efficiency and throughput are printed in the task log.
+            quantization_ranges: Optional `[minimums, maximums]` calibration ranges for the `int8`
+                format, e.g. computed once over a representative sample of the corpus so that
+                vectors from different runs share one scale. Defaults to the ranges of the encoded
+                vectors, or of the first batch when streaming to `output_path`.
+            embedding_server: If set, texts are encoded by a long-lived embedding server on the same
+                node that keeps models loaded between tasks, so tasks don't reload the weights. Pass
+                `True` to use the default Unix socket or a socket path. The server is started on
+                first use and stops after an hour without requests. If it can't be reached, texts
+                are encoded in the task process instead. Chunking still loads the tokenizer in the
+                task process. Can't be combined with `num_processes`.
             *args: Additional positional arguments for the operator.
             **kwargs: Additional keyword arguments for the operator.
         """
         if encode_kwargs is None:
             encode_kwargs = {}
+        if model_kwargs is None:
+            model_kwargs = {}
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer.")
+        if chunk_size is not None and not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be non-negative and smaller than chunk_size.")
+        if embedding_server and num_processes is not None and num_processes > 1:
+            raise ValueError("embedding_server can't be combined with num_processes.")
+        if "precision" in encode_kwargs:
+            encode_kwargs = dict(encode_kwargs)
+            output_format = self._precision_format(encode_kwargs.pop("precision"), output_format)
 
         super().__init__(*args, op_args=op_args, op_kwargs=op_kwargs, **kwargs)
 
         self.model_name = model_name
         self.encode_kwargs = encode_kwargs
+        self.model_kwargs = model_kwargs
+        self.batch_size = batch_size
+        self.cache_path = cache_path
+        self.output_format = output_format
+        self.output_path = output_path
+        self.num_processes = num_processes
+        self.threads_per_process = threads_per_process
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.max_batch_tokens = max_batch_tokens
+        self.quantization_ranges = quantization_ranges
+        self.embedding_server = embedding_server
+        self._batching_stats: BatchingStats | None = None
+        self._pool: dict[str, Any] | None = None
+        self._server: EmbeddingClient | None = None
 
         try:
             import sentence_transformers  # noqa: F401
@@ -68,7 +169,36 @@ class EmbedDecoratedOperator(_PythonDecoratedOperator):
                 "sentence-transformers is not installed but is required for the embedding operator. Please install it before using the embedding operator."
             ) from e
 
-    def execute(self, context: Context) -> list[float]:
+        from airflow_ai_sdk.embeddings.formats import OUTPUT_FORMATS
+
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output_format {output_format!r}. Expected one of {OUTPUT_FORMATS}.")
+
+    @staticmethod
+    def _precision_format(precision: str, output_format: str) -> str:
+        """
+        Map a SentenceTransformer `precision` encode option to the matching output format.
+
+        The vectors are quantized by the operator rather than by `encode`, so that all batches
+        share the same int8 calibration ranges.
+
+        Args:
+            precision: The `precision` passed in `encode_kwargs`.
+            output_format: The `output_format` passed to the operator.
+
+        Returns:
+            The output format to use.
+        """
+        formats = {"float32": output_format, "int8": "int8", "binary": "binary", "ubinary": "binary"}
+        if precision not in formats:
+            raise ValueError(f"Unsupported precision {precision!r}. Expected one of {tuple(formats)}.")
+
+        precision_format = formats[precision]
+        if output_format not in ("list", precision_format):
+            raise ValueError(f"precision {precision!r} conflicts with output_format {output_format!r}.")
+        return precision_format
+
+    def execute(self, context: Context) -> list[float] | list[list[float]] | dict[str, Any]:
         """
         Execute the embedding operation with the given context.
 
@@ -76,13 +206,379 @@ class EmbedDecoratedOperator(_PythonDecoratedOperator):
             context: The Airflow context for this task execution.
 
         Returns:
-            A list of floats representing the embedding vector for the input text.
+            A list of floats representing the embedding vector for the input text, or a list of
+            such vectors if the `python_callable` returned multiple texts. With a binary
+            `output_format`, the vector or vectors are returned packed in a dict instead. With an
+            `output_path`, only the path, shape and dtype of the written `.npy` file are returned.
+            With a `chunk_size`, a dict holding the chunk metadata and the chunk vectors is returned.
         """
-        from sentence_transformers import SentenceTransformer
+        from airflow_ai_sdk.embeddings.formats import encode_embeddings
 
         text = super().execute(context)
-        if not isinstance(text, str):
-            raise TypeError("The input text must be a string.")
+        with self._embedding_server():
+            if self.chunk_size is not None:
+                return self._embed_chunks(text)
+
+            if isinstance(text, str):
+                return encode_embeddings(self._embed([text])[0], self.output_format, self.quantization_ranges)
+
+            texts = self._as_texts(text)
+            with self._encoding_pool():
+                if self.output_path is not None:
+                    return self._embed_to_file(texts)
+                return encode_embeddings(self._embed(texts), self.output_format, self.quantization_ranges)
+
+    @staticmethod
+    def _as_texts(value: object) -> "Iterable[str]":
+        """
+        Validate that the `python_callable` output is a collection or stream of strings.
+
+        Collections such as lists and tuples are validated up front. Other iterables, such as
+        generators, file objects or database cursors, are validated lazily as they are consumed,
+        so they are never materialized in memory.
+
+        Args:
+            value: The value returned by the `python_callable`.
+
+        Returns:
+            The texts as a list, or a lazy iterator over the texts of a stream.
+        """
+        if not isinstance(value, Iterable) or isinstance(value, bytes | Mapping):
+            raise TypeError("The input text must be a string or an iterable of strings.")
+
+        if not isinstance(value, Sized):
+            return EmbedDecoratedOperator._validate_stream(value)
+
+        texts = list(value)
+        if not all(isinstance(text, str) for text in texts):
+            raise TypeError("Every input text must be a string.")
+        return texts
+
+    @staticmethod
+    def _as_documents(value: object) -> "Iterable[tuple[Any, str]]":
+        """
+        Validate the `python_callable` output as documents and pair each with a document id.
+
+        Args:
+            value: The value returned by the `python_callable`: a string, a dict mapping document ids
+                to texts, or a collection or stream of texts whose ids are their positions.
+
+        Returns:
+            An iterable of `(doc_id, text)` pairs.
+        """
+        if isinstance(value, str):
+            return [(0, value)]
+
+        if isinstance(value, Mapping):
+            if not all(isinstance(text, str) for text in value.values()):
+                raise TypeError("Every input text must be a string.")
+            return list(value.items())
+
+        return enumerate(EmbedDecoratedOperator._as_texts(value))
+
+    @staticmethod
+    def _validate_stream(texts: Iterable[object]) -> "Iterator[str]":
+        """Yield the texts of a stream, checking that each one is a string."""
+        for text in texts:
+            if not isinstance(text, str):
+                raise TypeError("Every input text must be a string.")
+            yield text
+
+    @contextmanager
+    def _embedding_server(self) -> "Iterator[None]":
+        """
+        Connect to the embedding server for the duration of the block if `embedding_server` is set.
+        """
+        if not self.embedding_server:
+            yield
+            return
+
+        from airflow_ai_sdk.embeddings.server import EmbeddingServerError, connect
+
+        path = self.embedding_server if isinstance(self.embedding_server, str) else None
+        try:
+            self._server = connect(path)
+        except EmbeddingServerError as e:
+            print(f"{e} Encoding in the task process instead.")
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            # a failed request already closed the connection
+            if self._server is not None:
+                self._server.close()
+                self._server = None
+
+    def _server_failed(self, error: Exception) -> None:
+        """Stop using the embedding server after a failed request."""
+        print(f"{error} Encoding in the task process instead.")
+        self._server.close()
+        self._server = None
+
+    @contextmanager
+    def _encoding_pool(self) -> "Iterator[None]":
+        """
+        Start a multi-process pool for the duration of the block if `num_processes` is greater than 1.
+        """
+        if self.num_processes is None or self.num_processes <= 1:
+            yield
+            return
+
+        from airflow_ai_sdk.embeddings.multiprocess import multi_process_pool
+
+        model = get_model(self.model_name, **self.model_kwargs)
+        with multi_process_pool(model, self.num_processes, self.threads_per_process) as pool:
+            self._pool = pool
+            try:
+                yield
+            finally:
+                self._pool = None
+
+    def _embed_chunks(self, value: object) -> dict[str, Any]:
+        """
+        Split documents into token windows and embed the chunks in batches.
+
+        Args:
+            value: The value returned by the `python_callable`.
+
+        Returns:
+            A dict with a `chunks` list holding the `doc_id`, character `offset` and `length` of each
+            chunk, and the chunk vectors under `embeddings` in the configured output format.
+        """
+        from airflow_ai_sdk.embeddings.chunking import TokenChunker
+        from airflow_ai_sdk.embeddings.formats import encode_embeddings
+
+        documents = self._as_documents(value)
+        chunker = TokenChunker.from_model(
+            get_model(self.model_name, **self.model_kwargs),
+            window=self.chunk_size,
+            overlap=self.chunk_overlap,
+        )
+
+        chunks: list[dict[str, Any]] = []
+        num_documents = 0
+
+        def chunk_texts() -> "Iterator[str]":
+            nonlocal num_documents
+            for doc_id, text in documents:
+                num_documents += 1
+                for start, end in chunker.spans(text):
+                    chunks.append({"doc_id": doc_id, "offset": start, "length": end - start})
+                    yield text[start:end]
+
+        with self._encoding_pool():
+            if self.output_path is not None:
+                embeddings = self._embed_to_file(chunk_texts())
+            else:
+                embeddings = encode_embeddings(
+                    self._embed(chunk_texts()), self.output_format, self.quantization_ranges
+                )
+
+        print(f"Split {num_documents} documents into {len(chunks)} chunks of up to {chunker.window} tokens")
+        return {"chunks": chunks, "embeddings": embeddings}
+
+    def _embed(self, texts: "Iterable[str]") -> "np.ndarray":
+        """
+        Embed texts into a single array.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A 2D array with one vector per input text, in input order.
+        """
+        import numpy as np
+
+        batches = list(self._embed_batches(texts))
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(batches)
+
+    def _embed_to_file(self, texts: "Iterable[str]") -> dict[str, Any]:
+        """
+        Embed texts batch by batch into a `.npy` file at `output_path`. Each batch is flushed to
+        the file before the next batch of texts is read.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            The path, shape and dtype of the written file.
+        """
+        from airflow_ai_sdk.embeddings.formats import (
+            QUANTIZED_FORMATS,
+            int8_ranges,
+            quantization_params,
+            quantize,
+        )
+        from airflow_ai_sdk.embeddings.sink import NpySink
+
+        dtypes = {"float16": "float16", "int8": "int8", "binary": "uint8"}
+        num_rows = len(texts) if isinstance(texts, Sized) else None
+        sink = NpySink(self.output_path, num_rows=num_rows, dtype=dtypes.get(self.output_format, "float32"))
+        quantization = None
+        ranges = self.quantization_ranges
+        for batch in self._embed_batches(texts):
+            if self.output_format in QUANTIZED_FORMATS:
+                if quantization is None:
+                    # calibrate on the first batch so the stream never has to be held in memory
+                    if self.output_format == "int8" and ranges is None:
+                        ranges = int8_ranges(batch)
+                    quantization = quantization_params(batch, self.output_format, ranges)
+                batch = quantize(batch, self.output_format, ranges)
+            sink.write(batch)
+
+        metadata = sink.close()
+        if quantization is not None:
+            metadata["quantization"] = quantization
+        print(f"Wrote embeddings of shape {metadata['shape']} to {self.output_path}")
+        return metadata
+
+    def _embed_batches(self, texts: "Iterable[str]") -> "Iterator[np.ndarray]":
+        """
+        Embed texts in batches of at most `batch_size` texts, consulting the embedding cache first
+        if one is configured. Texts are read from `texts` one batch at a time.
+
+        Args:
+            texts: The texts to embed.
+
+        Yields:
+            A 2D array of vectors per batch, in input order.
+        """
+        from airflow_ai_sdk.embeddings.batching import BatchingStats
+        from airflow_ai_sdk.embeddings.cache import EmbeddingCache
+
+        cache = EmbeddingCache(self.cache_path) if self.cache_path is not None else None
+        self._batching_stats = BatchingStats()
+        iterator = iter(texts)
+        count = 0
+        try:
+            while batch := list(islice(iterator, self.batch_size)):
+                count += len(batch)
+                yield self._encode(batch) if cache is None else self._embed_cached(batch, cache)
+        finally:
+            if cache is not None:
+                print(f"Embedding cache {self.cache_path}: {cache.hits} hits, {cache.misses} misses")
+                cache.close()
+
+        if self.max_batch_tokens is not None and self._batching_stats.texts:
+            print(self._batching_stats.summary())
+        elif count > 1:
+            print(
+                f"Embedded {count} texts in batches of {self.batch_size} "
+                f"({count / max(self._batching_stats.elapsed, 1e-9):.1f} texts/s)"
+            )
+
+    def _embed_cached(self, texts: list[str], cache: "EmbeddingCache") -> "np.ndarray":
+        """
+        Embed texts, encoding only the ones missing from the cache and writing them back.
+
+        Args:
+            texts: The texts to embed.
+            cache: The embedding cache.
+
+        Returns:
+            A 2D array with one vector per input text, in input order.
+        """
+        import numpy as np
+
+        keys = [
+            cache.make_key(self.model_name, self.encode_kwargs, text, self.model_kwargs) for text in texts
+        ]
+        vectors = cache.get_many(keys)
+
+        # only encode each distinct missing text once
+        missing = dict.fromkeys(text for text, key in zip(texts, keys, strict=True) if key not in vectors)
+        if missing:
+            encoded = self._encode(list(missing))
+            new_vectors = {
+                cache.make_key(self.model_name, self.encode_kwargs, text, self.model_kwargs): vector
+                for text, vector in zip(missing, encoded, strict=True)
+            }
+            cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return np.stack([vectors[key] for key in keys])
+
+    def _encode(self, texts: list[str]) -> "np.ndarray":
+        """
+        Encode a batch of texts with the model.
+
+        If `max_batch_tokens` is set, the texts are sorted by token length and encoded in
+        sub-batches that fit the token budget, and the vectors are put back in input order.
+
+        Args:
+            texts: The texts to encode.
+
+        Returns:
+            A 2D array with one vector per input text, in input order.
+        """
+        import numpy as np
+
+        from airflow_ai_sdk.embeddings.batching import token_budget_batches
+
+        if self.max_batch_tokens is None:
+            return self._encode_batch(texts, self.encode_kwargs)
+
+        lengths = self._token_lengths(texts)
+        vectors = None
+        for batch in token_budget_batches(lengths, self.max_batch_tokens):
+            # encode each sub-batch as a single forward pass
+            encode_kwargs = {**self.encode_kwargs, "batch_size": len(batch)}
+            batch_vectors = self._encode_batch([texts[i] for i in batch], encode_kwargs)
+            if vectors is None:
+                vectors = np.empty((len(texts), *batch_vectors.shape[1:]), dtype=batch_vectors.dtype)
+            vectors[batch] = batch_vectors
+            self._batching_stats.add_batch([lengths[i] for i in batch])
+        return vectors
+
+    def _token_lengths(self, texts: list[str]) -> list[int]:
+        """
+        Count the tokens of texts with the model's tokenizer, on the embedding server if connected.
+
+        Args:
+            texts: The texts to tokenize.
+
+        Returns:
+            The number of tokens of each text, capped at the model's maximum sequence length.
+        """
+        from airflow_ai_sdk.embeddings.server import EmbeddingServerError
+
+        if self._server is not None:
+            try:
+                return self._server.token_lengths(self.model_name, texts, self.model_kwargs)
+            except EmbeddingServerError as e:
+                self._server_failed(e)
+
+        model = get_model(self.model_name, **self.model_kwargs)
+        encoding = model.tokenizer(texts, truncation=True, max_length=model.max_seq_length, verbose=False)
+        return [len(ids) for ids in encoding["input_ids"]]
+
+    def _encode_batch(self, texts: list[str], encode_kwargs: dict[str, Any]) -> "np.ndarray":
+        """
+        Encode texts with the model, on the embedding server if connected or in the multi-process
+        pool if one is running.
+
+        Args:
+            texts: The texts to encode.
+            encode_kwargs: Keyword arguments to pass to the `encode` method.
+
+        Returns:
+            A 2D array with one vector per input text, in input order.
+        """
+        import numpy as np
+
+        from airflow_ai_sdk.embeddings.server import EmbeddingServerError
+
+        if self._server is not None:
+            try:
+                return self._server.encode(self.model_name, texts, self.model_kwargs, encode_kwargs)
+            except EmbeddingServerError as e:
+                self._server_failed(e)
 
-        model = SentenceTransformer(self.model_name)
-        return model.encode(text, **self.encode_kwargs).tolist()
+        model = get_model(self.model_name, **self.model_kwargs)
+        if self._pool is not None:
+            return np.asarray(model.encode(texts, pool=self._pool, **encode_kwargs))
+        return np.asarray(model.encode(texts, **encode_kwargs))
@@ -4,7 +4,7 @@ within Airflow tasks.
 """
 
 import warnings
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from pydantic import BaseModel
 from pydantic_ai import Agent, models
@@ -12,6 +12,9 @@ from pydantic_ai import Agent, models
 from airflow_ai_sdk.airflow import Context
 from airflow_ai_sdk.operators.agent import AgentDecoratedOperator
 
+if TYPE_CHECKING:
+    from airflow_ai_sdk.caching.semantic import SemanticResponseCache
+
 
 class LLMDecoratedOperator(AgentDecoratedOperator):
     """
@@ -50,6 +53,8 @@ class LLMDecoratedOperator(AgentDecoratedOperator):
         output_type: type[BaseModel] | None = _sentinel,
         # Deprecated. Will be removed in 1.0.0
         result_type: type[BaseModel] | None = _sentinel,
+        semantic_cache: "SemanticResponseCache | None" = None,
+        semantic_cache_threshold: float | None = None,
         **kwargs: dict[str, Any],
     ):
         """
@@ -59,6 +64,10 @@ class LLMDecoratedOperator(AgentDecoratedOperator):
             model: The LLM model to use for the call.
             system_prompt: The system prompt to use for the call.
             output_type: Optional Pydantic model type to validate and parse the result.
+            semantic_cache: Optional cache that reuses the output of a previous prompt when the
+                embedding of the prompt is similar enough to it, for the same model, system prompt
+                and output type. Requires sentence-transformers.
+            semantic_cache_threshold: Overrides the cache's similarity threshold for this task.
             **kwargs: Additional keyword arguments for the operator.
         """
 
@@ -93,4 +102,93 @@ class LLMDecoratedOperator(AgentDecoratedOperator):
             system_prompt=system_prompt,
             output_type=output_type,
         )
+        if semantic_cache is not None and kwargs.get("deferrable"):
+            raise ValueError("semantic_cache is not supported by deferrable tasks.")
+
+        self.model = model
+        self.system_prompt = system_prompt
+        self.output_type = output_type
+        self.semantic_cache = semantic_cache
+        self.semantic_cache_threshold = semantic_cache_threshold
         super().__init__(agent=agent, **kwargs)
+
+    def _output_type(self) -> Any:  # noqa: ANN401
+        """Return the output type the task was created with."""
+        return self.output_type
+
+    def _response_cache_spec(self) -> dict[str, Any]:
+        """
+        Describe the request of the task, except for the prompt, for `response_cache_key`.
+
+        Returns:
+            The model, system prompt, output type and model settings the task was created with.
+        """
+        return {
+            "model": self.model,
+            "system_prompt": self.system_prompt,
+            "output_type": self.output_type,
+            "model_settings": self.agent.model_settings,
+        }
+
+    def _agent_spec(self) -> dict[str, Any]:
+        """
+        Describe how the triggerer builds the agent of a deferred task.
+
+        Returns:
+            A JSON-serializable spec, see `airflow_ai_sdk.triggers.agent.load_agent`.
+        """
+        from airflow_ai_sdk.triggers.agent import object_reference
+
+        if not isinstance(self.model, str):
+            raise ValueError(
+                "Deferrable LLM tasks need the model to be given by name, e.g. 'openai:gpt-4o-mini'."
+            )
+        return {
+            "model": self.model,
+            "system_prompt": self.system_prompt,
+            "output_type": None if self.output_type is str else object_reference(self.output_type),
+        }
+
+    def _run_agent(self, prompt: Any) -> str | dict[str, Any] | list[str]:  # noqa: ANN401
+        """
+        Reuse the output of a similar previous prompt if `semantic_cache` is set, and call the LLM
+        otherwise.
+
+        Args:
+            prompt: The prompt returned by the `python_callable`.
+
+        Returns:
+            The output of the LLM, with Pydantic models dumped to dicts.
+        """
+        # only text prompts can be compared
+        if self.semantic_cache is None or not isinstance(prompt, str):
+            return super()._run_agent(prompt)
+
+        from pydantic_core import to_jsonable_python
+
+        from airflow_ai_sdk.caching.response import response_cache_key
+
+        # the key of the request without a prompt identifies the model, system prompt and output type
+        scope = response_cache_key(None, **self._response_cache_spec())
+        output, vector = self.semantic_cache.lookup(scope, prompt, threshold=self.semantic_cache_threshold)
+        if output is None:
+            output = to_jsonable_python(super()._run_agent(prompt))
+            self.semantic_cache.add(scope, prompt, output, vector=vector)
+        print(f"Semantic cache stats: {self.semantic_cache.stats()}")
+        return output
+
+    def _wrap_model(self, model: Any) -> Any:  # noqa: ANN401
+        """
+        Swap the agent's model for one that uses the shared HTTP client, then wrap it.
+
+        Args:
+            model: The agent's model.
+
+        Returns:
+            The wrapped model.
+        """
+        from airflow_ai_sdk.http import shared_model
+
+        # the agent's model was built from the model name, so it can be rebuilt on the shared client
+        pooled = shared_model(self.model)
+        return super()._wrap_model(model if isinstance(pooled, str) else pooled)
@@ -0,0 +1,277 @@
+"""
+This module provides the LLMBatchDecoratedOperator class for making many LLM calls
+concurrently within a single Airflow task.
+"""
+
+import asyncio
+from typing import Any
+
+from airflow_ai_sdk.airflow import Context
+from airflow_ai_sdk.http import close_loop_connections
+from airflow_ai_sdk.models.base import BaseModel
+from airflow_ai_sdk.operators.llm import LLMDecoratedOperator
+from airflow_ai_sdk.telemetry.metrics import UsageRecorder
+
+
+class LLMBatchDecoratedOperator(LLMDecoratedOperator):
+    """
+    Make one LLM call per prompt in a list, concurrently, within a single task.
+
+    The `python_callable` returns a list of prompts. They are run on one event loop with at most
+    `max_concurrency` requests in flight, each prompt is retried with exponential backoff on
+    failure, and the outputs are returned in the order of the prompts. This replaces mapping
+    `@task.llm` over thousands of inputs, which pays for a task instance per input.
+
+    With `batch_api=True`, the prompts are instead submitted to the provider's batch endpoint
+    (OpenAI Batch or Anthropic Message Batches), which is cheaper but can take up to a day. The
+    task defers to a `BatchTrigger` that polls the batch in the triggerer without holding a worker
+    slot, then resumes to download the results and validate them against `output_type`.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.operators.llm_batch import LLMBatchDecoratedOperator
+
+    def make_prompts() -> list[str]:
+        return ["Hello", "Bonjour"]
+
+    operator = LLMBatchDecoratedOperator(
+        task_id="llm_batch",
+        python_callable=make_prompts,
+        model="o3-mini",
+        system_prompt="Reply politely",
+        max_concurrency=32,
+    )
+    ```
+    """
+
+    custom_operator_name = "@task.llm_batch"
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        item_retries: int = 2,
+        item_retry_delay: float = 1.0,
+        allow_failures: bool = False,
+        batch_api: bool = False,
+        batch_api_base_url: str | None = None,
+        batch_api_poll_interval: float = 60.0,
+        **kwargs: dict[str, Any],
+    ):
+        """
+        Initialize the LLMBatchDecoratedOperator.
+
+        Args:
+            max_concurrency: The maximum number of LLM requests in flight at once. With
+                `adaptive_concurrency`, the adaptive limit applies within this maximum.
+            item_retries: How many times a failed prompt is retried before it fails.
+            item_retry_delay: The delay before the first retry of a prompt, in seconds. It doubles
+                with every retry.
+            allow_failures: Whether prompts that still fail after their retries return `None`
+                instead of failing the task.
+            batch_api: Whether to run the prompts through the provider's batch endpoint in a
+                deferred task instead of calling the model directly. Only OpenAI and Anthropic
+                models are supported, and API keys are read from `OPENAI_API_KEY` and
+                `ANTHROPIC_API_KEY` on the worker and the triggerer.
+            batch_api_base_url: The base URL of the batch API, e.g. of a proxy or a local
+                stand-in server. Defaults to `OPENAI_BASE_URL` or `ANTHROPIC_BASE_URL`, or the
+                provider's public API.
+            batch_api_poll_interval: How often the trigger polls the batch, in seconds.
+            **kwargs: Keyword arguments for `LLMDecoratedOperator`, such as `model`,
+                `system_prompt`, `output_type` and `response_cache`.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if kwargs.get("semantic_cache") is not None:
+            raise ValueError(
+                "semantic_cache is not supported by @task.llm_batch, use response_cache instead."
+            )
+        if kwargs.get("deferrable"):
+            raise ValueError(
+                "@task.llm_batch can't be deferrable, use batch_api to run prompts without a worker."
+            )
+        if batch_api and kwargs.get("response_cache") is not None:
+            raise ValueError("response_cache is not supported with batch_api.")
+
+        self.max_concurrency = max_concurrency
+        self.item_retries = item_retries
+        self.item_retry_delay = item_retry_delay
+        self.allow_failures = allow_failures
+        self.batch_api = batch_api
+        self.batch_api_base_url = batch_api_base_url
+        self.batch_api_poll_interval = batch_api_poll_interval
+        super().__init__(**kwargs)
+
+    def _run_agent(self, prompt: Any) -> list[Any]:  # noqa: ANN401
+        """
+        Run the agent on every prompt returned by the `python_callable`.
+
+        Args:
+            prompt: The list of prompts.
+
+        Returns:
+            The output for each prompt, in order, with Pydantic models dumped to dicts.
+        """
+        if not isinstance(prompt, list | tuple):
+            raise TypeError(
+                f"@task.llm_batch functions must return a list of prompts, not {type(prompt).__name__}."
+            )
+        prompts = list(prompt)
+        if self.batch_api:
+            self._submit_batch(prompts)
+
+        outputs: list[Any] = [None] * len(prompts)
+        keys: list[str | None] = [None] * len(prompts)
+        pending = list(range(len(prompts)))
+
+        cache = None
+        if self.response_cache is not None:
+            from airflow_ai_sdk.caching.response import get_response_cache, response_cache_key
+
+            cache = get_response_cache(self.response_cache)
+            spec = self._response_cache_spec()
+            pending = []
+            for i, item in enumerate(prompts):
+                keys[i] = response_cache_key(item, **spec)
+                outputs[i] = cache.get(keys[i])
+                if outputs[i] is None:
+                    pending.append(i)
+            print(f"Response cache answered {len(prompts) - len(pending)} of {len(prompts)} prompts")
+
+        print(f"Running {len(pending)} prompts with at most {self.max_concurrency} concurrent requests")
+        results = asyncio.run(self._run_batch({i: prompts[i] for i in pending}))
+
+        # cache every completed prompt before raising, so a retry of the task doesn't pay for them again
+        errors = []
+        for i, result in zip(pending, results, strict=True):
+            if isinstance(result, BaseException):
+                errors.append(result)
+                continue
+            outputs[i] = result
+            if cache is not None:
+                cache.put(keys[i], result)
+
+        print(f"Completed {len(pending) - len(errors)} of {len(pending)} prompts, {len(errors)} failed")
+        self._print_request_stats()
+        if cache is not None:
+            print(f"Response cache stats: {cache.stats()}")
+        if errors and not self.allow_failures:
+            raise errors[0]
+        return outputs
+
+    def _submit_batch(self, prompts: list[Any]) -> None:
+        """Submit the prompts to the provider's batch endpoint and defer until the batch is done."""
+        from airflow_ai_sdk.batch.clients import get_batch_client, split_model_name
+        from airflow_ai_sdk.triggers.batch import BatchTrigger
+
+        if not all(isinstance(prompt, str) for prompt in prompts):
+            raise TypeError("batch_api only supports text prompts.")
+
+        provider, model_name = split_model_name(self.agent.model)
+        client = get_batch_client(provider, base_url=self.batch_api_base_url)
+        requests = [
+            client.build_request(
+                str(i),
+                model_name,
+                self.system_prompt,
+                prompt,
+                self.agent.output_type,
+                self.agent.model_settings,
+            )
+            for i, prompt in enumerate(prompts)
+        ]
+        batch_id = client.submit(requests)
+        print(f"Submitted {len(requests)} prompts as {provider} batch {batch_id}, deferring until it is done")
+
+        self.defer(
+            trigger=BatchTrigger(
+                provider=provider,
+                batch_id=batch_id,
+                base_url=self.batch_api_base_url,
+                poll_interval=self.batch_api_poll_interval,
+            ),
+            method_name="execute_complete",
+            kwargs={"num_prompts": len(prompts)},
+        )
+
+    def execute_complete(self, context: Context, event: dict[str, Any], num_prompts: int) -> list[Any]:
+        """
+        Download and validate the results of a finished batch, and push its usage like `execute`.
+
+        Args:
+            context: The Airflow context for this task execution.
+            event: The event fired by the `BatchTrigger`.
+            num_prompts: The number of prompts in the batch.
+
+        Returns:
+            The output for each prompt, in order, with Pydantic models dumped to dicts.
+        """
+        from airflow_ai_sdk.batch.clients import get_batch_client, split_model_name
+
+        batch_id = event["batch_id"]
+        if not event.get("succeeded"):
+            raise RuntimeError(
+                f"Batch {batch_id} did not complete: {event.get('error') or event.get('status')}"
+            )
+
+        provider, model_name = split_model_name(self.agent.model)
+        client = get_batch_client(provider, base_url=self.batch_api_base_url)
+        # record the usage of the batch's requests, like the requests of a non-deferred task
+        self.usage_recorder = UsageRecorder(tags={"dag_id": self.dag_id, "task_id": self.task_id})
+        results = client.get_results(
+            batch_id, self.agent.output_type, recorder=self.usage_recorder, model=f"{provider}:{model_name}"
+        )
+        self._push_usage(context)
+
+        outputs: list[Any] = []
+        failures: list[tuple[int, Exception]] = []
+        for i in range(num_prompts):
+            output = results.get(str(i), RuntimeError("No result returned"))
+            if isinstance(output, Exception):
+                failures.append((i, output))
+                output = None
+            outputs.append(output)
+
+        print(f"Batch {batch_id} completed {num_prompts - len(failures)} of {num_prompts} prompts")
+        for i, error in failures:
+            print(f"Prompt {i} failed: {error}")
+        if failures and not self.allow_failures:
+            raise RuntimeError(f"{len(failures)} of {num_prompts} prompts of batch {batch_id} failed.")
+        return outputs
+
+    async def _run_batch(self, prompts: dict[int, Any]) -> list[Any]:
+        """Run the prompts concurrently and return their outputs, or the exceptions of failed prompts."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            with self._model_override():
+                return await asyncio.gather(
+                    *(self._run_item(i, prompt, semaphore) for i, prompt in prompts.items()),
+                    return_exceptions=True,
+                )
+        finally:
+            # the event loop closes when asyncio.run returns, so close its connections first
+            await close_loop_connections()
+
+    async def _run_item(self, index: int, prompt: Any, semaphore: asyncio.Semaphore) -> Any:  # noqa: ANN401
+        """Run one prompt, retrying with exponential backoff, and return its JSON-serializable output."""
+        from pydantic_core import to_jsonable_python
+
+        # the last attempt either breaks out of the loop or raises
+        for attempt in range(self.item_retries + 1):
+            try:
+                async with semaphore:
+                    result = await self.agent.run(prompt)
+                break
+            except Exception as e:
+                if attempt == self.item_retries:
+                    print(f"Prompt {index} failed after {attempt + 1} attempts: {e}")
+                    raise
+                # back off without holding a slot, so other prompts keep making progress
+                delay = self.item_retry_delay * 2**attempt
+                print(f"Prompt {index} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        output = result.output
+        if isinstance(output, BaseModel):
+            output = output.model_dump()
+        return to_jsonable_python(output)
@@ -3,7 +3,9 @@ This module provides the LLMBranchDecoratedOperator class for branching DAGs bas
 LLM decisions within Airflow tasks.
 """
 
+import threading
 from enum import Enum
+from functools import cache
 from typing import Any
 
 from pydantic_ai import Agent, models
@@ -11,6 +13,44 @@ from pydantic_ai import Agent, models
 from airflow_ai_sdk.airflow import BranchMixIn, Context
 from airflow_ai_sdk.operators.agent import AgentDecoratedOperator
 
+# branch agents shared by the tasks run in this process, keyed by model, system prompt and downstream tasks
+_agent_cache: dict[tuple[Any, str, tuple[str, ...]], Agent] = {}
+_agent_cache_lock = threading.Lock()
+
+
+@cache
+def _downstream_tasks_enum(task_ids: tuple[str, ...]) -> type[Enum]:
+    """Return an Enum whose members are the given downstream task ids."""
+    return Enum("DownstreamTasks", {task_id: task_id for task_id in task_ids})
+
+
+def _branch_agent(
+    model: models.Model | models.KnownModelName,
+    system_prompt: str,
+    task_ids: tuple[str, ...],
+) -> Agent:
+    """
+    Return an agent that picks one of the given downstream tasks, built once per process.
+
+    Args:
+        model: The LLM model to use for the decision.
+        system_prompt: The system prompt to use for the decision.
+        task_ids: The sorted ids of the downstream tasks.
+
+    Returns:
+        The agent.
+    """
+    # model instances aren't hashable; the cached agent keeps the instance alive, so its id is stable
+    key = (model if isinstance(model, str) else id(model), system_prompt, task_ids)
+    with _agent_cache_lock:
+        if key not in _agent_cache:
+            _agent_cache[key] = Agent(
+                model=model,
+                system_prompt=system_prompt,
+                output_type=_downstream_tasks_enum(task_ids),
+            )
+        return _agent_cache[key]
+
 
 class LLMBranchDecoratedOperator(AgentDecoratedOperator, BranchMixIn):
     """
@@ -44,6 +84,9 @@ class LLMBranchDecoratedOperator(AgentDecoratedOperator, BranchMixIn):
         model: models.Model | models.KnownModelName,
         system_prompt: str,
         allow_multiple_branches: bool = False,
+        routes: dict[str, list[str]] | None = None,
+        route_model_name: str = "all-MiniLM-L12-v2",
+        route_margin: float = 0.1,
         **kwargs: dict[str, Any],
     ):
         """
@@ -53,18 +96,26 @@ class LLMBranchDecoratedOperator(AgentDecoratedOperator, BranchMixIn):
             model: The LLM model to use for the decision.
             system_prompt: The system prompt to use for the decision.
             allow_multiple_branches: Whether to allow multiple downstream tasks to be executed.
+            routes: Optional example utterances for downstream task ids. If set, the input is first
+                embedded and compared with the centroid of each task's examples, and the LLM is only
+                called when the most similar task doesn't beat the runner-up by `route_margin`.
+                Requires sentence-transformers.
+            route_model_name: The SentenceTransformer model used to embed the input and examples.
+            route_margin: The minimum cosine similarity margin for a decision without the LLM.
             **kwargs: Additional keyword arguments for the operator.
         """
+        if kwargs.get("deferrable"):
+            raise ValueError("@task.llm_branch doesn't support deferrable.")
+
         self.model = model
         self.system_prompt = system_prompt
         self.allow_multiple_branches = allow_multiple_branches
+        self.routes = routes
+        self.route_model_name = route_model_name
+        self.route_margin = route_margin
 
-        agent = Agent(
-            model=model,
-            system_prompt=system_prompt,
-        )
-
-        super().__init__(agent=agent, **kwargs)
+        # the agent depends on the downstream tasks, so it is built when the task runs
+        super().__init__(agent=None, **kwargs)
 
     def execute(self, context: Context) -> str | list[str]:
         """
@@ -76,17 +127,8 @@ class LLMBranchDecoratedOperator(AgentDecoratedOperator, BranchMixIn):
         Returns:
             The task_id(s) of the downstream task(s) to execute next.
         """
-        # create an enum of the downstream tasks and add it to the agent
-        downstream_tasks_enum = Enum(
-            "DownstreamTasks",
-            {task_id: task_id for task_id in self.downstream_task_ids},
-        )
-
-        self.agent = Agent(
-            model=self.model,
-            system_prompt=self.system_prompt,
-            output_type=downstream_tasks_enum,
-        )
+        # the agent's output type is an enum of the downstream tasks
+        self.agent = _branch_agent(self.model, self.system_prompt, tuple(sorted(self.downstream_task_ids)))
 
         result = super().execute(context)
 
@@ -102,3 +144,51 @@ class LLMBranchDecoratedOperator(AgentDecoratedOperator, BranchMixIn):
             raise ValueError("Multiple branches were returned but allow_multiple_branches is False")
 
         return self.do_branch(context, result)
+
+    def _run_agent(self, prompt: Any) -> str | dict[str, Any] | list[str]:  # noqa: ANN401
+        """
+        Decide the branch with the semantic router if `routes` are set and the decision is clear,
+        and with the LLM otherwise.
+
+        Args:
+            prompt: The prompt returned by the `python_callable`.
+
+        Returns:
+            The task_id of the downstream task to execute next.
+        """
+        if not self.routes:
+            return super()._run_agent(prompt)
+
+        from airflow_ai_sdk.embeddings.router import get_router
+
+        unknown = set(self.routes) - set(self.downstream_task_ids)
+        if unknown:
+            raise ValueError(f"routes has examples for tasks that are not downstream: {sorted(unknown)}")
+
+        router = get_router(self.routes, self.route_model_name, margin=self.route_margin)
+        route, margin = router.route(str(prompt))
+        if route is None:
+            print(f"Semantic router margin {margin:.3f} is below {self.route_margin}, asking the LLM")
+        else:
+            print(f"Semantic router chose {route} with margin {margin:.3f}, skipping the LLM call")
+        print(
+            f"Semantic router short-circuited {router.routed} of {router.decisions} decisions in this process"
+        )
+
+        return route if route is not None else super()._run_agent(prompt)
+
+    def _wrap_model(self, model: Any) -> Any:  # noqa: ANN401
+        """
+        Swap the agent's model for one that uses the shared HTTP client, then wrap it.
+
+        Args:
+            model: The agent's model.
+
+        Returns:
+            The wrapped model.
+        """
+        from airflow_ai_sdk.http import shared_model
+
+        # the agent's model was built from the model name, so it can be rebuilt on the shared client
+        pooled = shared_model(self.model)
+        return super()._wrap_model(model if isinstance(pooled, str) else pooled)
@@ -0,0 +1,56 @@
+"""
+This module provides helpers for paths that are either local files or remote object storage
+URLs, shared by the embedding sink, the vector index and the LLM response cache.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from airflow.io.path import ObjectStoragePath
+
+
+def object_storage_path(path: str) -> "ObjectStoragePath":
+    """
+    Return an Airflow `ObjectStoragePath` for a remote path.
+
+    Args:
+        path: A URL such as `s3://bucket/key`, read through the matching Airflow connection.
+
+    Returns:
+        The object storage path.
+    """
+    try:
+        # 3.x
+        from airflow.sdk import ObjectStoragePath
+    except ImportError:
+        # 2.x
+        from airflow.io.path import ObjectStoragePath
+
+    return ObjectStoragePath(path)
+
+
+def is_local(path: str) -> bool:
+    """
+    Return whether a path is a local file path rather than a remote URL.
+
+    Args:
+        path: A local path, a `file://` URL or a remote URL.
+
+    Returns:
+        `True` for paths without a scheme and `file://` URLs.
+    """
+    return "://" not in path or path.startswith("file://")
+
+
+def local_path(path: str) -> Path:
+    """
+    Return the local file path of a path for which `is_local` is `True`.
+
+    Args:
+        path: A local path or a `file://` URL.
+
+    Returns:
+        The path, with `~` expanded.
+    """
+    return Path(path.removeprefix("file://")).expanduser()
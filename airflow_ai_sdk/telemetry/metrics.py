@@ -0,0 +1,386 @@
+"""
+This module instruments model requests and tool calls. It records their latency, time to first
+byte, token usage and cost. It emits them through Airflow's metrics (StatsD or OpenTelemetry,
+whichever is configured) and summarizes them per task.
+"""
+
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any
+
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+# USD per million input, output and cached input tokens, matched by the longest model name prefix.
+# Update or extend it for your models and contracts; requests to models without a price have no cost.
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60, 0.075),
+    "gpt-4o": (2.50, 10.00, 1.25),
+    "gpt-4.1-nano": (0.10, 0.40, 0.025),
+    "gpt-4.1-mini": (0.40, 1.60, 0.10),
+    "gpt-4.1": (2.00, 8.00, 0.50),
+    "o3-mini": (1.10, 4.40, 0.55),
+    "o4-mini": (1.10, 4.40, 0.275),
+    "claude-3-5-haiku": (0.80, 4.00, 0.08),
+    "claude-3-5-sonnet": (3.00, 15.00, 0.30),
+    "claude-3-7-sonnet": (3.00, 15.00, 0.30),
+    "claude-sonnet-4": (3.00, 15.00, 0.30),
+    "claude-opus-4": (15.00, 75.00, 1.50),
+}
+
+_current_recorder: ContextVar["UsageRecorder | None"] = ContextVar("usage_recorder", default=None)
+
+
+def model_cost(
+    model_name: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0
+) -> float | None:
+    """
+    Estimate the cost of a model request from `MODEL_PRICES`.
+
+    Args:
+        model_name: The model name, with or without a provider prefix.
+        input_tokens: The input tokens, including cached input tokens.
+        output_tokens: The output tokens.
+        cached_tokens: The input tokens read from the provider's prompt cache.
+
+    Returns:
+        The cost in USD, or `None` if the model has no price.
+    """
+    name = model_name.split(":", 1)[-1]
+    matches = [prefix for prefix in MODEL_PRICES if name.startswith(prefix)]
+    if not matches:
+        return None
+    input_price, output_price, cached_price = MODEL_PRICES[max(matches, key=len)]
+    cached_tokens = min(cached_tokens, input_tokens)
+    return (
+        (input_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + output_tokens * output_price
+    ) / 1_000_000
+
+
+def _usage_tokens(usage: Any) -> tuple[int, int, int]:  # noqa: ANN401
+    """Return the input, output and cached input tokens of a `pydantic_ai` usage or its dict."""
+    if not isinstance(usage, dict):
+        usage = {
+            "request_tokens": usage.request_tokens,
+            "response_tokens": usage.response_tokens,
+            "details": usage.details,
+        }
+    details = usage.get("details") or {}
+    cached = details.get("cached_tokens", 0) + details.get("cache_read_input_tokens", 0)
+    return usage.get("request_tokens") or 0, usage.get("response_tokens") or 0, cached
+
+
+class UsageRecorder:
+    """
+    Records the model requests and tool calls of a task and emits them as Airflow metrics.
+
+    Requests are recorded by an `InstrumentedModel`, and calls of `WrappedTool`s by the recorder
+    that is `active` while the agent runs. The following metrics are emitted with the `tags` of
+    the recorder and the `model` or `tool`:
+
+    - `ai_sdk.model_request.duration` and `ai_sdk.model_request.ttfb` timers
+    - `ai_sdk.model_request.count` and `ai_sdk.model_request.errors` counters
+    - `ai_sdk.tokens.input`, `ai_sdk.tokens.output` and `ai_sdk.tokens.cached` counters
+    - `ai_sdk.cost.micro_usd` counter
+    - `ai_sdk.tool_call.duration` timer and `ai_sdk.tool_call.count` and `ai_sdk.tool_call.errors` counters
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.telemetry.metrics import InstrumentedModel, UsageRecorder
+
+    recorder = UsageRecorder(tags={"dag_id": "my_dag", "task_id": "my_task"})
+    with recorder.active(), agent.override(model=InstrumentedModel(agent.model, recorder)):
+        agent.run_sync("Hello")
+    print(recorder.summary())
+    ```
+    """
+
+    def __init__(self, tags: dict[str, str] | None = None, emit: bool = True):
+        """
+        Initialize the UsageRecorder.
+
+        Args:
+            tags: Tags added to every metric, e.g. the `dag_id` and `task_id`.
+            emit: Whether to emit metrics, or only record requests and tool calls, e.g. in the
+                triggerer, which hands them to the task to emit.
+        """
+        self.tags = tags or {}
+        self.emit = emit
+        self.requests: list[dict[str, Any]] = []
+        self.tool_calls: list[dict[str, Any]] = []
+
+    @contextmanager
+    def active(self) -> Iterator["UsageRecorder"]:
+        """Make this the recorder of tool calls within the context."""
+        token = _current_recorder.set(self)
+        try:
+            yield self
+        finally:
+            _current_recorder.reset(token)
+
+    @staticmethod
+    def current() -> "UsageRecorder | None":
+        """
+        Return the recorder that is active in the current context.
+
+        Returns:
+            The recorder, or `None` if none is active.
+        """
+        return _current_recorder.get()
+
+    def _emit_request(self, request: dict[str, Any]) -> None:
+        if not self.emit:
+            return
+        from airflow.stats import Stats
+
+        tags = {**self.tags, "model": request["model"]}
+        Stats.incr("ai_sdk.model_request.count", tags=tags)
+        if request.get("error"):
+            Stats.incr("ai_sdk.model_request.errors", tags=tags)
+        if request.get("latency") is not None:
+            Stats.timing("ai_sdk.model_request.duration", timedelta(seconds=request["latency"]), tags=tags)
+        if request.get("ttfb") is not None:
+            Stats.timing("ai_sdk.model_request.ttfb", timedelta(seconds=request["ttfb"]), tags=tags)
+        for kind in ("input", "output", "cached"):
+            if request[f"{kind}_tokens"]:
+                Stats.incr(f"ai_sdk.tokens.{kind}", request[f"{kind}_tokens"], tags=tags)
+        if request.get("cost_usd"):
+            Stats.incr("ai_sdk.cost.micro_usd", round(request["cost_usd"] * 1_000_000), tags=tags)
+
+    def record_request(
+        self,
+        model: str,
+        usage: Any = None,  # noqa: ANN401
+        latency: float | None = None,
+        ttfb: float | None = None,
+        error: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Record a model request and emit its metrics.
+
+        Args:
+            model: The name of the model.
+            usage: The `pydantic_ai` usage of the response, or its JSON dict.
+            latency: The duration of the request, in seconds.
+            ttfb: The time until the response headers arrived, in seconds.
+            error: The error of a failed request.
+
+        Returns:
+            The JSON-serializable record of the request.
+        """
+        input_tokens, output_tokens, cached_tokens = _usage_tokens(usage) if usage is not None else (0, 0, 0)
+        request = {
+            "model": model,
+            "latency": latency,
+            "ttfb": ttfb,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_tokens": cached_tokens,
+            "cost_usd": model_cost(model, input_tokens, output_tokens, cached_tokens) if usage else None,
+            "error": error,
+        }
+        self.requests.append(request)
+        self._emit_request(request)
+        return request
+
+    def records(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Return the JSON-serializable records of the requests and tool calls.
+
+        Returns:
+            The `requests` and `tool_calls`.
+        """
+        return {"requests": list(self.requests), "tool_calls": list(self.tool_calls)}
+
+    def replay(self, records: dict[str, list[dict[str, Any]]]) -> None:
+        """
+        Record and emit the requests and tool calls recorded by another recorder, e.g. in the triggerer.
+
+        Args:
+            records: The records returned by `records`.
+        """
+        for request in records.get("requests", []):
+            self.requests.append(request)
+            self._emit_request(request)
+        for call in records.get("tool_calls", []):
+            self.tool_calls.append(call)
+            self._emit_tool_call(call)
+
+    def record_tool_call(self, tool: str, duration: float, error: bool = False) -> None:
+        """
+        Record a tool call and emit its metrics.
+
+        Args:
+            tool: The name of the tool.
+            duration: The duration of the call, in seconds.
+            error: Whether the call failed or asked the model to retry.
+        """
+        call = {"tool": tool, "duration": duration, "error": error}
+        self.tool_calls.append(call)
+        self._emit_tool_call(call)
+
+    def _emit_tool_call(self, call: dict[str, Any]) -> None:
+        if not self.emit:
+            return
+        from airflow.stats import Stats
+
+        tags = {**self.tags, "tool": call["tool"]}
+        Stats.incr("ai_sdk.tool_call.count", tags=tags)
+        if call["error"]:
+            Stats.incr("ai_sdk.tool_call.errors", tags=tags)
+        Stats.timing("ai_sdk.tool_call.duration", timedelta(seconds=call["duration"]), tags=tags)
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Summarize the recorded requests and tool calls.
+
+        Returns:
+            The totals of requests, tokens, cost and latency, and the totals per model. `cost_usd`
+            only counts requests to models with a price in `MODEL_PRICES`.
+        """
+        models: dict[str, dict[str, Any]] = {}
+        for request in self.requests:
+            totals = models.setdefault(
+                request["model"],
+                {
+                    "requests": 0,
+                    "errors": 0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                    "cached_tokens": 0,
+                    "cost_usd": 0.0,
+                    "latency_s": 0.0,
+                },
+            )
+            totals["requests"] += 1
+            totals["errors"] += bool(request["error"])
+            for key in ("input_tokens", "output_tokens", "cached_tokens"):
+                totals[key] += request[key]
+            totals["cost_usd"] += request["cost_usd"] or 0.0
+            totals["latency_s"] += request["latency"] or 0.0
+
+        ttfbs = [request["ttfb"] for request in self.requests if request["ttfb"] is not None]
+        return {
+            "model_requests": len(self.requests),
+            "failed_model_requests": sum(totals["errors"] for totals in models.values()),
+            "input_tokens": sum(totals["input_tokens"] for totals in models.values()),
+            "output_tokens": sum(totals["output_tokens"] for totals in models.values()),
+            "cached_tokens": sum(totals["cached_tokens"] for totals in models.values()),
+            "cost_usd": round(sum(totals["cost_usd"] for totals in models.values()), 6),
+            "model_latency_s": round(sum(totals["latency_s"] for totals in models.values()), 3),
+            "mean_ttfb_s": round(sum(ttfbs) / len(ttfbs), 3) if ttfbs else None,
+            "tool_calls": len(self.tool_calls),
+            "failed_tool_calls": sum(call["error"] for call in self.tool_calls),
+            "tool_latency_s": round(sum(call["duration"] for call in self.tool_calls), 3),
+            "models": {
+                model: {
+                    **totals,
+                    "cost_usd": round(totals["cost_usd"], 6),
+                    "latency_s": round(totals["latency_s"], 3),
+                }
+                for model, totals in models.items()
+            },
+        }
+
+
+class InstrumentedModel(WrapperModel):
+    """
+    Model wrapper that records the latency, time to first byte and usage of every request,
+    streamed or not, and traces it in a `chat` span, see `airflow_ai_sdk.telemetry.tracing`.
+
+    The time to first byte is measured for models that use the SDK's shared HTTP client, see
+    `airflow_ai_sdk.http`. It is `None` for other models.
+
+    Example:
+
+    ```python
+    from pydantic_ai import Agent
+    from airflow_ai_sdk.telemetry.metrics import InstrumentedModel, UsageRecorder
+
+    agent = Agent(InstrumentedModel("openai:gpt-4o-mini", UsageRecorder()))
+    ```
+    """
+
+    def __init__(self, wrapped: Any, recorder: UsageRecorder):  # noqa: ANN401
+        """
+        Initialize the InstrumentedModel.
+
+        Args:
+            wrapped: The model or model name to wrap.
+            recorder: The recorder of the requests.
+        """
+        super().__init__(wrapped)
+        self.recorder = recorder
+
+    @asynccontextmanager
+    async def _observe(self) -> AsyncIterator[dict[str, ModelResponse]]:
+        """Trace and record the request made in the block, which sets the `response` it received."""
+        from airflow_ai_sdk.http import response_times
+        from airflow_ai_sdk.telemetry.tracing import set_usage_attributes, start_span
+
+        model = f"{self.system}:{self.model_name}"
+        attributes = {
+            "gen_ai.operation.name": "chat",
+            "gen_ai.system": self.system,
+            "gen_ai.request.model": self.model_name,
+        }
+        with start_span(f"chat {self.model_name}", attributes) as span:
+            observed: dict[str, ModelResponse] = {}
+            times: list[float] = []
+            token = response_times.set(times)
+            start = time.monotonic()
+            try:
+                yield observed
+            except Exception as e:
+                self.recorder.record_request(
+                    model, latency=time.monotonic() - start, error=f"{type(e).__name__}: {e}"
+                )
+                raise
+            finally:
+                response_times.reset(token)
+            response = observed["response"]
+            record = self.recorder.record_request(
+                model,
+                response.usage,
+                latency=time.monotonic() - start,
+                ttfb=times[0] - start if times else None,
+            )
+            set_usage_attributes(span, record)
+            if response.model_name:
+                span.set_attribute("gen_ai.response.model", response.model_name)
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        """Make the request in a span and record it."""
+        async with self._observe() as observed:
+            observed["response"] = await self.wrapped.request(
+                messages, model_settings, model_request_parameters
+            )
+        return observed["response"]
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        """Stream the response in a span and record it once the stream ends."""
+        async with (
+            self._observe() as observed,
+            self.wrapped.request_stream(messages, model_settings, model_request_parameters) as response,
+        ):
+            yield response
+            observed["response"] = response.get()
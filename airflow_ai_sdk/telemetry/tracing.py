@@ -0,0 +1,209 @@
+"""
+This module emits OpenTelemetry spans for agent runs, model requests and tool calls, so that
+multi-step agents can be profiled in a trace viewer. Spans carry the attributes of the Airflow
+task instance and follow the OpenTelemetry semantic conventions for generative AI.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+from opentelemetry import trace
+
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+_tracer_provider: trace.TracerProvider | None = None
+_task_attributes: ContextVar[dict[str, Any] | None] = ContextVar("task_attributes", default=None)
+
+
+def set_tracer_provider(tracer_provider: trace.TracerProvider | None) -> None:
+    """
+    Set the tracer provider of the SDK's spans.
+
+    By default, spans go to the global tracer provider of OpenTelemetry, which doesn't record
+    anything until the application or the OpenTelemetry distro configures one.
+
+    Args:
+        tracer_provider: The tracer provider, or `None` to use the global one again.
+    """
+    global _tracer_provider
+    _tracer_provider = tracer_provider
+
+
+def use_in_memory_exporter() -> "InMemorySpanExporter":
+    """
+    Record the SDK's spans in memory, e.g. to assert on them in tests. Requires `opentelemetry-sdk`.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.telemetry.tracing import use_in_memory_exporter
+
+    exporter = use_in_memory_exporter()
+    my_task.execute(context)
+    print([span.name for span in exporter.get_finished_spans()])
+    ```
+
+    Returns:
+        The exporter holding the finished spans.
+    """
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    set_tracer_provider(tracer_provider)
+    return exporter
+
+
+def get_tracer() -> trace.Tracer:
+    """
+    Return the tracer of the SDK's spans.
+
+    Returns:
+        A tracer of the provider set with `set_tracer_provider`, or of the global provider.
+    """
+    from airflow_ai_sdk import __version__
+
+    return (_tracer_provider or trace.get_tracer_provider()).get_tracer("airflow_ai_sdk", __version__)
+
+
+def task_attributes(context: Any) -> dict[str, Any]:  # noqa: ANN401
+    """
+    Return the span attributes of the task instance of an Airflow context.
+
+    Args:
+        context: The Airflow context.
+
+    Returns:
+        The `airflow.dag_id`, `airflow.task_id`, `airflow.run_id`, `airflow.try_number` and
+        `airflow.map_index` of the task instance, where available.
+    """
+    ti = context.get("ti") if hasattr(context, "get") else None
+    attributes = {}
+    for name in ("dag_id", "task_id", "run_id", "try_number", "map_index"):
+        value = getattr(ti, name, None)
+        # span attributes must be primitives
+        if isinstance(value, str | bool | int | float):
+            attributes[f"airflow.{name}"] = value
+    return attributes
+
+
+def current_task_attributes() -> dict[str, Any]:
+    """
+    Return the task instance attributes of the current agent run span.
+
+    Returns:
+        The attributes passed to `agent_run_span`, or an empty dict outside of an agent run.
+    """
+    return dict(_task_attributes.get() or {})
+
+
+@contextmanager
+def start_span(name: str, attributes: dict[str, Any] | None = None) -> Iterator[trace.Span]:
+    """
+    Start a span as a child of the current span, with the task instance attributes of the run.
+
+    Errors are recorded on the span, except for Airflow's `TaskDeferred`, which marks the span
+    with `airflow.deferred`.
+
+    Args:
+        name: The name of the span.
+        attributes: Additional attributes of the span.
+
+    Yields:
+        The span.
+    """
+    from airflow.exceptions import TaskDeferred
+
+    with get_tracer().start_as_current_span(
+        name,
+        attributes={**(_task_attributes.get() or {}), **(attributes or {})},
+        record_exception=False,
+        set_status_on_exception=False,
+    ) as span:
+        try:
+            yield span
+        except TaskDeferred:
+            span.set_attribute("airflow.deferred", True)
+            raise
+        except Exception as e:
+            span.record_exception(e)
+            span.set_status(trace.Status(trace.StatusCode.ERROR, f"{type(e).__name__}: {e}"))
+            raise
+
+
+def trace_context() -> dict[str, str]:
+    """
+    Return the W3C trace context of the current span, to continue the trace in another process.
+
+    Returns:
+        The `traceparent` and `tracestate` headers, or an empty dict outside of a span.
+    """
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+    carrier: dict[str, str] = {}
+    TraceContextTextMapPropagator().inject(carrier)
+    return carrier
+
+
+@contextmanager
+def agent_run_span(
+    attributes: dict[str, Any],
+    agent_name: str | None = None,
+    parent: dict[str, str] | None = None,
+) -> Iterator[trace.Span]:
+    """
+    Start the span of an agent run. Spans of model requests and tool calls within it are its
+    children and carry the same task instance attributes.
+
+    Args:
+        attributes: The task instance attributes, see `task_attributes`.
+        agent_name: The name of the agent, if it has one.
+        parent: A trace context returned by `trace_context` in another process, which the span
+            continues. Defaults to the current span.
+
+    Yields:
+        The span.
+    """
+    from opentelemetry import context as otel_context
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+    context_token = otel_context.attach(TraceContextTextMapPropagator().extract(parent)) if parent else None
+    token = _task_attributes.set(attributes)
+    try:
+        span_attributes: dict[str, Any] = {"gen_ai.operation.name": "invoke_agent"}
+        if agent_name:
+            span_attributes["gen_ai.agent.name"] = agent_name
+        with start_span(
+            f"invoke_agent {agent_name}" if agent_name else "invoke_agent", span_attributes
+        ) as span:
+            yield span
+    finally:
+        _task_attributes.reset(token)
+        if context_token is not None:
+            otel_context.detach(context_token)
+
+
+def set_usage_attributes(span: trace.Span, usage: dict[str, Any]) -> None:
+    """
+    Set the token usage and cost of a request or run on its span.
+
+    Args:
+        span: The span.
+        usage: A request record or summary of a `UsageRecorder`.
+    """
+    attributes = {
+        "gen_ai.usage.input_tokens": usage.get("input_tokens"),
+        "gen_ai.usage.output_tokens": usage.get("output_tokens"),
+        "airflow_ai_sdk.usage.cached_tokens": usage.get("cached_tokens"),
+        "airflow_ai_sdk.cost_usd": usage.get("cost_usd"),
+        "airflow_ai_sdk.model_requests": usage.get("model_requests"),
+        "airflow_ai_sdk.tool_calls": usage.get("tool_calls"),
+        "airflow_ai_sdk.ttfb_s": usage.get("ttfb"),
+    }
+    span.set_attributes({name: value for name, value in attributes.items() if value is not None})
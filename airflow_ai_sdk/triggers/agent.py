@@ -0,0 +1,237 @@
+"""
+This module provides an Airflow trigger that runs a `pydantic_ai.Agent` in the triggerer, so
+that the I/O-bound model requests of deferred agent tasks don't hold worker slots.
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import sys
+import threading
+from collections.abc import AsyncIterator
+from types import ModuleType
+from typing import Any
+
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+from pydantic_ai import Agent
+from pydantic_core import to_jsonable_python
+
+from airflow_ai_sdk.telemetry.metrics import InstrumentedModel, UsageRecorder
+from airflow_ai_sdk.telemetry.tracing import agent_run_span, set_usage_attributes
+
+_modules: dict[str, ModuleType] = {}
+_agents: dict[str, Agent] = {}
+_lock = threading.Lock()
+
+
+def _reference(module: ModuleType, name: str) -> dict[str, str]:
+    if "<locals>" in name:
+        raise ValueError(f"{name} must be defined at the top level of a module to be used by a trigger.")
+    return {"module": module.__name__, "file": getattr(module, "__file__", None) or "", "name": name}
+
+
+def object_reference(obj: Any) -> dict[str, str]:  # noqa: ANN401
+    """
+    Describe how to import a class or function defined at the top level of a module or DAG file.
+
+    Args:
+        obj: The class or function.
+
+    Returns:
+        A JSON-serializable reference with the module name, the module file and the attribute name.
+    """
+    return _reference(sys.modules[obj.__module__], obj.__qualname__)
+
+
+def find_reference(obj: Any, module_name: str) -> dict[str, str]:  # noqa: ANN401
+    """
+    Describe how to import an object bound to a top-level variable of a module, e.g. an agent
+    defined in a DAG file.
+
+    Args:
+        obj: The object.
+        module_name: The name of the module to look in.
+
+    Returns:
+        A reference as returned by `object_reference`.
+    """
+    module = sys.modules.get(module_name)
+    for name, value in vars(module).items() if module else []:
+        if value is obj:
+            return _reference(module, name)
+    raise ValueError(
+        "Deferrable agent tasks need the agent to be a top-level variable of the module that defines the task."
+    )
+
+
+def resolve_reference(reference: dict[str, str]) -> Any:  # noqa: ANN401
+    """
+    Import the object described by a reference.
+
+    The module is imported by name if possible. Modules that can't be imported by name, such as
+    DAG files, which Airflow loads under generated names, are loaded from their file once per process.
+
+    Args:
+        reference: A reference returned by `object_reference` or `find_reference`.
+
+    Returns:
+        The object.
+    """
+    try:
+        module = importlib.import_module(reference["module"])
+    except ImportError:
+        with _lock:
+            module = _modules.get(reference["file"])
+            if module is None:
+                digest = hashlib.sha256(reference["file"].encode("utf-8")).hexdigest()[:16]
+                spec = importlib.util.spec_from_file_location(
+                    f"airflow_ai_sdk_deferred_{digest}", reference["file"]
+                )
+                if spec is None or spec.loader is None:
+                    raise ImportError(f"Can't load {reference['file']}") from None
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[spec.name] = module
+                try:
+                    spec.loader.exec_module(module)
+                except BaseException:
+                    del sys.modules[spec.name]
+                    raise
+                _modules[reference["file"]] = module
+
+    obj: Any = module
+    for part in reference["name"].split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def load_agent(spec: dict[str, Any]) -> Agent:
+    """
+    Load the agent described by a spec, once per process.
+
+    Args:
+        spec: Either `{"reference": ...}` for an agent bound to a module variable, or
+            `{"model": ..., "system_prompt": ..., "output_type": ..., "model_settings": ...}` for a
+            single LLM call, where `output_type` is a reference or `None` for `str`.
+
+    Returns:
+        The agent.
+    """
+    key = json.dumps(spec, sort_keys=True)
+    with _lock:
+        if key in _agents:
+            return _agents[key]
+
+    if "reference" in spec:
+        agent = resolve_reference(spec["reference"])
+    else:
+        from airflow_ai_sdk.http import shared_model
+
+        output_type = resolve_reference(spec["output_type"]) if spec.get("output_type") else str
+        agent = Agent(
+            model=shared_model(spec["model"]),
+            system_prompt=spec["system_prompt"],
+            output_type=output_type,
+            model_settings=spec.get("model_settings"),
+        )
+
+    with _lock:
+        return _agents.setdefault(key, agent)
+
+
+class AgentRunTrigger(BaseTrigger):
+    """
+    Runs an agent on a prompt in the triggerer and fires an event with its output.
+
+    The triggerer awaits the model requests of all deferred agent tasks on one event loop, so
+    a few triggerers can keep hundreds of requests in flight. Agents are loaded once per
+    triggerer process from the spec built by `AgentDecoratedOperator`. Tools of the agent also
+    run in the triggerer.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.triggers.agent import AgentRunTrigger
+
+    self.defer(
+        trigger=AgentRunTrigger(
+            agent={"model": "openai:gpt-4o-mini", "system_prompt": "Be brief.", "output_type": None},
+            prompt="Hello",
+        ),
+        method_name="execute_complete",
+    )
+    ```
+    """
+
+    def __init__(
+        self,
+        agent: dict[str, Any],
+        prompt: Any,  # noqa: ANN401
+        attributes: dict[str, Any] | None = None,
+        trace_context: dict[str, str] | None = None,
+    ):
+        """
+        Initialize the AgentRunTrigger.
+
+        Args:
+            agent: The spec of the agent, see `load_agent`.
+            prompt: The JSON-serializable prompt.
+            attributes: The task instance attributes of the agent run's span.
+            trace_context: The trace context of the deferred task's span, which the agent run's
+                span continues.
+        """
+        super().__init__()
+        self.agent = agent
+        self.prompt = prompt
+        self.attributes = attributes or {}
+        self.trace_context = trace_context or {}
+
+    def serialize(self) -> tuple[str, dict[str, Any]]:
+        """
+        Serialize the trigger so the triggerer can recreate it.
+
+        Returns:
+            The classpath and keyword arguments of the trigger.
+        """
+        return f"{type(self).__module__}.{type(self).__name__}", {
+            "agent": self.agent,
+            "prompt": self.prompt,
+            "attributes": self.attributes,
+            "trace_context": self.trace_context,
+        }
+
+    async def run(self) -> AsyncIterator[TriggerEvent]:
+        """
+        Run the agent.
+
+        Yields:
+            One event with `status` `"success"` and the JSON-serializable `output` and `usage`,
+            or `status` `"error"` and the `error`, and the `records` of the model requests and
+            tool calls.
+        """
+        # the task emits the metrics of the requests and tool calls, with its tags
+        recorder = UsageRecorder(emit=False)
+        try:
+            agent = load_agent(self.agent)
+            with (
+                agent_run_span(self.attributes, agent.name, parent=self.trace_context) as span,
+                recorder.active(),
+                agent.override(model=InstrumentedModel(agent.model, recorder)),
+            ):
+                result = await agent.run(self.prompt)
+                set_usage_attributes(span, recorder.summary())
+        except Exception as e:
+            self.log.exception("Agent run failed")
+            yield TriggerEvent(
+                {"status": "error", "error": f"{type(e).__name__}: {e}", "records": recorder.records()}
+            )
+            return
+
+        yield TriggerEvent(
+            {
+                "status": "success",
+                "output": to_jsonable_python(result.output),
+                "usage": to_jsonable_python(result.usage()),
+                "records": recorder.records(),
+            }
+        )
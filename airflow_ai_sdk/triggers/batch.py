@@ -0,0 +1,105 @@
+"""
+This module provides an Airflow trigger that waits for a provider batch to finish without
+holding a worker slot.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+
+from airflow_ai_sdk.batch.clients import get_batch_client
+
+
+class BatchTrigger(BaseTrigger):
+    """
+    Polls a provider batch until it finishes.
+
+    The trigger runs in the triggerer and fires a single event with the final `status` of the
+    batch and whether it `succeeded`. Transient polling errors are retried on the next poll. API
+    keys are read from the environment of the triggerer, so they are never stored with the trigger.
+
+    Example:
+
+    ```python
+    from airflow_ai_sdk.triggers.batch import BatchTrigger
+
+    self.defer(
+        trigger=BatchTrigger(provider="openai", batch_id="batch_abc123", poll_interval=60),
+        method_name="execute_complete",
+    )
+    ```
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        batch_id: str,
+        base_url: str | None = None,
+        poll_interval: float = 60.0,
+        max_poll_errors: int = 10,
+    ):
+        """
+        Initialize the BatchTrigger.
+
+        Args:
+            provider: `"openai"` or `"anthropic"`.
+            batch_id: The id of the batch.
+            base_url: The base URL of the API, e.g. of a local stand-in server.
+            poll_interval: How long to wait between polls, in seconds.
+            max_poll_errors: How many consecutive polling errors are tolerated before failing.
+        """
+        super().__init__()
+        self.provider = provider
+        self.batch_id = batch_id
+        self.base_url = base_url
+        self.poll_interval = poll_interval
+        self.max_poll_errors = max_poll_errors
+
+    def serialize(self) -> tuple[str, dict[str, Any]]:
+        """
+        Serialize the trigger so the triggerer can recreate it.
+
+        Returns:
+            The classpath and keyword arguments of the trigger.
+        """
+        return (
+            f"{type(self).__module__}.{type(self).__name__}",
+            {
+                "provider": self.provider,
+                "batch_id": self.batch_id,
+                "base_url": self.base_url,
+                "poll_interval": self.poll_interval,
+                "max_poll_errors": self.max_poll_errors,
+            },
+        )
+
+    async def run(self) -> AsyncIterator[TriggerEvent]:
+        """
+        Poll the batch until it is done.
+
+        Yields:
+            One event with the `batch_id`, the provider's `status`, whether the batch `succeeded`
+            and its request `counts`, or an `error` if polling kept failing.
+        """
+        client = get_batch_client(self.provider, base_url=self.base_url)
+        errors = 0
+        while True:
+            try:
+                state = await client.get_state(self.batch_id)
+            except Exception as e:
+                errors += 1
+                self.log.warning(
+                    "Polling batch %s failed (%s/%s): %s", self.batch_id, errors, self.max_poll_errors, e
+                )
+                if errors >= self.max_poll_errors:
+                    yield TriggerEvent({"batch_id": self.batch_id, "succeeded": False, "error": str(e)})
+                    return
+            else:
+                errors = 0
+                self.log.info("Batch %s is %s: %s", self.batch_id, state["status"], state["counts"])
+                if state["done"]:
+                    yield TriggerEvent({"batch_id": self.batch_id, **state})
+                    return
+            await asyncio.sleep(self.poll_interval)
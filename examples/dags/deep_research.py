@@ -14,6 +14,8 @@ from bs4 import BeautifulSoup
 from pydantic_ai import Agent
 from pydantic_ai.common_tools.duckduckgo import duckduckgo_search_tool
 
+from airflow_ai_sdk.http import shared_model
+
 
 async def get_page_content(url: str) -> str:
     """
@@ -22,8 +24,9 @@ async def get_page_content(url: str) -> str:
     response = requests.get(url)
     soup = BeautifulSoup(response.text, "html.parser")
 
+    # an agent is built for every page, so reuse the process's pooled connections
     distillation_agent = Agent(
-        "gpt-4o-mini",
+        shared_model("gpt-4o-mini"),
         system_prompt="""
         You are responsible for distilling information from a text. The summary will be used by a research agent to generate a research report.
 
@@ -20,14 +20,15 @@ def get_texts() -> list[str]:
 
 @task.embed(
     model_name="all-MiniLM-L12-v2",  # default model
-    encode_kwargs={"normalize_embeddings": True}  # optional kwargs for the encode method
+    encode_kwargs={"normalize_embeddings": True},  # optional kwargs for the encode method
+    batch_size=64,  # optional number of texts per encode call
 )
-def create_embeddings(text: str) -> list[float]:
+def create_embeddings(texts: list[str]) -> list[list[float]]:
     """
-    This task creates embeddings for the given text. The decorator handles
-    the model initialization and encoding.
+    This task creates embeddings for all of the given texts in one task. The
+    decorator handles the model initialization and encodes the texts in batches.
     """
-    return text
+    return texts
 
 @task
 def store_embeddings(embeddings: list[list[float]]):
@@ -44,7 +45,7 @@ def store_embeddings(embeddings: list[list[float]]):
 )
 def text_embedding():
     texts = get_texts()
-    embeddings = create_embeddings.expand(text=texts)
+    embeddings = create_embeddings(texts)
     store_embeddings(embeddings)
 
 text_embedding()
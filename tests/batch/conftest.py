@@ -0,0 +1,147 @@
+"""
+A local stand-in for the OpenAI Batch and Anthropic Message Batches APIs.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+def reply(prompt, structured):
+    """The stand-in model upper-cases the prompt, and fails on prompts containing 'fail'."""
+    if "fail" in prompt:
+        return None
+    return {"text": prompt.upper()} if structured else prompt.upper()
+
+
+class StandInBatchServer(ThreadingHTTPServer):
+    """Serves batches that finish after `polls_until_done` status requests."""
+
+    def __init__(self, polls_until_done=1):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.polls_until_done = polls_until_done
+        self.files = {}
+        self.batches = {}
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def poll(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        return batch["polls"] > self.polls_until_done
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: StandInBatchServer
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, status=200):
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers["Content-Length"]))
+
+    def do_POST(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+        if self.path == "/v1/files":
+            # the multipart body contains the JSONL file; pick out its lines
+            lines = [line for line in self._body().decode().splitlines() if line.startswith('{"custom_id"')]
+            file_id = f"file-{len(server.files)}"
+            server.files[file_id] = [json.loads(line) for line in lines]
+            self._send({"id": file_id})
+        elif self.path == "/v1/batches":
+            body = json.loads(self._body())
+            batch_id = f"batch-{len(server.batches)}"
+            server.batches[batch_id] = {"requests": server.files[body["input_file_id"]], "polls": 0}
+            self._send({"id": batch_id, "status": "validating"})
+        elif self.path == "/v1/messages/batches":
+            body = json.loads(self._body())
+            batch_id = f"msgbatch-{len(server.batches)}"
+            server.batches[batch_id] = {"requests": body["requests"], "polls": 0}
+            self._send({"id": batch_id, "processing_status": "in_progress"})
+        else:
+            self._send({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        server = self.server
+        parts = self.path.strip("/").split("/")
+        if parts[:2] == ["v1", "batches"]:
+            batch_id = parts[2]
+            done = server.poll(batch_id)
+            self._send(
+                {
+                    "id": batch_id,
+                    "status": "completed" if done else "in_progress",
+                    "output_file_id": f"output-{batch_id}" if done else None,
+                    "request_counts": {"total": len(server.batches[batch_id]["requests"])},
+                }
+            )
+        elif parts[:2] == ["v1", "files"] and parts[3] == "content":
+            batch = server.batches[parts[2].removeprefix("output-")]
+            lines = []
+            for request in batch["requests"]:
+                body = request["body"]
+                output = reply(body["messages"][-1]["content"], "response_format" in body)
+                if output is None:
+                    response = {"status_code": 500, "body": {"error": "model failed"}}
+                else:
+                    content = output if isinstance(output, str) else json.dumps(output)
+                    usage = {"prompt_tokens": 10, "completion_tokens": 2, "prompt_tokens_details": {"cached_tokens": 4}}
+                    response = {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"content": content}}], "usage": usage},
+                    }
+                lines.append(json.dumps({"custom_id": request["custom_id"], "response": response, "error": None}))
+            self._send("\n".join(lines))
+        elif parts[:3] == ["v1", "messages", "batches"] and len(parts) == 4:
+            batch_id = parts[3]
+            done = server.poll(batch_id)
+            self._send(
+                {
+                    "id": batch_id,
+                    "processing_status": "ended" if done else "in_progress",
+                    "request_counts": {"processing": 0 if done else 1},
+                    "results_url": f"{server.url}/v1/messages/batches/{batch_id}/results" if done else None,
+                }
+            )
+        elif parts[:3] == ["v1", "messages", "batches"] and parts[4] == "results":
+            lines = []
+            for request in server.batches[parts[3]]["requests"]:
+                params = request["params"]
+                output = reply(params["messages"][-1]["content"], "tools" in params)
+                if output is None:
+                    result = {"type": "errored", "error": {"type": "api_error"}}
+                elif isinstance(output, str):
+                    content = [{"type": "text", "text": output}]
+                else:
+                    content = [{"type": "tool_use", "name": params["tools"][0]["name"], "input": output}]
+                if output is not None:
+                    usage = {"input_tokens": 6, "output_tokens": 2, "cache_read_input_tokens": 4}
+                    result = {"type": "succeeded", "message": {"content": content, "usage": usage}}
+                lines.append(json.dumps({"custom_id": request["custom_id"], "result": result}))
+            self._send("\n".join(lines))
+        else:
+            self._send({"error": "not found"}, status=404)
+
+
+@pytest.fixture
+def batch_server():
+    """Run the stand-in batch API in a background thread."""
+    server = StandInBatchServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,110 @@
+"""
+Tests for the provider batch clients and the batch trigger, against a local stand-in server.
+"""
+
+import asyncio
+
+import pytest
+from pydantic_ai.models.test import TestModel
+
+from airflow_ai_sdk.batch.clients import (
+    AnthropicBatchClient,
+    OpenAIBatchClient,
+    get_batch_client,
+    split_model_name,
+)
+from airflow_ai_sdk.models.base import BaseModel
+from airflow_ai_sdk.telemetry.metrics import UsageRecorder
+from airflow_ai_sdk.triggers.batch import BatchTrigger
+
+
+class Shout(BaseModel):
+    text: str
+
+
+@pytest.mark.parametrize(
+    "client_class, base_path",
+    [(OpenAIBatchClient, "/v1"), (AnthropicBatchClient, "")],
+)
+@pytest.mark.parametrize("output_type", [str, Shout])
+def test_submit_and_get_results(batch_server, client_class, base_path, output_type):
+    """Requests are submitted as one batch and results are validated against the output type."""
+    client = client_class(base_url=batch_server.url + base_path, api_key="test-key")
+    requests = [
+        client.build_request(str(i), "test-model", "Shout", prompt, output_type, {"max_tokens": 10})
+        for i, prompt in enumerate(["hi", "please fail", "bye"])
+    ]
+    batch_id = client.submit(requests)
+
+    assert not asyncio.run(client.get_state(batch_id))["done"]
+    state = asyncio.run(client.get_state(batch_id))
+    assert state["done"] and state["succeeded"]
+
+    recorder = UsageRecorder(emit=False)
+    results = client.get_results(batch_id, output_type, recorder=recorder, model="openai:gpt-4o-mini")
+    if output_type is str:
+        assert (results["0"], results["2"]) == ("HI", "BYE")
+    else:
+        assert (results["0"], results["2"]) == ({"text": "HI"}, {"text": "BYE"})
+    assert isinstance(results["1"], RuntimeError)
+    summary = recorder.summary()
+    assert (summary["model_requests"], summary["failed_model_requests"]) == (3, 1)
+    assert (summary["input_tokens"], summary["output_tokens"], summary["cached_tokens"]) == (20, 4, 8)
+
+    headers = batch_server.requests[0][1]
+    assert "test-key" in (headers.get("Authorization") or headers.get("x-api-key"))
+
+
+def test_build_request_wraps_non_object_outputs():
+    """Non-object output types are wrapped in an object schema and unwrapped when parsed."""
+    client = OpenAIBatchClient(api_key="test")
+    request = client.build_request("0", "gpt-4o-mini", "Count", "abc", int)
+    schema = request["body"]["response_format"]["json_schema"]["schema"]
+    assert schema["properties"]["response"] == {"type": "integer"}
+
+    line = {"custom_id": "0", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": '{"response": 3}'}}]}}}
+    assert client._parse_result(line, int) == 3
+
+
+def test_split_model_name():
+    """Model names are mapped to a batch provider."""
+    assert split_model_name("openai:gpt-4o-mini") == ("openai", "gpt-4o-mini")
+    assert split_model_name("gpt-4o") == ("openai", "gpt-4o")
+    assert split_model_name("anthropic:claude-3-5-haiku-latest") == ("anthropic", "claude-3-5-haiku-latest")
+    with pytest.raises(ValueError, match="OpenAI and Anthropic"):
+        split_model_name("groq:llama3-70b-8192")
+    with pytest.raises(ValueError, match="OpenAI and Anthropic"):
+        split_model_name(TestModel())
+
+
+def test_trigger_polls_until_done(batch_server, monkeypatch):
+    """The trigger fires one event once the batch is done and can be serialized."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    batch_server.polls_until_done = 2
+    client = get_batch_client("openai", base_url=f"{batch_server.url}/v1")
+    batch_id = client.submit([client.build_request("0", "gpt-4o-mini", "Shout", "hi", str)])
+
+    trigger = BatchTrigger("openai", batch_id, base_url=f"{batch_server.url}/v1", poll_interval=0.01)
+    classpath, kwargs = trigger.serialize()
+    assert classpath == "airflow_ai_sdk.triggers.batch.BatchTrigger"
+
+    async def first_event():
+        return await anext(BatchTrigger(**kwargs).run())
+
+    event = asyncio.run(first_event())
+    assert event.payload["batch_id"] == batch_id
+    assert event.payload["status"] == "completed"
+    assert event.payload["succeeded"]
+    assert batch_server.batches[batch_id]["polls"] == 3
+
+
+def test_trigger_gives_up_after_polling_errors(monkeypatch):
+    """The trigger fails the batch after max_poll_errors consecutive errors."""
+    trigger = BatchTrigger("openai", "batch-0", base_url="http://127.0.0.1:1/v1", poll_interval=0, max_poll_errors=2)
+
+    async def first_event():
+        return await anext(trigger.run())
+
+    event = asyncio.run(first_event())
+    assert not event.payload["succeeded"]
+    assert event.payload["error"]
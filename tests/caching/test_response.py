@@ -0,0 +1,178 @@
+"""
+Tests for the LLM response caches.
+"""
+
+import copy
+import pickle
+from unittest.mock import patch
+
+import pytest
+from pydantic_ai import Agent, Tool
+from pydantic_ai.models.test import TestModel
+from pydantic_ai.toolsets import FunctionToolset
+
+from airflow_ai_sdk.caching.response import (
+    FileResponseCache,
+    InMemoryResponseCache,
+    ResponseCache,
+    SQLiteResponseCache,
+    agent_cache_spec,
+    get_response_cache,
+    response_cache_key,
+)
+from airflow_ai_sdk.models.base import BaseModel
+
+
+class Summary(BaseModel):
+    title: str
+    words: int
+
+
+class OtherSummary(BaseModel):
+    title: str
+
+
+@pytest.fixture(params=["memory", "sqlite", "file"])
+def make_cache(request, tmp_path):
+    """Build a cache of each backend."""
+
+    def make_cache(**kwargs):
+        if request.param == "memory":
+            return InMemoryResponseCache(**kwargs)
+        if request.param == "sqlite":
+            return SQLiteResponseCache(tmp_path / "cache.sqlite", **kwargs)
+        return FileResponseCache(str(tmp_path / "cache"), **kwargs)
+
+    return make_cache
+
+
+def test_get_and_put(make_cache):
+    """Stored responses round-trip through JSON and hits and misses are counted."""
+    cache = make_cache()
+    assert cache.get("key") is None
+
+    cache.put("key", {"title": "a", "tags": ["x"]})
+    cache.put("none", None)
+
+    assert cache.get("key") == {"title": "a", "tags": ["x"]}
+    assert cache.get("none") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 0}
+
+
+def test_ttl(make_cache):
+    """Entries older than the TTL are misses and are removed."""
+    cache = make_cache(ttl=60)
+    with patch("airflow_ai_sdk.caching.response.time.time", return_value=1000.0):
+        cache.put("key", "value")
+    with patch("airflow_ai_sdk.caching.response.time.time", return_value=1059.0):
+        assert cache.get("key") == "value"
+    with patch("airflow_ai_sdk.caching.response.time.time", return_value=1061.0):
+        assert cache.get("key") is None
+
+    assert len(cache) == 0
+
+
+def test_eviction(make_cache):
+    """Once max_entries is exceeded the least recently used entries are evicted."""
+    cache = make_cache(max_entries=2)
+    for now, key in [(1.0, "a"), (2.0, "b")]:
+        with patch("airflow_ai_sdk.caching.response.time.time", return_value=now):
+            cache.put(key, key)
+    with patch("airflow_ai_sdk.caching.response.time.time", return_value=3.0):
+        cache.get("a")
+    with patch("airflow_ai_sdk.caching.response.time.time", return_value=4.0):
+        cache.put("c", "c")
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.get("c") == "c"
+    if isinstance(cache, FileResponseCache):
+        # object stores have no access times, so the oldest entry is evicted
+        assert cache.get("a") is None
+    else:
+        assert cache.get("a") == "a"
+        assert cache.get("b") is None
+
+
+def test_sqlite_cache_is_shared_by_instances(tmp_path):
+    """Entries written by one process are visible to another, and the cache survives pickling."""
+    path = tmp_path / "cache.sqlite"
+    SQLiteResponseCache(path).put("key", [1, 2])
+
+    cache = pickle.loads(pickle.dumps(SQLiteResponseCache(path)))
+    assert cache.get("key") == [1, 2]
+    cache.close()
+
+
+def test_deepcopy_shares_cache():
+    """Copying an operator doesn't copy its cache."""
+    cache = InMemoryResponseCache()
+    assert copy.deepcopy({"cache": cache})["cache"] is cache
+
+
+def test_get_response_cache(tmp_path):
+    """Strings resolve to process-wide caches of the matching backend."""
+    assert isinstance(get_response_cache("memory"), InMemoryResponseCache)
+    assert get_response_cache("memory") is get_response_cache("memory")
+    assert isinstance(get_response_cache(str(tmp_path / "cache.sqlite")), SQLiteResponseCache)
+    assert isinstance(get_response_cache(str(tmp_path / "cache")), FileResponseCache)
+
+    cache = InMemoryResponseCache()
+    assert get_response_cache(cache) is cache
+
+
+def test_response_cache_key():
+    """The key changes with every part of the request that affects the response."""
+
+    def lookup(city: str) -> str:
+        """Look up the weather."""
+        return city
+
+    def key(prompt="hello", **kwargs):
+        spec = {"model": "openai:gpt-4o-mini", "system_prompt": "Summarize", "output_type": Summary, **kwargs}
+        return response_cache_key(prompt, **spec)
+
+    base = key()
+    assert key() == base
+    assert key(prompt="hello!") != base
+    assert key(model="openai:gpt-4o") != base
+    assert key(system_prompt="Translate") != base
+    assert key(system_prompt=["Summarize"]) == base
+    assert key(output_type=OtherSummary) != base
+    assert key(model_settings={"temperature": 0}) != base
+    assert key(tools=[lookup]) != base
+    assert key(tools=[lookup]) == key(tools=[Tool(lookup)])
+
+
+def test_agent_cache_spec():
+    """Agents are described by their system prompts and the tools of all their toolsets."""
+
+    def lookup(city: str) -> str:
+        """Look up the weather."""
+        return city
+
+    def other(city: str) -> str:
+        """Look up the time."""
+        return city
+
+    def key(**kwargs):
+        agent = Agent(TestModel(), output_type=Summary, **{"system_prompt": "Summarize", **kwargs})
+        return response_cache_key("hello", **agent_cache_spec(agent))
+
+    base = key()
+    assert key() == base
+    assert key(system_prompt="Translate") != base
+    assert key(instructions="Be brief") != base
+    assert key(model_settings={"temperature": 0}) != base
+    assert key(tools=[lookup]) != base
+    assert key(toolsets=[FunctionToolset([lookup])]) == key(tools=[lookup])
+    assert key(toolsets=[FunctionToolset([other])]) != key(toolsets=[FunctionToolset([lookup])])
+
+    with pytest.raises(TypeError, match="pydantic_ai version"):
+        agent_cache_spec(object())
+
+
+def test_base_class_is_abstract():
+    """A cache must implement the storage methods of the base class."""
+    with pytest.raises(TypeError, match="abstract"):
+        ResponseCache()
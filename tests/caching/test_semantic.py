@@ -0,0 +1,114 @@
+"""
+Tests for the semantic LLM response cache.
+"""
+
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from airflow_ai_sdk.caching.semantic import SemanticResponseCache
+
+KEYWORDS = ["refund", "bug", "late"]
+
+
+class KeywordModel:
+    """Embeds a text as the counts of a few keywords."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return np.array([[text.count(word) + 0.01 for word in KEYWORDS] for text in texts])
+
+
+@pytest.fixture
+def model():
+    model = KeywordModel()
+    with patch("airflow_ai_sdk.caching.semantic.get_model", return_value=model):
+        yield model
+
+
+def test_reuse_similar_prompt(model, tmp_path):
+    """A similar prompt in the same scope reuses the stored output and every decision is audited."""
+    audit_log = tmp_path / "audit.jsonl"
+    cache = SemanticResponseCache(threshold=0.9, audit_log=audit_log)
+
+    output, vector = cache.lookup("scope", "refund please")
+    assert output is None
+    cache.add("scope", "refund please", {"category": "refund"}, vector=vector)
+
+    assert cache.lookup("scope", "I want a refund")[0] == {"category": "refund"}
+    assert cache.lookup("scope", "there is a bug")[0] is None
+    assert cache.lookup("other-scope", "I want a refund")[0] is None
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 0}
+    # the stored prompt was embedded once, during the first lookup
+    assert model.calls == 4
+
+    decisions = [json.loads(line) for line in audit_log.read_text().splitlines()]
+    assert [d["decision"] for d in decisions] == ["miss", "reuse", "miss", "miss"]
+    assert decisions[1]["matched_prompt"] == "refund please"
+    assert decisions[1]["similarity"] >= 0.9
+    assert decisions[2]["similarity"] < 0.9
+    assert decisions[3]["similarity"] is None
+
+
+def test_threshold_override(model):
+    """A lookup can use a stricter threshold than the cache's."""
+    cache = SemanticResponseCache(threshold=0.9)
+    cache.add("scope", "refund refund refund", "refund")
+
+    assert cache.lookup("scope", "refund refund refund, late")[0] == "refund"
+    assert cache.lookup("scope", "refund refund refund, late", threshold=0.99)[0] is None
+
+
+def test_ttl_and_eviction(model, tmp_path):
+    """Expired entries are dropped and the least recently used entries are evicted."""
+    cache = SemanticResponseCache(tmp_path / "cache.sqlite", ttl=60, max_entries=2)
+    with patch("airflow_ai_sdk.caching.semantic.time.time", return_value=1000.0):
+        cache.add("scope", "refund", "refund")
+        cache.add("scope", "bug", "bug")
+    with patch("airflow_ai_sdk.caching.semantic.time.time", return_value=1010.0):
+        assert cache.lookup("scope", "refund")[0] == "refund"
+        cache.add("scope", "late", "late")
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    with patch("airflow_ai_sdk.caching.semantic.time.time", return_value=1065.0):
+        assert cache.lookup("scope", "refund")[0] is None
+        assert cache.lookup("scope", "late")[0] == "late"
+    cache.close()
+
+
+def test_entries_of_another_embedding_model_are_misses(model, tmp_path):
+    """Reusing a file with another embedding model treats its entries as misses."""
+    path = tmp_path / "cache.sqlite"
+    SemanticResponseCache(path, threshold=0.9).add("scope", "refund please", "refund")
+
+    other = SemanticResponseCache(path, model_name="other-model", threshold=0.9)
+    with patch(
+        "airflow_ai_sdk.caching.semantic.get_model",
+        return_value=type("Wide", (), {"encode": lambda self, texts, **kwargs: np.ones((len(texts), 5))})(),
+    ):
+        assert other.lookup("scope", "refund please")[0] is None
+        other.add("scope", "refund please", "wide")
+        assert other.lookup("scope", "refund please")[0] == "wide"
+
+    assert SemanticResponseCache(path, threshold=0.9).lookup("scope", "refund please")[0] == "refund"
+
+
+def test_eviction_per_scope(model):
+    """Each scope keeps at most max_entries_per_scope entries, evicting the least recently used."""
+    cache = SemanticResponseCache(max_entries_per_scope=2)
+    with patch("airflow_ai_sdk.caching.semantic.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+        cache.add("scope", "refund", "refund")
+        cache.add("scope", "bug", "bug")
+        cache.add("other", "refund", "other refund")
+        cache.add("scope", "late", "late")
+
+    assert len(cache) == 3
+    assert cache.evictions == 1
+    assert cache.lookup("scope", "refund")[0] is None
+    assert cache.lookup("other", "refund")[0] == "other refund"
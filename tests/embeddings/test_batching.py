@@ -0,0 +1,47 @@
+"""
+Tests for length-sorted dynamic batching.
+"""
+
+import pytest
+
+from airflow_ai_sdk.embeddings.batching import BatchingStats, token_budget_batches
+
+
+def test_batches_group_similar_lengths():
+    """Texts of similar length end up in the same batch."""
+    assert token_budget_batches([5, 500, 6, 480], max_tokens=1000) == [[1, 3], [2, 0]]
+
+
+def test_batches_respect_token_budget():
+    """The padded size of every batch fits the budget, and every text is in exactly one batch."""
+    lengths = [3, 17, 8, 120, 9, 64, 2, 33, 33, 5]
+
+    batches = token_budget_batches(lengths, max_tokens=128)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) == 1 or max(lengths[i] for i in batch) * len(batch) <= 128
+
+
+def test_text_longer_than_budget_gets_own_batch():
+    """A text that does not fit the budget on its own is still encoded."""
+    assert token_budget_batches([300, 2, 2], max_tokens=100) == [[0], [1, 2]]
+
+
+def test_invalid_budget():
+    """The token budget must be positive."""
+    with pytest.raises(ValueError):
+        token_budget_batches([1], max_tokens=0)
+
+
+def test_stats():
+    """Padding efficiency is the share of real tokens among padded tokens."""
+    stats = BatchingStats()
+    stats.add_batch([10, 10])
+    stats.add_batch([4, 2])
+
+    assert stats.texts == 4
+    assert stats.batches == 2
+    assert stats.padding_efficiency == pytest.approx(26 / 28)
+    assert "4 texts in 2 batches" in stats.summary()
+    assert "92.9%" in stats.summary()
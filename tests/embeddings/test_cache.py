@@ -0,0 +1,52 @@
+"""
+Tests for the EmbeddingCache class.
+"""
+
+import numpy as np
+
+from airflow_ai_sdk.embeddings.cache import EmbeddingCache
+
+
+def test_key_depends_on_model_kwargs_and_text():
+    """The cache key changes when any of its inputs changes."""
+    key = EmbeddingCache.make_key("model-a", {}, "hello")
+
+    assert key == EmbeddingCache.make_key("model-a", {}, "hello")
+    assert key != EmbeddingCache.make_key("model-b", {}, "hello")
+    assert key != EmbeddingCache.make_key("model-a", {"normalize_embeddings": True}, "hello")
+    assert key != EmbeddingCache.make_key("model-a", {}, "hello!")
+    assert key != EmbeddingCache.make_key("model-a", {}, "hello", {"truncate_dim": 256})
+    assert EmbeddingCache.make_key("model-a", {}, "hello", {"truncate_dim": 256}) != EmbeddingCache.make_key(
+        "model-a", {}, "hello", {"revision": "v2"}
+    )
+
+
+def test_round_trip_preserves_dtype(tmp_path):
+    """Stored vectors are returned with their original values and dtype."""
+    path = tmp_path / "nested" / "cache.sqlite"
+    float_vector = np.array([0.1, 0.2, 0.3], dtype=np.float32)
+    int_vector = np.array([-1, 0, 127], dtype=np.int8)
+
+    with EmbeddingCache(path) as cache:
+        cache.put_many({"a": float_vector, "b": int_vector})
+
+    with EmbeddingCache(path) as cache:
+        found = cache.get_many(["a", "b", "c"])
+
+        assert set(found) == {"a", "b"}
+        np.testing.assert_array_equal(found["a"], float_vector)
+        assert found["a"].dtype == np.float32
+        np.testing.assert_array_equal(found["b"], int_vector)
+        assert found["b"].dtype == np.int8
+        assert cache.hits == 2
+        assert cache.misses == 1
+
+
+def test_get_many_counts_duplicate_keys(tmp_path):
+    """Every requested key counts towards the hit and miss counters."""
+    with EmbeddingCache(tmp_path / "cache.sqlite") as cache:
+        cache.put_many({"a": np.zeros(2, dtype=np.float32)})
+        cache.get_many(["a", "a", "b", "b"])
+
+        assert cache.hits == 2
+        assert cache.misses == 2
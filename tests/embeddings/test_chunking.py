@@ -0,0 +1,73 @@
+"""
+Tests for the TokenChunker class.
+"""
+
+import re
+from unittest.mock import MagicMock
+
+import pytest
+
+from airflow_ai_sdk.embeddings.chunking import TokenChunker
+
+
+class WhitespaceTokenizer:
+    """A tokenizer that treats every whitespace-separated word as one token."""
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False, verbose=True):
+        return {"offset_mapping": [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+
+def test_short_text_is_one_chunk():
+    """Texts that fit in the window, including empty texts, are a single chunk."""
+    chunker = TokenChunker(WhitespaceTokenizer(), window=4)
+
+    assert chunker.spans("one two three") == [(0, 13)]
+    assert chunker.spans("") == [(0, 0)]
+
+
+def test_windows_without_overlap():
+    """Long texts are split into consecutive windows of tokens."""
+    text = "a bb ccc dddd eeeee"
+    chunker = TokenChunker(WhitespaceTokenizer(), window=2)
+
+    assert [text[start:end] for start, end in chunker.spans(text)] == ["a bb", "ccc dddd", "eeeee"]
+
+
+def test_windows_with_overlap():
+    """Consecutive windows share `overlap` tokens and keep their character offsets."""
+    text = "a bb ccc dddd eeeee"
+    chunker = TokenChunker(WhitespaceTokenizer(), window=3, overlap=1)
+
+    spans = chunker.spans(text)
+
+    assert [text[start:end] for start, end in spans] == ["a bb ccc", "ccc dddd eeeee"]
+    assert spans[1][0] == text.index("ccc")
+
+
+def test_from_model_caps_window_at_model_limit():
+    """The window defaults to, and is capped at, the model's maximum sequence length."""
+    model = MagicMock(tokenizer=WhitespaceTokenizer(), max_seq_length=10)
+
+    assert TokenChunker.from_model(model).window == 8
+    assert TokenChunker.from_model(model, window=5).window == 5
+    assert TokenChunker.from_model(model, window=500).window == 8
+
+
+def test_from_model_scales_overlap_with_capped_window():
+    """An overlap that is valid for the requested window stays smaller than the capped window."""
+    model = MagicMock(tokenizer=WhitespaceTokenizer(), max_seq_length=10)
+
+    assert TokenChunker.from_model(model, window=5, overlap=4).overlap == 4
+    chunker = TokenChunker.from_model(model, window=512, overlap=256)
+    assert (chunker.window, chunker.overlap) == (8, 4)
+    assert TokenChunker.from_model(model, window=16, overlap=15).overlap == 7
+
+
+@pytest.mark.parametrize("window, overlap", [(0, 0), (2, 2), (2, -1)])
+def test_invalid_window(window, overlap):
+    """The window must be positive and larger than the overlap."""
+    with pytest.raises(ValueError):
+        TokenChunker(WhitespaceTokenizer(), window=window, overlap=overlap)
@@ -0,0 +1,109 @@
+"""
+Tests for the embedding output formats.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from airflow_ai_sdk.embeddings.formats import decode_embeddings, dequantize_embeddings, encode_embeddings
+
+
+def test_list_format_round_trip():
+    """The list format returns plain lists that decode back to an array."""
+    vectors = np.array([[0.5, 1.0], [1.5, 2.0]], dtype=np.float32)
+
+    payload = encode_embeddings(vectors, "list")
+
+    assert payload == [[0.5, 1.0], [1.5, 2.0]]
+    np.testing.assert_array_equal(decode_embeddings(payload), vectors)
+
+
+@pytest.mark.parametrize("output_format, dtype", [("float32", np.float32), ("float16", np.float16)])
+def test_binary_format_round_trip(output_format, dtype):
+    """Binary formats are JSON-serializable and decode to the packed dtype and shape."""
+    vectors = np.random.default_rng(0).standard_normal((3, 8)).astype(np.float32)
+
+    payload = json.loads(json.dumps(encode_embeddings(vectors, output_format)))
+    decoded = decode_embeddings(payload)
+
+    assert payload["format"] == output_format
+    assert payload["shape"] == [3, 8]
+    assert decoded.dtype == dtype
+    np.testing.assert_array_equal(decoded, vectors.astype(dtype))
+
+
+def test_binary_format_single_vector():
+    """A single vector keeps its 1D shape."""
+    payload = encode_embeddings(np.array([1.0, 2.0, 3.0]), "float32")
+
+    assert decode_embeddings(payload).tolist() == [1.0, 2.0, 3.0]
+
+
+def test_binary_format_is_smaller_than_list():
+    """Packed vectors are much smaller than their JSON list representation."""
+    vectors = np.random.default_rng(0).standard_normal((100, 384)).astype(np.float32)
+
+    list_size = len(json.dumps(encode_embeddings(vectors, "list")))
+    float16_size = len(json.dumps(encode_embeddings(vectors, "float16")))
+
+    assert float16_size * 5 < list_size
+
+
+def test_unknown_format():
+    """Unknown formats raise a ValueError."""
+    with pytest.raises(ValueError, match="output_format"):
+        encode_embeddings(np.zeros(2), "float64")
+
+    with pytest.raises(ValueError, match="format"):
+        decode_embeddings({"format": "float64", "dtype": "<f8", "shape": [2], "data": ""})
+
+
+def test_int8_round_trip():
+    """int8 codes are dequantized within one quantization step using the stored ranges."""
+    vectors = np.random.default_rng(0).standard_normal((50, 16)).astype(np.float32)
+
+    payload = json.loads(json.dumps(encode_embeddings(vectors, "int8")))
+    codes = decode_embeddings(payload)
+    restored = dequantize_embeddings(payload)
+
+    assert codes.dtype == np.int8
+    assert codes.shape == (50, 16)
+    step = (vectors.max(axis=0) - vectors.min(axis=0)) / 255
+    assert np.all(np.abs(restored - vectors) <= step / 2 + 1e-6)
+
+
+def test_int8_with_calibration_ranges():
+    """Values outside the calibration ranges are clipped."""
+    payload = encode_embeddings(np.array([[-2.0, 0.5], [2.0, 0.0]]), "int8", ranges=[[-1.0, 0.0], [1.0, 1.0]])
+
+    assert decode_embeddings(payload)[:, 0].tolist() == [-128, 127]
+    np.testing.assert_allclose(dequantize_embeddings(payload)[:, 0], [-1.0, 1.0])
+
+
+def test_int8_single_vector():
+    """A single vector is calibrated on its overall range."""
+    payload = encode_embeddings(np.array([-1.0, 0.0, 1.0]), "int8")
+
+    codes = decode_embeddings(payload)
+    assert codes[0] == -128
+    assert codes[-1] == 127
+    np.testing.assert_allclose(dequantize_embeddings(payload), [-1.0, 0.0, 1.0], atol=0.01)
+
+
+def test_binary_quantization():
+    """Binary codes keep the sign of each dimension, packed 8 dimensions per byte."""
+    vectors = np.array([[0.3, -0.1, 0.2, 0.0, -0.5, 0.9, 0.1, -0.2, 0.4, -0.4]])
+
+    payload = encode_embeddings(vectors, "binary")
+    codes = decode_embeddings(payload)
+
+    assert codes.dtype == np.uint8
+    assert codes.shape == (1, 2)
+    assert dequantize_embeddings(payload).tolist() == [[1, -1, 1, -1, -1, 1, 1, -1, 1, -1]]
+
+
+def test_dequantize_float_formats():
+    """Unquantized payloads are returned as decoded."""
+    assert dequantize_embeddings([[1.0, 2.0]]).tolist() == [[1.0, 2.0]]
@@ -0,0 +1,139 @@
+"""
+Tests for the local vector indexes.
+"""
+
+import numpy as np
+import pytest
+
+from airflow_ai_sdk.embeddings.formats import encode_embeddings
+from airflow_ai_sdk.embeddings.index import ExactIndex, IVFIndex, load_index
+
+
+@pytest.fixture
+def clustered_vectors():
+    """Vectors drawn around 20 cluster centers, and queries close to the first 50 vectors."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, 16))
+    vectors = (centers[rng.integers(0, 20, 2000)] + 0.2 * rng.standard_normal((2000, 16))).astype(np.float32)
+    queries = vectors[:50] + 0.01 * rng.standard_normal((50, 16)).astype(np.float32)
+    return vectors, queries
+
+
+def brute_force(vectors, queries, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ vectors.T), axis=1, kind="stable")[:, :k]
+
+
+def test_exact_search_matches_brute_force(clustered_vectors):
+    """Blocked search returns the same neighbours as scoring the full matrix."""
+    vectors, queries = clustered_vectors
+    index = ExactIndex(vectors, block_size=300, query_batch_size=16)
+
+    scores, ids = index.search(queries, k=5)
+
+    assert scores.shape == ids.shape == (50, 5)
+    np.testing.assert_array_equal(ids, brute_force(vectors, queries, 5))
+    assert np.all(np.diff(scores, axis=1) <= 0)
+    assert ids[:, 0].tolist() == list(range(50))
+
+
+def test_single_query_and_small_index():
+    """A 1D query returns 1D results, and k is capped at the index size."""
+    index = ExactIndex(np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]), metric="dot")
+
+    scores, ids = index.search(np.array([2.0, 1.0]), k=10)
+
+    assert ids.tolist() == [2, 0, 1]
+    assert scores.tolist() == [3.0, 2.0, 1.0]
+
+
+def test_ivf_search_recall(clustered_vectors):
+    """The IVF index finds nearly all exact neighbours while probing few clusters."""
+    vectors, queries = clustered_vectors
+    index = IVFIndex(vectors, n_lists=20, n_probe=3)
+
+    _, ids = index.search(queries, k=10)
+    expected = brute_force(vectors, queries, 10)
+
+    recall = np.mean([len(set(found) & set(exact)) / 10 for found, exact in zip(ids, expected, strict=True)])
+    assert recall > 0.9
+    assert ids[:, 0].tolist() == list(range(50))
+    assert index.offsets[-1] == len(index) == 2000
+
+
+def test_ivf_pads_missing_neighbours():
+    """Neighbours missing from the probed clusters are returned as -1."""
+    vectors = np.array([[1.0, 0.0], [1.0, 0.1], [-1.0, 0.0], [-1.0, -0.1]])
+    index = IVFIndex(vectors, n_lists=2, n_probe=1)
+
+    scores, ids = index.search(np.array([1.0, 0.05]), k=3)
+
+    assert sorted(ids[:2].tolist()) == [0, 1]
+    assert ids[2] == -1
+    assert scores[2] == -np.inf
+
+
+@pytest.mark.parametrize("index_cls", [ExactIndex, IVFIndex])
+def test_save_and_load_with_mmap(index_cls, clustered_vectors, tmp_path):
+    """Saved indexes are memory-mapped on load and return the same results."""
+    vectors, queries = clustered_vectors
+    index = index_cls(vectors)
+    path = index.save(str(tmp_path / "index.bin"))
+
+    loaded = load_index(path)
+
+    assert type(loaded) is index_cls
+    assert isinstance(loaded.vectors, np.memmap)
+    assert len(loaded) == len(index)
+    for expected, actual in zip(index.search(queries, k=5), loaded.search(queries, k=5), strict=True):
+        np.testing.assert_array_equal(expected, actual)
+
+    in_memory = load_index(path, mmap=False)
+    assert not isinstance(in_memory.vectors, np.memmap)
+
+
+def test_from_embeddings(tmp_path):
+    """Indexes can be built from any output format of @task.embed."""
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+
+    for payload in (
+        vectors.tolist(),
+        encode_embeddings(vectors, "float16"),
+        encode_embeddings(vectors, "int8"),
+        {"chunks": [], "embeddings": encode_embeddings(vectors, "float32")},
+    ):
+        index = ExactIndex.from_embeddings(payload)
+        assert index.search(np.array([0.1, 1.0]), k=1)[1].tolist() == [1]
+
+
+def test_invalid_index(tmp_path):
+    """Unknown metrics, empty indexes, foreign files and searches without neighbours are rejected."""
+    with pytest.raises(ValueError, match="metric"):
+        ExactIndex(np.ones((2, 2)), metric="l1")
+    with pytest.raises(ValueError, match="without vectors"):
+        ExactIndex(np.empty((0, 2)))
+    for k in (0, -1):
+        with pytest.raises(ValueError, match="k must be"):
+            ExactIndex(np.ones((2, 2))).search(np.ones(2), k=k)
+
+    path = tmp_path / "vectors.npy"
+    np.save(path, np.ones((2, 2)))
+    with pytest.raises(ValueError, match="not a vector index"):
+        load_index(str(path))
+
+
+@pytest.mark.parametrize("index_cls", [ExactIndex, IVFIndex])
+def test_texts(index_cls, tmp_path):
+    """Texts are saved with the index and returned by original row number."""
+    texts = ["first", "zweite ü", "", "fourth"]
+    index = index_cls(np.eye(4), texts=texts, **({"n_lists": 2} if index_cls is IVFIndex else {}))
+
+    loaded = load_index(index.save(str(tmp_path / "index.bin")))
+
+    _, ids = loaded.search(np.array([0.0, 1.0, 0.0, 0.0]), k=1)
+    assert loaded.texts(ids) == ["zweite ü"]
+    assert loaded.texts([3, 0, 2]) == ["fourth", "first", ""]
+
+    with pytest.raises(ValueError, match="texts for"):
+        index_cls(np.eye(4), texts=["one"])
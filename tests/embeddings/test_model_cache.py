@@ -0,0 +1,111 @@
+"""
+Tests for the SentenceTransformerCache class.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from airflow_ai_sdk.embeddings.model_cache import SentenceTransformerCache
+
+
+class StubParameter:
+    def __init__(self, numel: int):
+        self._numel = numel
+
+    def numel(self):
+        return self._numel
+
+    def element_size(self):
+        return 4
+
+
+class StubModel:
+    def __init__(self, name, numel=10, **kwargs):
+        self.name = name
+        self.kwargs = kwargs
+        self._numel = numel
+
+    def parameters(self):
+        return [StubParameter(self._numel)]
+
+
+@pytest.fixture
+def patched_sentence_transformer():
+    """Patch the SentenceTransformer class with a stub."""
+    with patch("sentence_transformers.SentenceTransformer", side_effect=StubModel) as mock_cls:
+        yield mock_cls
+
+
+def test_get_loads_model_once(patched_sentence_transformer):
+    """Repeated requests for the same model return the cached instance."""
+    cache = SentenceTransformerCache()
+
+    first = cache.get("model-a")
+    second = cache.get("model-a")
+
+    assert first is second
+    patched_sentence_transformer.assert_called_once_with("model-a")
+
+
+def test_constructor_options_are_part_of_the_key(patched_sentence_transformer):
+    """Different constructor options load different models."""
+    cache = SentenceTransformerCache()
+
+    cpu = cache.get("model-a", device="cpu")
+    cuda = cache.get("model-a", device="cuda")
+
+    assert cpu is not cuda
+    assert patched_sentence_transformer.call_count == 2
+    assert len(cache) == 2
+
+
+def test_lru_eviction_by_count(patched_sentence_transformer):
+    """The least recently used model is evicted when max_models is exceeded."""
+    cache = SentenceTransformerCache(max_models=2)
+
+    cache.get("model-a")
+    cache.get("model-b")
+    cache.get("model-a")  # model-b is now least recently used
+    cache.get("model-c")
+
+    assert SentenceTransformerCache.make_key("model-a") in cache
+    assert SentenceTransformerCache.make_key("model-b") not in cache
+    assert SentenceTransformerCache.make_key("model-c") in cache
+
+
+def test_eviction_by_bytes(patched_sentence_transformer):
+    """Models are evicted when the byte budget is exceeded, but the newest model is kept."""
+    cache = SentenceTransformerCache(max_models=None, max_bytes=100)
+
+    cache.get("model-a", numel=20)  # 80 bytes
+    cache.get("model-b", numel=20)  # 80 bytes, evicts model-a
+
+    assert len(cache) == 1
+    assert cache.size_bytes == 80
+
+    cache.get("model-c", numel=50)  # 200 bytes, larger than the budget on its own
+    assert len(cache) == 1
+    assert SentenceTransformerCache.make_key("model-c", numel=50) in cache
+
+
+def test_concurrent_loads_share_one_model():
+    """Threads requesting the same model concurrently trigger a single load."""
+    cache = SentenceTransformerCache()
+
+    def slow_model(name):
+        time.sleep(0.05)
+        return StubModel(name)
+
+    with patch("sentence_transformers.SentenceTransformer", side_effect=slow_model) as mock_cls:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("model-a"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert mock_cls.call_count == 1
+    assert all(result is results[0] for result in results)
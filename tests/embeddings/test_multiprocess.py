@@ -0,0 +1,62 @@
+"""
+Tests for the multi-process embedding helpers.
+"""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from airflow_ai_sdk.embeddings.multiprocess import default_num_processes, multi_process_pool
+
+
+def test_pool_is_started_and_stopped():
+    """The pool is started on the requested devices and stopped on exit, even on errors."""
+    model = MagicMock()
+
+    with pytest.raises(RuntimeError), multi_process_pool(model, num_processes=3) as pool:
+        assert pool is model.start_multi_process_pool.return_value
+        raise RuntimeError("boom")
+
+    model.start_multi_process_pool.assert_called_once_with(target_devices=["cpu", "cpu", "cpu"])
+    model.stop_multi_process_pool.assert_called_once_with(model.start_multi_process_pool.return_value)
+
+
+def test_model_is_moved_back_to_its_device():
+    """Starting a pool moves the model to the CPU, so it is moved back to its device on exit."""
+    model = MagicMock()
+    model.device = "cuda:0"
+    model.start_multi_process_pool.side_effect = lambda target_devices: model.to("cpu")
+
+    with multi_process_pool(model, num_processes=2):
+        model.to.assert_called_once_with("cpu")
+
+    assert model.to.call_args_list[-1].args == ("cuda:0",)
+
+
+def test_thread_env_is_set_while_starting_pool():
+    """Worker processes inherit the requested thread count, and the environment is restored."""
+    seen = {}
+
+    def start_pool(target_devices):
+        seen.update({name: os.environ.get(name) for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS")})
+        return {}
+
+    model = MagicMock()
+    model.start_multi_process_pool.side_effect = start_pool
+
+    with patch.dict(os.environ, {"OMP_NUM_THREADS": "16"}):
+        os.environ.pop("MKL_NUM_THREADS", None)
+        with multi_process_pool(model, num_processes=2, threads_per_process=4):
+            assert os.environ["OMP_NUM_THREADS"] == "16"
+        assert "MKL_NUM_THREADS" not in os.environ
+
+    assert seen == {"OMP_NUM_THREADS": "4", "MKL_NUM_THREADS": "4"}
+
+
+def test_default_num_processes():
+    """The default number of processes divides the available CPUs by the threads per process."""
+    with patch("os.sched_getaffinity", return_value=set(range(32)), create=True):
+        assert default_num_processes() == 32
+        assert default_num_processes(threads_per_process=4) == 8
+        assert default_num_processes(threads_per_process=64) == 1
@@ -0,0 +1,85 @@
+"""
+Tests for the retrieval tool.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from airflow_ai_sdk.embeddings.index import ExactIndex
+from airflow_ai_sdk.embeddings.retrieval import Retriever, retrieval_tool
+from airflow_ai_sdk.models.tool import WrappedTool
+
+PASSAGES = ["apples are red", "bananas are yellow", "cherries are red too", "dates are brown"]
+VECTORS = np.array([[1.0, 0.0, 0.1], [0.0, 1.0, 0.0], [0.9, 0.0, 0.3], [0.0, 0.0, 1.0]], dtype=np.float32)
+
+
+class StubModel:
+    def __init__(self):
+        self.queries = []
+
+    def encode(self, texts, **kwargs):
+        self.queries.extend(texts)
+        return np.array([[1.0, 0.0, 0.0] if "red" in text else [0.0, 1.0, 0.0] for text in texts])
+
+
+@pytest.fixture
+def model():
+    model = StubModel()
+    with patch("airflow_ai_sdk.embeddings.retrieval.get_model", return_value=model):
+        yield model
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return ExactIndex(VECTORS, texts=PASSAGES).save(str(tmp_path / "docs.index"))
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_retriever_returns_top_passages(model, index_path):
+    """The query is embedded once and the top passages are returned best first."""
+    retriever = Retriever(index_path, model_name="test-model", k=2, count_tokens=word_count)
+
+    assert retriever("something red") == ["apples are red", "cherries are red too"]
+    assert retriever("something yellow")[0] == "bananas are yellow"
+    assert model.queries == ["something red", "something yellow"]
+    # the index is loaded once
+    assert retriever.index is retriever.index
+
+
+def test_retriever_token_budget(model, index_path):
+    """Passages are returned until the token budget is spent, truncating a first passage that doesn't fit."""
+    retriever = Retriever(index_path, model_name="test-model", k=3, max_tokens=6, count_tokens=word_count)
+    assert retriever("red") == ["apples are red"]
+
+    retriever.max_tokens = 2
+    (passage,) = retriever("red")
+    assert "apples are red".startswith(passage)
+    assert word_count(passage) <= 2
+
+
+def test_retrieval_tool_with_agent(model, index_path):
+    """The tool is a WrappedTool that an agent can call."""
+    tool = retrieval_tool(index_path, model_name="test-model", k=1, count_tokens=word_count)
+    assert isinstance(tool, WrappedTool)
+    assert tool.name == "retrieve"
+
+    agent = Agent(TestModel(custom_output_text="done"), tools=[tool])
+    result = agent.run_sync("What is red?")
+
+    assert result.output == "done"
+    assert len(model.queries) == 1
+
+
+def test_index_without_texts(model):
+    """An index built without texts can't be used for retrieval."""
+    retriever = Retriever(ExactIndex(VECTORS), model_name="test-model")
+
+    with pytest.raises(ValueError, match="without texts"):
+        retriever("red")
@@ -0,0 +1,74 @@
+"""
+Tests for the SemanticRouter class.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from airflow_ai_sdk.embeddings.router import SemanticRouter, get_router
+
+KEYWORDS = ["refund", "bug", "hello"]
+
+
+class KeywordModel:
+    """Embeds a text as the counts of a few keywords."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([[text.count(word) + 0.01 for word in KEYWORDS] for text in texts])
+
+
+@pytest.fixture
+def model():
+    model = KeywordModel()
+    with patch("airflow_ai_sdk.embeddings.router.get_model", return_value=model):
+        yield model
+
+
+ROUTES = {
+    "handle_refund": ["refund please", "I want a refund"],
+    "handle_bug": ["there is a bug", "bug report"],
+}
+
+
+def test_route(model):
+    """Clear inputs are routed; ambiguous ones are left to the caller."""
+    router = SemanticRouter(ROUTES, "test-model", margin=0.2)
+
+    assert router.route("refund my order")[0] == "handle_refund"
+    assert router.route("a bug in checkout")[0] == "handle_bug"
+    route, margin = router.route("refund for the bug")
+    assert route is None
+    assert margin < 0.2
+
+    assert (router.routed, router.decisions) == (2, 3)
+    # the examples are embedded once, in one batch
+    assert model.calls[0] == ["refund please", "I want a refund", "there is a bug", "bug report"]
+
+
+def test_route_many(model):
+    """Batches of texts are routed with one encode call."""
+    router = SemanticRouter(ROUTES, "test-model")
+    router.centroids
+
+    decisions = router.route_many(["refund", "bug"])
+
+    assert [route for route, _ in decisions] == ["handle_refund", "handle_bug"]
+    assert len(model.calls) == 2
+
+
+def test_needs_two_routes(model):
+    """Routes without examples are ignored, and at least two routes are required."""
+    with pytest.raises(ValueError, match="at least two routes"):
+        SemanticRouter({"handle_refund": ["refund"], "handle_other": []}, "test-model")
+
+
+def test_get_router_is_memoized(model):
+    """Routers are shared per process for the same routes and options."""
+    assert get_router(ROUTES, "test-model", margin=0.3) is get_router(dict(ROUTES), "test-model", margin=0.3)
+    assert get_router(ROUTES, "test-model", margin=0.3) is not get_router(ROUTES, "test-model", margin=0.4)
@@ -0,0 +1,170 @@
+"""
+Tests for the embedding server and client.
+"""
+
+import os
+import stat
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from airflow_ai_sdk.embeddings.server import (
+    EmbeddingClient,
+    EmbeddingServer,
+    EmbeddingServerError,
+    connect,
+    default_socket_path,
+    main,
+)
+
+
+class StubModel:
+    max_seq_length = 4
+
+    def __init__(self, name):
+        self.name = name
+        self.encode_kwargs = []
+
+    def encode(self, texts, **kwargs):
+        self.encode_kwargs.append(kwargs)
+        if kwargs.get("fail"):
+            raise RuntimeError("boom")
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+    def tokenizer(self, texts, max_length=None, **kwargs):
+        return {"input_ids": [text.split()[:max_length] for text in texts]}
+
+
+@pytest.fixture
+def model():
+    model = StubModel("test-model")
+    with patch("airflow_ai_sdk.embeddings.server.get_model", return_value=model):
+        yield model
+
+
+@pytest.fixture
+def server(tmp_path, model):
+    """Run an embedding server in a background thread."""
+    server = EmbeddingServer(str(tmp_path / "embed.sock"))
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_encode(server, model):
+    """Texts are encoded by the server and vectors come back in order."""
+    with EmbeddingClient(server.path) as client:
+        vectors = client.encode("test-model", ["a", "bbb"], encode_kwargs={"normalize_embeddings": True})
+        # the connection is reused for further requests
+        assert client.encode("test-model", ["cc"]).tolist() == [[2.0, 1.0]]
+
+    assert vectors.dtype == np.float32
+    assert vectors.tolist() == [[1.0, 1.0], [3.0, 1.0]]
+    assert model.encode_kwargs[0] == {"normalize_embeddings": True}
+
+
+def test_token_lengths(server):
+    """Token lengths are capped at the model's maximum sequence length."""
+    with EmbeddingClient(server.path) as client:
+        assert client.token_lengths("test-model", ["a b", "a b c d e f"]) == [2, 4]
+
+
+def test_ping_and_errors(server):
+    """Pings report the server state and failed requests raise EmbeddingServerError."""
+    with EmbeddingClient(server.path) as client:
+        assert client.ping()["pid"] == os.getpid()
+        with pytest.raises(EmbeddingServerError, match="boom"):
+            client.encode("test-model", ["a"], encode_kwargs={"fail": True})
+        # the server keeps serving after a failed request
+        assert client.is_healthy()
+
+
+def test_socket_is_private(server):
+    """Only the user running the server can connect to its socket."""
+    assert stat.S_IMODE(os.stat(server.path).st_mode) & 0o077 == 0
+
+
+def test_default_socket_path_is_in_private_dir(tmp_path, monkeypatch):
+    """The default socket lives in a directory only the current user can access."""
+    monkeypatch.delenv("AIRFLOW_AI_SDK_EMBEDDING_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+    path = default_socket_path()
+    assert path == str(tmp_path / "airflow-ai-sdk" / "embed.sock")
+    assert stat.S_IMODE(os.stat(tmp_path / "airflow-ai-sdk").st_mode) == 0o700
+
+    # a directory others can write to isn't trusted
+    os.chmod(tmp_path / "airflow-ai-sdk", 0o777)
+    with pytest.raises(EmbeddingServerError, match="only the current user"):
+        default_socket_path()
+
+
+def test_client_refuses_socket_of_another_user(server):
+    """Requests aren't sent to a socket that belongs to another user."""
+    with patch("os.getuid", return_value=os.getuid() + 1):
+        assert not EmbeddingClient(server.path).is_healthy()
+        with pytest.raises(EmbeddingServerError, match="not a socket owned by the current user"):
+            connect(server.path)
+
+
+def test_idle_timeout(tmp_path, model):
+    """The server stops after idle_timeout seconds without connections and removes its socket."""
+    path = str(tmp_path / "embed.sock")
+    with EmbeddingServer(path, idle_timeout=0.1) as server:
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not os.path.exists(path)
+
+
+def test_connect_without_server(tmp_path):
+    """Connecting raises an error if no server is running and auto_start is disabled."""
+    client = EmbeddingClient(str(tmp_path / "missing.sock"))
+    assert not client.is_healthy()
+
+    with pytest.raises(EmbeddingServerError, match="No embedding server"):
+        connect(str(tmp_path / "missing.sock"), auto_start=False)
+
+
+def test_connect_auto_starts_server(tmp_path, model):
+    """connect starts a server if none is running and waits for it to answer."""
+    path = str(tmp_path / "embed.sock")
+    servers = []
+
+    def start_server(path, idle_timeout):
+        server = EmbeddingServer(path, idle_timeout=idle_timeout)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(server)
+        return type("Process", (), {"poll": lambda self: None})()
+
+    with patch("airflow_ai_sdk.embeddings.server.start_server", side_effect=start_server):
+        client = connect(path, idle_timeout=60)
+
+    try:
+        assert client.is_healthy()
+        assert servers[0].idle_timeout == 60
+    finally:
+        client.close()
+        servers[0].shutdown()
+        servers[0].server_close()
+
+
+def test_main_exits_if_server_is_running(tmp_path, capsys):
+    """Only one server runs per socket path."""
+    import fcntl
+
+    path = str(tmp_path / "embed.sock")
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        start = time.monotonic()
+        main(["--socket", path])
+
+    assert time.monotonic() - start < 5
+    assert "already running" in capsys.readouterr().out
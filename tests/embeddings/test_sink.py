@@ -0,0 +1,92 @@
+"""
+Tests for the NpySink class.
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from airflow_ai_sdk.embeddings.formats import decode_embeddings
+from airflow_ai_sdk.embeddings.sink import NpySink, load_embeddings
+
+
+def test_write_and_load(tmp_path):
+    """Batches are written in order and can be memory-mapped back."""
+    path = str(tmp_path / "out" / "vectors.npy")
+    sink = NpySink(path, num_rows=5)
+
+    sink.write(np.arange(6).reshape(3, 2))
+    sink.write(np.arange(6, 10).reshape(2, 2))
+    metadata = json.loads(json.dumps(sink.close()))
+
+    assert metadata == {"format": "npy", "path": path, "shape": [5, 2], "dtype": "<f4"}
+
+    vectors = load_embeddings(metadata)
+    assert isinstance(vectors, np.memmap)
+    assert vectors.dtype == np.float32
+    np.testing.assert_array_equal(vectors, np.arange(10).reshape(5, 2))
+    np.testing.assert_array_equal(decode_embeddings(metadata), vectors)
+
+
+def test_row_count_is_enforced(tmp_path):
+    """Writing more or fewer rows than announced raises a ValueError."""
+    sink = NpySink(str(tmp_path / "vectors.npy"), num_rows=2)
+    with pytest.raises(ValueError, match="more than"):
+        sink.write(np.zeros((3, 2)))
+
+    sink = NpySink(str(tmp_path / "vectors.npy"), num_rows=2)
+    sink.write(np.zeros((1, 2)))
+    with pytest.raises(ValueError, match="Expected 2"):
+        sink.close()
+
+
+def test_remote_path_is_uploaded(tmp_path):
+    """Remote paths are written locally and then uploaded through object storage."""
+    remote_file = tmp_path / "remote.npy"
+    remote_path = MagicMock()
+    remote_path.open.side_effect = lambda mode: remote_file.open(mode)
+
+    with patch("airflow_ai_sdk.embeddings.sink.object_storage_path", return_value=remote_path) as mock_path:
+        sink = NpySink("s3://bucket/vectors.npy", num_rows=2, dtype="float16")
+        sink.write(np.ones((2, 3)))
+        metadata = sink.close()
+
+        mock_path.assert_called_with("s3://bucket/vectors.npy")
+        assert metadata["dtype"] == "<f2"
+
+        vectors = load_embeddings(metadata)
+
+    np.testing.assert_array_equal(vectors, np.ones((2, 3), dtype=np.float16))
+
+
+def test_stream_of_unknown_length(tmp_path):
+    """Without num_rows, batches are appended and the header is written on close."""
+    path = str(tmp_path / "stream.npy")
+    sink = NpySink(path)
+
+    sink.write(np.ones((3, 4)))
+    sink.write(np.zeros((2, 4)))
+    metadata = sink.close()
+
+    assert metadata["shape"] == [5, 4]
+    vectors = load_embeddings(metadata)
+    assert isinstance(vectors, np.memmap)
+    np.testing.assert_array_equal(vectors, np.vstack([np.ones((3, 4)), np.zeros((2, 4))]))
+
+
+def test_dimension_mismatch(tmp_path):
+    """All batches must have the same vector dimension."""
+    sink = NpySink(str(tmp_path / "stream.npy"))
+    sink.write(np.ones((1, 4)))
+    with pytest.raises(ValueError, match="dimension"):
+        sink.write(np.ones((1, 3)))
+
+
+def test_empty_stream(tmp_path):
+    """Closing a sink without writing stores an empty matrix."""
+    metadata = NpySink(str(tmp_path / "empty")).close()
+
+    assert metadata["shape"] == [0, 0]
+    assert load_embeddings(metadata).shape == (0, 0)
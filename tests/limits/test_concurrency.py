@@ -0,0 +1,170 @@
+"""
+Tests for the adaptive (AIMD) concurrency limiter.
+"""
+
+import asyncio
+import copy
+
+import httpx
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from airflow_ai_sdk.limits.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    AdaptiveConcurrencyModel,
+    is_overload,
+    retry_after,
+)
+
+
+class ProviderError(Exception):
+    """Stands in for a provider SDK error that holds the HTTP response."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = httpx.Response(status_code, headers=headers or {})
+
+
+def http_error(status_code, headers=None):
+    """A ModelHTTPError raised from a provider error, like pydantic-ai's models raise them."""
+    try:
+        raise ModelHTTPError(status_code, "test-model") from ProviderError(status_code, headers)
+    except ModelHTTPError as e:
+        return e
+
+
+def test_is_overload_and_retry_after():
+    """429 and 5xx responses are overloads, and Retry-After is read from the provider's response."""
+    assert is_overload(http_error(429))
+    assert is_overload(http_error(529))
+    assert not is_overload(http_error(400))
+    assert not is_overload(RuntimeError("no response"))
+
+    assert retry_after(http_error(429, {"retry-after": "2"})) == 2
+    assert retry_after(http_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after(http_error(503, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0
+    assert retry_after(http_error(429)) is None
+
+
+def test_aimd():
+    """The limit grows by one per window of successes and halves once per burst of overloads."""
+    limiter = AdaptiveConcurrencyLimiter(initial=4, max_concurrency=5)
+
+    async def request(error=None):
+        started = await limiter.acquire()
+        return started, error
+
+    for _ in range(4):
+        limiter.release(asyncio.run(request())[0])
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+    limiter.release(asyncio.run(request())[0])
+    assert limiter.limit == 5
+
+    # three requests in flight fail together: the limit only halves once
+    started = [asyncio.run(request())[0] for _ in range(3)]
+    for s in started:
+        limiter.release(s, http_error(429))
+    assert limiter.limit == 2.5
+    assert limiter.stats()["overloads"] == 3
+
+    # a later request failing halves it again, down to min_concurrency
+    for _ in range(2):
+        limiter.release(asyncio.run(request())[0], http_error(503))
+    assert limiter.limit == 1
+    assert limiter.in_flight == 0
+
+    assert copy.deepcopy(limiter) is limiter
+    with pytest.raises(ValueError, match="decrease"):
+        AdaptiveConcurrencyLimiter(decrease=1)
+
+
+def test_model_limits_concurrency_and_retries_overloads():
+    """Requests run under the adaptive limit and overloaded requests are retried after Retry-After."""
+    state = {"in_flight": 0, "peak": 0, "calls": 0}
+
+    async def reply(messages, info):
+        state["calls"] += 1
+        call = state["calls"]
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.01)
+            if call == 3:
+                raise http_error(429, {"retry-after": "0.05"})
+            return ModelResponse(parts=[TextPart("ok")])
+        finally:
+            state["in_flight"] -= 1
+
+    limiter = AdaptiveConcurrencyLimiter(initial=2, max_concurrency=3)
+    agent = Agent(AdaptiveConcurrencyModel(FunctionModel(reply), limiter))
+
+    async def run_all():
+        return await asyncio.gather(*(agent.run(str(i)) for i in range(10)))
+
+    results = asyncio.run(run_all())
+    assert [result.output for result in results] == ["ok"] * 10
+    assert state["calls"] == 11
+    assert state["peak"] <= 3
+    assert limiter.stats()["retries"] == 1
+    assert limiter.in_flight == 0
+
+
+def test_model_gives_up_after_max_retries():
+    """Requests that keep being overloaded fail after max_retries, and other errors aren't retried."""
+    calls = []
+
+    def reply(messages, info):
+        calls.append(1)
+        raise http_error(500)
+
+    limiter = AdaptiveConcurrencyLimiter(initial=1, max_retries=2, retry_delay=0.001)
+    with pytest.raises(ModelHTTPError):
+        Agent(AdaptiveConcurrencyModel(FunctionModel(reply), limiter)).run_sync("hi")
+    assert len(calls) == 3
+
+    def bad_request(messages, info):
+        calls.append(1)
+        raise http_error(400)
+
+    calls.clear()
+    with pytest.raises(ModelHTTPError):
+        Agent(AdaptiveConcurrencyModel(FunctionModel(bad_request), limiter)).run_sync("hi")
+    assert len(calls) == 1
+
+
+def test_model_limits_and_retries_streams():
+    """Streamed requests hold a slot until the stream ends and are retried if opening them fails."""
+    state = {"in_flight": 0, "peak": 0, "calls": 0}
+
+    async def stream(messages, info):
+        state["calls"] += 1
+        if state["calls"] == 1:
+            raise http_error(503)
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            yield "o"
+            await asyncio.sleep(0.01)
+            yield "k"
+        finally:
+            state["in_flight"] -= 1
+
+    limiter = AdaptiveConcurrencyLimiter(initial=1, max_concurrency=1, retry_delay=0.001)
+    agent = Agent(AdaptiveConcurrencyModel(FunctionModel(stream_function=stream), limiter))
+
+    async def run(prompt):
+        async with agent.run_stream(prompt) as result:
+            return await result.get_output()
+
+    async def run_all():
+        return await asyncio.gather(*(run(str(i)) for i in range(3)))
+
+    assert asyncio.run(run_all()) == ["ok"] * 3
+    assert state["calls"] == 4
+    assert state["peak"] == 1
+    assert limiter.stats()["retries"] == 1
+    assert limiter.in_flight == 0
+
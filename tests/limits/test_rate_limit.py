@@ -0,0 +1,160 @@
+"""
+Tests for the token-bucket rate limiter.
+"""
+
+import asyncio
+import copy
+import pickle
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+from pydantic_ai.models.function import FunctionModel
+
+from airflow_ai_sdk.limits import rate_limit
+from airflow_ai_sdk.limits.rate_limit import (
+    InMemoryRateLimitStore,
+    RateLimitedModel,
+    RateLimiter,
+    SQLiteRateLimitStore,
+    estimate_tokens,
+)
+
+
+class FakeClock:
+    """Replaces time.time and time.sleep so that sleeping advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "time", clock.time)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_requests_per_minute(clock):
+    """A full bucket allows a burst of one minute of requests, then requests wait for refills."""
+    limiter = RateLimiter(requests_per_minute=60, store=InMemoryRateLimitStore())
+    for _ in range(60):
+        limiter.acquire("model", 0)
+    assert clock.sleeps == []
+
+    limiter.acquire("model", 0)
+    assert clock.sleeps == [pytest.approx(1.0)]
+    assert limiter.waits == 1
+    assert limiter.wait_seconds == pytest.approx(1.0)
+
+
+def test_tokens_per_minute_and_reconcile(clock):
+    """Requests wait for their estimated tokens, and the actual usage is settled afterwards."""
+    limiter = RateLimiter(tokens_per_minute=600, store=InMemoryRateLimitStore())
+    limiter.acquire("model", 500)
+    # the request used more tokens than estimated, so the bucket goes into debt
+    limiter.reconcile("model", estimated=500, actual=700)
+    limiter.acquire("model", 100)
+    # 100 tokens of debt and 100 tokens needed at 10 tokens per second
+    assert clock.sleeps == [pytest.approx(20.0)]
+
+    # requests larger than the bucket only wait for a full bucket
+    clock.now += 60
+    limiter.acquire("model", 10_000)
+    assert len(clock.sleeps) == 1
+
+
+def test_keys_are_separate_budgets(clock):
+    """Each model gets its own budget unless the limiter has a fixed key."""
+    limiter = RateLimiter(requests_per_minute=1, store=InMemoryRateLimitStore())
+    limiter.acquire("openai:gpt-4o", 0)
+    limiter.acquire("openai:gpt-4o-mini", 0)
+    assert clock.sleeps == []
+
+    shared = RateLimiter(requests_per_minute=1, key="openai", store=InMemoryRateLimitStore())
+    shared.acquire("openai:gpt-4o", 0)
+    shared.acquire("openai:gpt-4o-mini", 0)
+    assert clock.sleeps == [pytest.approx(60.0)]
+
+
+def test_sqlite_store_is_shared(clock, tmp_path):
+    """Limiters with stores on the same file share one budget, also after pickling."""
+    first = RateLimiter(requests_per_minute=2, store=SQLiteRateLimitStore(tmp_path / "limits.sqlite"))
+    second = pickle.loads(pickle.dumps(first))
+    first.acquire("model", 0)
+    second.acquire("model", 0)
+    assert clock.sleeps == []
+    first.acquire("model", 0)
+    assert clock.sleeps == [pytest.approx(30.0)]
+
+    assert copy.deepcopy(first) is first
+
+
+def test_estimate_tokens():
+    """Tokens are estimated from the characters of the messages and the output limit."""
+    messages = [ModelRequest(parts=[UserPromptPart(content="x" * 400)])]
+    assert estimate_tokens(messages, None) == 600
+    assert estimate_tokens(messages, {"max_tokens": 50}) == 150
+
+
+def test_rate_limited_model(monkeypatch):
+    """The wrapped model takes each request from the budget and settles its actual usage."""
+    calls = []
+
+    async def acquire_async(key, tokens):
+        calls.append(("acquire", key, tokens))
+
+    def reconcile(key, estimated, actual):
+        calls.append(("reconcile", key, estimated, actual))
+
+    def respond(messages, info):
+        return ModelResponse(parts=[TextPart("hello")])
+
+    limiter = RateLimiter(tokens_per_minute=1000, store=InMemoryRateLimitStore(), output_tokens=10)
+    monkeypatch.setattr(limiter, "acquire_async", acquire_async)
+    monkeypatch.setattr(limiter, "reconcile", reconcile)
+
+    agent = Agent(RateLimitedModel(FunctionModel(respond, model_name="echo"), limiter))
+    result = asyncio.run(agent.run("x" * 40))
+    assert result.output == "hello"
+    assert calls == [
+        ("acquire", "function:echo", 20),
+        ("reconcile", "function:echo", 20, result.usage().total_tokens),
+    ]
+
+
+def test_rate_limited_model_streams(monkeypatch):
+    """Streamed requests take their budget and settle their usage once the stream ends."""
+    calls = []
+
+    async def acquire_async(key, tokens):
+        calls.append(("acquire", key, tokens))
+
+    def reconcile(key, estimated, actual):
+        calls.append(("reconcile", key, estimated, actual))
+
+    async def stream(messages, info):
+        yield "hel"
+        yield "lo"
+
+    limiter = RateLimiter(tokens_per_minute=1000, store=InMemoryRateLimitStore(), output_tokens=10)
+    monkeypatch.setattr(limiter, "acquire_async", acquire_async)
+    monkeypatch.setattr(limiter, "reconcile", reconcile)
+    agent = Agent(RateLimitedModel(FunctionModel(stream_function=stream, model_name="echo"), limiter))
+
+    async def run():
+        async with agent.run_stream("x" * 40) as result:
+            return await result.get_output(), result.usage().total_tokens
+
+    output, total_tokens = asyncio.run(run())
+    assert output == "hello"
+    assert calls == [("acquire", "function:echo", 20), ("reconcile", "function:echo", 20, total_tokens)]
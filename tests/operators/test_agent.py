@@ -6,7 +6,8 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from airflow.utils.context import Context
-from pydantic_ai import Tool
+from pydantic_ai import Agent, Tool
+from pydantic_ai.models.test import TestModel
 from pydantic_ai.agent import AgentRunResult
 
 from airflow_ai_sdk.models.base import BaseModel
@@ -161,3 +162,167 @@ def test_execute_with_error(base_config, mock_context, mock_agent_no_tools):
 
     # Verify that run_sync was called
     mock_agent_no_tools.run_sync.assert_called_once_with("test")
+
+
+def test_execute_with_response_cache(base_config, mock_context, mock_agent_no_tools):
+    """Identical requests are answered from the response cache without calling the agent."""
+    from airflow_ai_sdk.caching.response import InMemoryResponseCache
+
+    mock_result = MagicMock()
+    mock_result.output = {"answer": 42}
+    mock_agent_no_tools.run_sync.return_value = mock_result
+    cache = InMemoryResponseCache()
+
+    operator = AgentDecoratedOperator(
+        agent=mock_agent_no_tools,
+        task_id="test_task",
+        python_callable=lambda: "test",
+        op_args=base_config["op_args"],
+        op_kwargs=base_config["op_kwargs"],
+        response_cache=cache,
+    )
+
+    with patch("airflow_ai_sdk.caching.response.response_cache_key", return_value="key"):
+        assert operator.execute(mock_context) == {"answer": 42}
+        assert operator.execute(mock_context) == {"answer": 42}
+
+    mock_agent_no_tools.run_sync.assert_called_once_with("test")
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+deferred_agent = Agent(TestModel(custom_output_text="deferred result"), system_prompt="Answer")
+
+
+def test_execute_deferrable(base_config, mock_context):
+    """Deferrable tasks run the agent in a trigger and validate its output when they resume."""
+    import asyncio
+
+    from airflow.exceptions import TaskDeferred
+
+    from airflow_ai_sdk.caching.response import InMemoryResponseCache
+    from airflow_ai_sdk.triggers.agent import AgentRunTrigger
+
+    cache = InMemoryResponseCache()
+    operator = AgentDecoratedOperator(
+        agent=deferred_agent,
+        task_id="test_task",
+        python_callable=lambda: "test",
+        op_args=base_config["op_args"],
+        op_kwargs=base_config["op_kwargs"],
+        deferrable=True,
+        response_cache=cache,
+    )
+
+    with pytest.raises(TaskDeferred) as deferred:
+        operator.execute(mock_context)
+
+    trigger = deferred.value.trigger
+    assert isinstance(trigger, AgentRunTrigger)
+    assert trigger.prompt == "test"
+    assert trigger.agent["reference"]["name"] == "deferred_agent"
+
+    async def run_trigger():
+        return await anext(trigger.run())
+
+    event = asyncio.run(run_trigger()).payload
+    assert len(event["records"]["requests"]) == 1
+    assert operator.execute_complete(mock_context, event, **deferred.value.kwargs) == "deferred result"
+
+    # the output was cached, so the next run doesn't defer
+    assert operator.execute(mock_context) == "deferred result"
+
+    with pytest.raises(RuntimeError, match="boom"):
+        operator.execute_complete(mock_context, {"status": "error", "error": "RuntimeError: boom"})
+
+
+def test_execute_with_rate_limiter(base_config, mock_context):
+    """Every model request of the agent takes its budget from the rate limiter."""
+    from airflow_ai_sdk.limits.rate_limit import InMemoryRateLimitStore, RateLimiter
+
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=100_000, store=InMemoryRateLimitStore())
+    agent = Agent(TestModel(custom_output_text="limited"))
+    operator = AgentDecoratedOperator(
+        agent=agent,
+        task_id="test_task",
+        python_callable=lambda: "test",
+        op_args=base_config["op_args"],
+        op_kwargs=base_config["op_kwargs"],
+        rate_limiter=limiter,
+    )
+
+    assert operator.execute(mock_context) == "limited"
+    state = limiter.store._states["test:test"]
+    assert state["requests"] == pytest.approx(59, abs=0.1)
+    assert state["tokens"] < 100_000
+    # the agent's own model is left untouched
+    assert isinstance(agent.model, TestModel)
+
+
+def test_deferrable_rejects_limiters(base_config):
+    """The triggerer makes the requests of deferrable tasks, so the worker's limiters can't apply."""
+    from airflow_ai_sdk.limits.concurrency import AdaptiveConcurrencyLimiter
+    from airflow_ai_sdk.limits.rate_limit import InMemoryRateLimitStore, RateLimiter
+
+    for limits in (
+        {"rate_limiter": RateLimiter(requests_per_minute=60, store=InMemoryRateLimitStore())},
+        {"adaptive_concurrency": AdaptiveConcurrencyLimiter()},
+    ):
+        with pytest.raises(ValueError, match="not supported by deferrable tasks"):
+            AgentDecoratedOperator(
+                agent=deferred_agent,
+                task_id="test_task",
+                python_callable=lambda: "test",
+                op_args=base_config["op_args"],
+                op_kwargs=base_config["op_kwargs"],
+                deferrable=True,
+                **limits,
+            )
+
+
+def test_deferrable_rejects_output_specs(base_config):
+    """Output specs that can't validate the triggerer's output are rejected up front."""
+    from pydantic_ai import NativeOutput, ToolOutput
+
+    class Answer(BaseModel):
+        text: str
+
+    class Other(BaseModel):
+        value: int
+
+    for output_type in (ToolOutput(Answer), NativeOutput(Answer), [Answer, Other]):
+        with pytest.raises(ValueError, match="output type"):
+            AgentDecoratedOperator(
+                agent=Agent(TestModel(), output_type=output_type),
+                task_id="test_task",
+                python_callable=lambda: "test",
+                op_args=base_config["op_args"],
+                op_kwargs=base_config["op_kwargs"],
+                deferrable=True,
+            )
+
+
+def test_execute_pushes_usage_summary(base_config):
+    """The usage of the model requests and tool calls is pushed as a separate XCom."""
+    agent = Agent(TestModel(), tools=[tool1])
+    operator = AgentDecoratedOperator(
+        agent=agent,
+        task_id="test_task",
+        python_callable=lambda: "test",
+        op_args=base_config["op_args"],
+        op_kwargs=base_config["op_kwargs"],
+    )
+    context = MagicMock()
+
+    with patch("airflow.stats.Stats") as stats:
+        operator.execute(context)
+
+    context["ti"].xcom_push.assert_called_once()
+    kwargs = context["ti"].xcom_push.call_args.kwargs
+    assert kwargs["key"] == "llm_usage"
+    summary = kwargs["value"]
+    assert summary["model_requests"] == 2
+    assert summary["tool_calls"] == 1
+    assert summary["input_tokens"] > 0
+    assert summary["models"]["test:test"]["requests"] == 2
+    tags = {"dag_id": operator.dag_id, "task_id": "test_task", "tool": "tool1"}
+    stats.incr.assert_any_call("ai_sdk.tool_call.count", tags=tags)
@@ -1,16 +1,28 @@
 import pytest
 import sys
 import importlib
+import numpy as np
 from unittest.mock import patch, MagicMock, call
 from airflow_ai_sdk.airflow import _PythonDecoratedOperator, task_decorator_factory
 from airflow_ai_sdk.operators.embed import EmbedDecoratedOperator
 from airflow_ai_sdk.decorators.embed import embed
+from airflow_ai_sdk.embeddings.formats import decode_embeddings, dequantize_embeddings
+from airflow_ai_sdk.embeddings.cache import EmbeddingCache
+from airflow_ai_sdk.embeddings.model_cache import model_cache
+
+@pytest.fixture(autouse=True)
+def clear_model_cache():
+    model_cache.clear()
+    yield
+    model_cache.clear()
 
 class StubArray:
     def __init__(self, data):
         self._data = data
     def tolist(self):
         return self._data
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self._data, dtype=dtype)
 
 class StubModel:
     def __init__(self, name):
@@ -19,6 +31,8 @@ class StubModel:
     def encode(self, text, **kwargs):
         # Store kwargs for assertion
         self.last_encode_kwargs = kwargs
+        if isinstance(text, list):
+            return StubArray([[0.1, 0.2, 0.3] for _ in text])
         return StubArray([0.1, 0.2, 0.3])
 
 @patch.object(_PythonDecoratedOperator, "execute", autospec=True)
@@ -184,6 +198,63 @@ def test_import_error_when_sentence_transformers_not_installed():
         error_msg = str(excinfo.value)
         assert "sentence-transformers is not installed" in error_msg
 
+class BatchStubModel:
+    def __init__(self, name):
+        self.name = name
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        return StubArray([[float(len(text))] for text in texts])
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_batch_returns_vectors_in_order(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = ["a", "bb", "ccc", "dddd", "eeeee"]
+    mock_model = BatchStubModel("test-model")
+    mock_sentence_transformer.return_value = mock_model
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        batch_size=2,
+    )
+
+    vectors = op.execute(context=None)
+
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert mock_model.batches == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_batch_accepts_iterables(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = ("a", "bb")
+    mock_sentence_transformer.return_value = BatchStubModel("test-model")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+    )
+
+    assert op.execute(context=None) == [[1.0], [2.0]]
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError, match="batch_size"):
+        EmbedDecoratedOperator(
+            task_id="embed_test",
+            python_callable=lambda: "ignored",
+            op_args=None,
+            op_kwargs=None,
+            model_name="test-model",
+            batch_size=0,
+        )
+
 class ExceptionRaisingModel:
     def __init__(self, name):
         self.name = name
@@ -236,7 +307,7 @@ def test_non_string_input_types(mock_sentence_transformer, mock_super_execute):
         123,                # int
         1.23,               # float
         True,               # bool
-        ["item1", "item2"], # list
+        [1, "item2"],       # list with a non-string item
         {"key": "value"},   # dict
         (1, 2, 3),          # tuple
         None                # None
@@ -253,3 +324,533 @@ def test_non_string_input_types(mock_sentence_transformer, mock_super_execute):
         assert "text" in error_msg.lower()
         assert "str" in error_msg.lower()
         mock_super_execute.assert_called_once_with(op, None)
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_model_is_reused_across_executions(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = "hello world"
+    mock_sentence_transformer.return_value = StubModel("test-model")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        model_kwargs={"device": "cpu"},
+    )
+
+    op.execute(context=None)
+    op.execute(context=None)
+
+    # the model should only be loaded once per process
+    mock_sentence_transformer.assert_called_once_with("test-model", device="cpu")
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_cache_only_encodes_misses(mock_sentence_transformer, mock_super_execute, tmp_path, capsys):
+    mock_model = BatchStubModel("test-model")
+    mock_sentence_transformer.return_value = mock_model
+    cache_path = str(tmp_path / "cache.sqlite")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        cache_path=cache_path,
+    )
+
+    mock_super_execute.return_value = ["a", "bb", "a"]
+    assert op.execute(context=None) == [[1.0], [2.0], [1.0]]
+    assert mock_model.batches == [["a", "bb"]]
+    assert "0 hits, 3 misses" in capsys.readouterr().out
+
+    mock_super_execute.return_value = ["bb", "ccc", "a"]
+    assert op.execute(context=None) == [[2.0], [3.0], [1.0]]
+    assert mock_model.batches == [["a", "bb"], ["ccc"]]
+    assert "2 hits, 1 misses" in capsys.readouterr().out
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_cache_is_keyed_by_model_kwargs(mock_sentence_transformer, mock_super_execute, tmp_path):
+    mock_model = BatchStubModel("test-model")
+    mock_sentence_transformer.return_value = mock_model
+    mock_super_execute.return_value = ["a"]
+    cache_path = str(tmp_path / "cache.sqlite")
+
+    for model_kwargs in ({"truncate_dim": 256}, {"truncate_dim": 128}, {"truncate_dim": 256}):
+        op = EmbedDecoratedOperator(
+            task_id="embed_test",
+            python_callable=lambda: "ignored",
+            op_args=None,
+            op_kwargs=None,
+            model_name="test-model",
+            model_kwargs=model_kwargs,
+            cache_path=cache_path,
+        )
+        op.execute(context=None)
+
+    # the second config doesn't read the vectors of the first one, the third does
+    assert mock_model.batches == [["a"], ["a"]]
+    with EmbeddingCache(cache_path) as cache:
+        assert cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 2
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_full_cache_hit_skips_model_load(mock_sentence_transformer, mock_super_execute, tmp_path):
+    mock_sentence_transformer.return_value = BatchStubModel("test-model")
+    mock_super_execute.return_value = "a"
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        cache_path=str(tmp_path / "cache.sqlite"),
+    )
+
+    assert op.execute(context=None) == [1.0]
+    model_cache.clear()
+    assert op.execute(context=None) == [1.0]
+
+    mock_sentence_transformer.assert_called_once_with("test-model")
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_binary_output_format(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = ["a", "bb"]
+    mock_sentence_transformer.return_value = BatchStubModel("test-model")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        output_format="float16",
+    )
+
+    payload = op.execute(context=None)
+
+    assert payload["format"] == "float16"
+    assert decode_embeddings(payload).tolist() == [[1.0], [2.0]]
+
+def test_invalid_output_format():
+    with pytest.raises(ValueError, match="output_format"):
+        EmbedDecoratedOperator(
+            task_id="embed_test",
+            python_callable=lambda: "ignored",
+            op_args=None,
+            op_kwargs=None,
+            model_name="test-model",
+            output_format="pickle",
+        )
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_output_path(mock_sentence_transformer, mock_super_execute, tmp_path):
+    mock_super_execute.return_value = ["a", "bb", "ccc"]
+    mock_model = BatchStubModel("test-model")
+    mock_sentence_transformer.return_value = mock_model
+    output_path = str(tmp_path / "vectors.npy")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        batch_size=2,
+        output_path=output_path,
+    )
+
+    metadata = op.execute(context=None)
+
+    assert metadata == {"format": "npy", "path": output_path, "shape": [3, 1], "dtype": "<f4"}
+    assert mock_model.batches == [["a", "bb"], ["ccc"]]
+    assert np.load(output_path, mmap_mode="r").tolist() == [[1.0], [2.0], [3.0]]
+    assert "output_path" in EmbedDecoratedOperator.template_fields
+
+class PoolStubModel(BatchStubModel):
+    def __init__(self, name):
+        super().__init__(name)
+        self.pool_events = []
+
+    def start_multi_process_pool(self, target_devices=None):
+        self.pool_events.append(("start", target_devices))
+        return {"processes": target_devices}
+
+    def stop_multi_process_pool(self, pool):
+        self.pool_events.append(("stop", pool["processes"]))
+
+    def encode(self, texts, pool=None, **kwargs):
+        if pool is not None:
+            self.pool_events.append(("encode", list(texts)))
+        return super().encode(texts, **kwargs)
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_multiple_processes(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = ["a", "bb", "ccc"]
+    mock_model = PoolStubModel("test-model")
+    mock_sentence_transformer.return_value = mock_model
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        batch_size=2,
+        num_processes=2,
+    )
+
+    assert op.execute(context=None) == [[1.0], [2.0], [3.0]]
+    assert mock_model.pool_events == [
+        ("start", ["cpu", "cpu"]),
+        ("encode", ["a", "bb"]),
+        ("encode", ["ccc"]),
+        ("stop", ["cpu", "cpu"]),
+    ]
+    assert op._pool is None
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_streams_generators(mock_sentence_transformer, mock_super_execute, tmp_path):
+    events = []
+
+    def texts():
+        for text in ["a", "bb", "ccc", "dddd", "eeeee"]:
+            events.append(("read", text))
+            yield text
+
+    class RecordingModel(BatchStubModel):
+        def encode(self, texts, **kwargs):
+            events.append(("encode", list(texts)))
+            return super().encode(texts, **kwargs)
+
+    mock_super_execute.return_value = texts()
+    mock_sentence_transformer.return_value = RecordingModel("test-model")
+    output_path = str(tmp_path / "vectors.npy")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        batch_size=2,
+        output_path=output_path,
+    )
+
+    metadata = op.execute(context=None)
+
+    # each batch is encoded before the next batch is read
+    assert events == [
+        ("read", "a"), ("read", "bb"), ("encode", ["a", "bb"]),
+        ("read", "ccc"), ("read", "dddd"), ("encode", ["ccc", "dddd"]),
+        ("read", "eeeee"), ("encode", ["eeeee"]),
+    ]
+    assert metadata["shape"] == [5, 1]
+    assert decode_embeddings(metadata).tolist() == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_stream_with_non_string_item(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = iter(["a", 2])
+    mock_sentence_transformer.return_value = BatchStubModel("test-model")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+    )
+
+    with pytest.raises(TypeError, match="string"):
+        op.execute(context=None)
+
+class ChunkingStubModel(BatchStubModel):
+    max_seq_length = 4
+
+    class tokenizer:
+        def __new__(cls, text, **kwargs):
+            import re
+            return {"offset_mapping": [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]}
+
+        @staticmethod
+        def num_special_tokens_to_add(pair=False):
+            return 2
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_chunking(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = {"doc-1": "a bb ccc", "doc-2": "dddd"}
+    mock_model = ChunkingStubModel("test-model")
+    mock_sentence_transformer.return_value = mock_model
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        chunk_size=100,  # capped at max_seq_length - 2 special tokens
+    )
+
+    result = op.execute(context=None)
+
+    assert result["chunks"] == [
+        {"doc_id": "doc-1", "offset": 0, "length": 4},
+        {"doc_id": "doc-1", "offset": 5, "length": 3},
+        {"doc_id": "doc-2", "offset": 0, "length": 4},
+    ]
+    assert result["embeddings"] == [[4.0], [3.0], [4.0]]
+    assert mock_model.batches == [["a bb", "ccc", "dddd"]]
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_chunking_list_input(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = ["a bb ccc", "dddd"]
+    mock_sentence_transformer.return_value = ChunkingStubModel("test-model")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        chunk_size=2,
+        chunk_overlap=1,
+        output_format="float32",
+    )
+
+    result = op.execute(context=None)
+
+    assert [(chunk["doc_id"], chunk["offset"]) for chunk in result["chunks"]] == [(0, 0), (0, 2), (1, 0)]
+    assert decode_embeddings(result["embeddings"]).tolist() == [[4.0], [6.0], [4.0]]
+
+def test_invalid_chunk_overlap():
+    with pytest.raises(ValueError, match="chunk_overlap"):
+        EmbedDecoratedOperator(
+            task_id="embed_test",
+            python_callable=lambda: "ignored",
+            op_args=None,
+            op_kwargs=None,
+            model_name="test-model",
+            chunk_size=10,
+            chunk_overlap=10,
+        )
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_token_budget(mock_sentence_transformer, mock_super_execute, capsys):
+    texts = ["a", "a b c d e f", "a b", "a b c d e"]
+    mock_super_execute.return_value = texts
+
+    class TokenizingStubModel(BatchStubModel):
+        max_seq_length = 512
+
+        def tokenizer(self, texts, **kwargs):
+            return {"input_ids": [text.split() for text in texts]}
+
+        def encode(self, texts, **kwargs):
+            assert kwargs["batch_size"] == len(texts)
+            return super().encode(texts, **kwargs)
+
+    mock_model = TokenizingStubModel("test-model")
+    mock_sentence_transformer.return_value = mock_model
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        max_batch_tokens=10,
+    )
+
+    vectors = op.execute(context=None)
+
+    # vectors are restored to input order
+    assert vectors == [[float(len(text))] for text in texts]
+    # texts are batched longest first under the token budget
+    assert mock_model.batches == [["a b c d e f"], ["a b c d e", "a b"], ["a"]]
+    output = capsys.readouterr().out
+    assert "Encoded 4 texts in 3 batches" in output
+    assert "padding efficiency 82.4%" in output
+
+class SignedStubModel(BatchStubModel):
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        self.encode_kwargs = kwargs
+        return StubArray([[float(len(text)), -float(len(text))] for text in texts])
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_int8_precision(mock_sentence_transformer, mock_super_execute):
+    mock_super_execute.return_value = ["a", "bb", "ccc"]
+    mock_model = SignedStubModel("test-model")
+    mock_sentence_transformer.return_value = mock_model
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        encode_kwargs={"precision": "int8", "normalize_embeddings": True},
+    )
+
+    payload = op.execute(context=None)
+
+    # precision is handled by the operator so that all batches share one calibration
+    assert "precision" not in mock_model.encode_kwargs
+    assert payload["format"] == "int8"
+    codes = decode_embeddings(payload)
+    assert codes.dtype == np.int8
+    assert codes[[0, 2]].tolist() == [[-128, 127], [127, -128]]
+    np.testing.assert_allclose(
+        dequantize_embeddings(payload), [[1.0, -1.0], [2.0, -2.0], [3.0, -3.0]], atol=0.01
+    )
+
+def test_conflicting_precision():
+    with pytest.raises(ValueError, match="conflicts"):
+        EmbedDecoratedOperator(
+            task_id="embed_test",
+            python_callable=lambda: "ignored",
+            op_args=None,
+            op_kwargs=None,
+            model_name="test-model",
+            encode_kwargs={"precision": "binary"},
+            output_format="float16",
+        )
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_quantized_output_path(mock_sentence_transformer, mock_super_execute, tmp_path):
+    mock_super_execute.return_value = ["a", "bb", "ccc"]
+    mock_sentence_transformer.return_value = SignedStubModel("test-model")
+    output_path = str(tmp_path / "vectors.npy")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        batch_size=2,
+        output_format="int8",
+        output_path=output_path,
+        quantization_ranges=[[0.0, -4.0], [4.0, 0.0]],
+    )
+
+    metadata = op.execute(context=None)
+
+    assert metadata["dtype"] == "|i1"
+    assert metadata["quantization"]["format"] == "int8"
+    np.testing.assert_allclose(
+        dequantize_embeddings(metadata), [[1.0, -1.0], [2.0, -2.0], [3.0, -3.0]], atol=0.01
+    )
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_with_embedding_server(mock_sentence_transformer, mock_super_execute, tmp_path):
+    import threading
+
+    from airflow_ai_sdk.embeddings.server import EmbeddingServer
+
+    mock_super_execute.return_value = ["a", "bb", "ccc"]
+    server_model = BatchStubModel("test-model")
+
+    with patch("airflow_ai_sdk.embeddings.server.get_model", return_value=server_model):
+        server = EmbeddingServer(str(tmp_path / "embed.sock"))
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        try:
+            op = EmbedDecoratedOperator(
+                task_id="embed_test",
+                python_callable=lambda: "ignored",
+                op_args=None,
+                op_kwargs=None,
+                model_name="test-model",
+                batch_size=2,
+                embedding_server=server.path,
+            )
+            vectors = op.execute(context=None)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert server_model.batches == [["a", "bb"], ["ccc"]]
+    # the model is never loaded in the task process
+    mock_sentence_transformer.assert_not_called()
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_falls_back_without_embedding_server(mock_sentence_transformer, mock_super_execute, capsys):
+    from airflow_ai_sdk.embeddings.server import EmbeddingServerError
+
+    mock_super_execute.return_value = ["a", "bb"]
+    mock_sentence_transformer.return_value = BatchStubModel("test-model")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        embedding_server=True,
+    )
+
+    with patch(
+        "airflow_ai_sdk.embeddings.server.connect",
+        side_effect=EmbeddingServerError("Embedding server did not start."),
+    ):
+        vectors = op.execute(context=None)
+
+    assert vectors == [[1.0], [2.0]]
+    assert "Encoding in the task process instead" in capsys.readouterr().out
+
+@patch.object(_PythonDecoratedOperator, "execute", autospec=True)
+@patch("sentence_transformers.SentenceTransformer", autospec=True)
+def test_execute_falls_back_when_embedding_server_fails(mock_sentence_transformer, mock_super_execute, capsys):
+    from airflow_ai_sdk.embeddings.server import EmbeddingServerError
+
+    mock_super_execute.return_value = ["a", "bb"]
+    mock_sentence_transformer.return_value = BatchStubModel("test-model")
+    client = MagicMock()
+    client.encode.side_effect = EmbeddingServerError("Embedding server closed the connection.")
+
+    op = EmbedDecoratedOperator(
+        task_id="embed_test",
+        python_callable=lambda: "ignored",
+        op_args=None,
+        op_kwargs=None,
+        model_name="test-model",
+        embedding_server=True,
+    )
+
+    with patch("airflow_ai_sdk.embeddings.server.connect", return_value=client):
+        vectors = op.execute(context=None)
+
+    assert vectors == [[1.0], [2.0]]
+    client.close.assert_called_once()
+    assert op._server is None
+    assert "Encoding in the task process instead" in capsys.readouterr().out
+
+def test_embedding_server_with_multiple_processes():
+    with pytest.raises(ValueError, match="embedding_server"):
+        EmbedDecoratedOperator(
+            task_id="embed_test",
+            python_callable=lambda: "ignored",
+            op_args=None,
+            op_kwargs=None,
+            model_name="test-model",
+            embedding_server=True,
+            num_processes=4,
+        )
@@ -4,6 +4,7 @@ Tests for the LLMDecoratedOperator class.
 
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from _pytest.recwarn import WarningsRecorder
 from pydantic import BaseModel
@@ -184,3 +185,68 @@ def test_no_deprecation_calls(
         output_type=str,
     )
     assert len(recwarn) == 0
+
+
+def test_execute_with_semantic_cache(base_config, patched_agent_class, mock_agent):
+    """Similar prompts reuse the output of a previous LLM call."""
+    from airflow_ai_sdk.caching.semantic import SemanticResponseCache
+
+    mock_agent.run_sync.return_value = MagicMock(output="positive")
+    cache = SemanticResponseCache(threshold=0.9)
+    prompts = iter(["I love it", "I love it!", "I hate it"])
+    vectors = {"I love it": [1.0, 0.0], "I love it!": [0.99, 0.1], "I hate it": [0.0, 1.0]}
+
+    operator = LLMDecoratedOperator(
+        model=base_config["model"],
+        system_prompt=base_config["system_prompt"],
+        task_id="test_task",
+        op_args=base_config["op_args"],
+        op_kwargs=base_config["op_kwargs"],
+        python_callable=lambda: next(prompts),
+        semantic_cache=cache,
+    )
+
+    with (
+        patch("airflow_ai_sdk.caching.response.response_cache_key", return_value="scope"),
+        patch.object(cache, "_embed", side_effect=lambda text: np.array(vectors[text], dtype=np.float32)),
+    ):
+        results = [operator.execute(MagicMock()) for _ in range(3)]
+
+    assert results == ["positive"] * 3
+    assert [c.args for c in mock_agent.run_sync.call_args_list] == [("I love it",), ("I hate it",)]
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 0}
+
+
+class Verdict(BaseModel):
+    positive: bool
+
+
+def test_agent_spec_for_deferrable_tasks(base_config, patched_agent_class):
+    """Deferrable LLM tasks describe their agent by model name, system prompt and output type."""
+    operator = LLMDecoratedOperator(
+        model="openai:gpt-4o-mini",
+        system_prompt=base_config["system_prompt"],
+        output_type=Verdict,
+        task_id="test_task",
+        op_args=base_config["op_args"],
+        op_kwargs=base_config["op_kwargs"],
+        python_callable=lambda: "test",
+        deferrable=True,
+    )
+
+    spec = operator._agent_spec()
+    assert spec["model"] == "openai:gpt-4o-mini"
+    assert spec["system_prompt"] == base_config["system_prompt"]
+    assert spec["output_type"]["name"] == "Verdict"
+
+    with pytest.raises(ValueError, match="semantic_cache"):
+        LLMDecoratedOperator(
+            model="openai:gpt-4o-mini",
+            system_prompt=base_config["system_prompt"],
+            task_id="test_task",
+            op_args=base_config["op_args"],
+            op_kwargs=base_config["op_kwargs"],
+            python_callable=lambda: "test",
+            deferrable=True,
+            semantic_cache=MagicMock(),
+        )
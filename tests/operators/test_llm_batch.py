@@ -0,0 +1,204 @@
+"""
+Tests for the LLMBatchDecoratedOperator class.
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from airflow_ai_sdk.caching.response import InMemoryResponseCache
+from airflow_ai_sdk.models.base import BaseModel
+from airflow_ai_sdk.operators.llm_batch import LLMBatchDecoratedOperator
+
+
+class EchoModel(FunctionModel):
+    """Replies with the upper-cased prompt and records the peak number of concurrent requests."""
+
+    def __init__(self, failures=None, delay=0.01):
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = []
+        self.failures = failures or {}
+        self.delay = delay
+        super().__init__(self.reply)
+
+    async def reply(self, messages, info):
+        prompt = messages[-1].parts[-1].content
+        self.calls.append(prompt)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            # finish in reverse order, so results only come out ordered if the operator orders them
+            await asyncio.sleep(self.delay / (1 + len(self.calls)))
+            if self.failures.get(prompt, 0) > 0:
+                self.failures[prompt] -= 1
+                raise RuntimeError(f"failed {prompt}")
+            return ModelResponse(parts=[TextPart(prompt.upper())])
+        finally:
+            self.in_flight -= 1
+
+
+def make_operator(model, prompts, **kwargs):
+    return LLMBatchDecoratedOperator(
+        task_id="test_task",
+        model=model,
+        system_prompt="Shout",
+        python_callable=lambda: prompts,
+        op_args=[],
+        op_kwargs={},
+        item_retry_delay=0,
+        **kwargs,
+    )
+
+
+def test_execute_runs_concurrently_and_keeps_order():
+    """Prompts run concurrently up to max_concurrency and outputs are in prompt order."""
+    model = EchoModel()
+    prompts = [f"prompt {i}" for i in range(20)]
+
+    result = make_operator(model, prompts, max_concurrency=4).execute(MagicMock())
+
+    assert result == [prompt.upper() for prompt in prompts]
+    assert model.peak == 4
+
+
+def test_execute_retries_failed_prompts():
+    """Failed prompts are retried and the task fails once a prompt runs out of retries."""
+    model = EchoModel(failures={"b": 2})
+    assert make_operator(model, ["a", "b"], item_retries=2).execute(MagicMock()) == ["A", "B"]
+    assert model.calls.count("b") == 3
+
+    model = EchoModel(failures={"b": 3})
+    with pytest.raises(RuntimeError, match="failed b"):
+        make_operator(model, ["a", "b"], item_retries=2).execute(MagicMock())
+
+
+def test_failed_batch_caches_completed_prompts():
+    """Prompts that completed before the task fails are cached, so a retry only runs the failed ones."""
+    model = EchoModel(failures={"b": 1})
+    cache = InMemoryResponseCache()
+    with pytest.raises(RuntimeError, match="failed b"):
+        make_operator(model, ["a", "b", "c"], item_retries=0, response_cache=cache).execute(MagicMock())
+    assert sorted(model.calls) == ["a", "b", "c"]
+
+    assert make_operator(model, ["a", "b", "c"], response_cache=cache).execute(MagicMock()) == ["A", "B", "C"]
+    assert sorted(model.calls) == ["a", "b", "b", "c"]
+
+
+def test_execute_allow_failures():
+    """With allow_failures, prompts that keep failing return None."""
+    model = EchoModel(failures={"b": 5})
+    result = make_operator(model, ["a", "b", "c"], item_retries=1, allow_failures=True).execute(MagicMock())
+    assert result == ["A", None, "C"]
+
+
+def test_execute_with_output_type_and_response_cache():
+    """Structured outputs are dumped to dicts and cached prompts aren't sent again."""
+
+    class Shout(BaseModel):
+        text: str
+
+    def reply(messages, info):
+        from pydantic_ai.messages import ToolCallPart
+
+        prompt = messages[-1].parts[-1].content
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {"text": prompt.upper()})])
+
+    model = FunctionModel(reply)
+    cache = InMemoryResponseCache()
+
+    first = make_operator(model, ["a", "b"], output_type=Shout, response_cache=cache).execute(MagicMock())
+    second = make_operator(model, ["b", "c"], output_type=Shout, response_cache=cache).execute(MagicMock())
+
+    assert first == [{"text": "A"}, {"text": "B"}]
+    assert second == [{"text": "B"}, {"text": "C"}]
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 0}
+
+
+def test_invalid_arguments():
+    """The callable must return a list and max_concurrency must be positive."""
+    with pytest.raises(TypeError, match="list of prompts"):
+        make_operator(EchoModel(), "not a list").execute(MagicMock())
+    with pytest.raises(ValueError, match="max_concurrency"):
+        make_operator(EchoModel(), [], max_concurrency=0)
+
+
+def test_batch_api_defers_and_completes(monkeypatch):
+    """With batch_api, prompts are submitted as a provider batch and the task defers until it's done."""
+    from unittest.mock import patch
+
+    from airflow.exceptions import TaskDeferred
+
+    from airflow_ai_sdk.batch.clients import OpenAIBatchClient
+    from airflow_ai_sdk.triggers.batch import BatchTrigger
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    client = MagicMock(wraps=OpenAIBatchClient())
+    client.submit.return_value = "batch-1"
+    client.get_results.return_value = {"0": "A", "1": RuntimeError("failed"), "2": "C"}
+
+    operator = make_operator(
+        "openai:gpt-4o-mini",
+        ["a", "b", "c"],
+        batch_api=True,
+        batch_api_base_url="http://localhost:8000/v1",
+        allow_failures=True,
+    )
+    with patch("airflow_ai_sdk.batch.clients.get_batch_client", return_value=client) as get_client:
+        with pytest.raises(TaskDeferred) as deferred:
+            operator.execute(MagicMock())
+
+        requests = client.submit.call_args.args[0]
+        assert [request["body"]["messages"][-1]["content"] for request in requests] == ["a", "b", "c"]
+        assert requests[0]["body"]["model"] == "gpt-4o-mini"
+        assert requests[0]["body"]["messages"][0] == {"role": "system", "content": "Shout"}
+        get_client.assert_called_with("openai", base_url="http://localhost:8000/v1")
+
+        trigger = deferred.value.trigger
+        assert isinstance(trigger, BatchTrigger)
+        assert trigger.batch_id == "batch-1"
+        assert deferred.value.method_name == "execute_complete"
+
+        event = {"batch_id": "batch-1", "status": "completed", "succeeded": True}
+        context = MagicMock()
+        assert operator.execute_complete(context, event, **deferred.value.kwargs) == ["A", None, "C"]
+        assert client.get_results.call_args.kwargs["model"] == "openai:gpt-4o-mini"
+        context["ti"].xcom_push.assert_called_once()
+        assert context["ti"].xcom_push.call_args.kwargs["key"] == "llm_usage"
+
+        operator.allow_failures = False
+        with pytest.raises(RuntimeError, match="1 of 3 prompts"):
+            operator.execute_complete(MagicMock(), event, **deferred.value.kwargs)
+
+    with pytest.raises(RuntimeError, match="did not complete"):
+        operator.execute_complete(MagicMock(), {"batch_id": "batch-1", "status": "expired", "succeeded": False}, 3)
+
+
+def test_execute_with_adaptive_concurrency():
+    """Rate-limited requests lower the adaptive limit and are retried without using item retries."""
+    from pydantic_ai.exceptions import ModelHTTPError
+
+    from airflow_ai_sdk.limits.concurrency import AdaptiveConcurrencyLimiter
+
+    class OverloadedModel(EchoModel):
+        async def reply(self, messages, info):
+            if len(self.calls) == 2:
+                self.calls.append("429")
+                raise ModelHTTPError(429, "echo")
+            return await super().reply(messages, info)
+
+    model = OverloadedModel()
+    limiter = AdaptiveConcurrencyLimiter(initial=4, max_concurrency=8, retry_delay=0.001)
+    prompts = [f"prompt {i}" for i in range(12)]
+
+    result = make_operator(
+        model, prompts, max_concurrency=6, item_retries=0, adaptive_concurrency=limiter
+    ).execute(MagicMock())
+
+    assert result == [prompt.upper() for prompt in prompts]
+    assert limiter.stats()["overloads"] == 1
+    assert limiter.stats()["retries"] == 1
+    assert model.peak <= 4
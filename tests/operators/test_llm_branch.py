@@ -8,9 +8,18 @@ from unittest.mock import MagicMock, patch
 import pytest
 from airflow.utils.context import Context
 
+from airflow_ai_sdk.operators import llm_branch
 from airflow_ai_sdk.operators.llm_branch import LLMBranchDecoratedOperator
 
 
+@pytest.fixture(autouse=True)
+def clear_agent_cache():
+    """Clear the per-process branch agent cache between tests."""
+    llm_branch._agent_cache.clear()
+    yield
+    llm_branch._agent_cache.clear()
+
+
 @pytest.fixture
 def base_config():
     """Base configuration for tests."""
@@ -61,21 +70,18 @@ def test_init(base_config, patched_agent_class, patched_super_init, mock_agent):
         python_callable=lambda: "test",
     )
 
-    # Verify that Agent was created with the correct arguments
-    patched_agent_class.assert_called_once_with(
-        model=base_config["model"],
-        system_prompt=base_config["system_prompt"],
-    )
+    # Verify that no Agent is built at parse time
+    patched_agent_class.assert_not_called()
 
     # Verify that the properties were set correctly
     assert operator.model == base_config["model"]
     assert operator.system_prompt == base_config["system_prompt"]
     assert operator.allow_multiple_branches is False
 
-    # Verify that AgentDecoratedOperator.__init__ was called with the mock agent
+    # Verify that AgentDecoratedOperator.__init__ was called without an agent
     patched_super_init.assert_called_once()
     args, kwargs = patched_super_init.call_args
-    assert kwargs["agent"] == mock_agent
+    assert kwargs["agent"] is None
     assert "task_id" in kwargs
     assert "op_args" in kwargs
     assert "op_kwargs" in kwargs
@@ -131,8 +137,11 @@ def test_execute_with_enum_result(base_config, mock_context, mock_agent):
                     # Call execute
                     result = operator.execute(mock_context)
 
-                    # Verify a new Agent was created with the correct enum output_type
-                    assert mock_agent_class.call_count == 2  # Once in __init__ and once in execute
+                    # Verify an Agent was created in execute with an enum of the downstream tasks
+                    mock_agent_class.assert_called_once()
+                    output_type = mock_agent_class.call_args.kwargs["output_type"]
+                    assert [member.value for member in output_type] == ["task1", "task2", "task3"]
+                    assert operator.agent is mock_agent
 
                     # Verify that super().execute was called
                     mock_super_execute.assert_called_once_with(mock_context)
@@ -177,3 +186,86 @@ def test_execute_with_non_string_result(base_config, mock_context, mock_agent):
 
                     # Verify the result
                     assert result == mock_do_branch_result
+
+
+def test_execute_with_semantic_router(base_config, mock_context, patched_agent_class, capsys):
+    """Clear decisions are made by the semantic router and ambiguous ones by the LLM."""
+    from airflow_ai_sdk.embeddings.router import SemanticRouter
+
+    router = SemanticRouter({"task1": ["example 1"], "task2": ["example 2"]}, "test-model", margin=0.2)
+    router.route_many = MagicMock(side_effect=[[("task2", 0.5)], [(None, 0.05)]])
+
+    with patch("airflow_ai_sdk.embeddings.router.get_router", return_value=router) as mock_get_router:
+        with patch("airflow_ai_sdk.operators.agent.AgentDecoratedOperator._run_agent", return_value="task3") as mock_llm:
+            with patch.object(LLMBranchDecoratedOperator, "do_branch", side_effect=lambda context, result: result):
+                operator = LLMBranchDecoratedOperator(
+                    model=base_config["model"],
+                    system_prompt=base_config["system_prompt"],
+                    task_id="test_task",
+                    op_args=base_config["op_args"],
+                    op_kwargs=base_config["op_kwargs"],
+                    python_callable=lambda: "my input",
+                    routes={"task1": ["example 1"], "task2": ["example 2"]},
+                    route_margin=0.2,
+                )
+                operator.downstream_task_ids = ["task1", "task2", "task3"]
+
+                assert operator.execute(mock_context) == "task2"
+                mock_llm.assert_not_called()
+
+                assert operator.execute(mock_context) == "task3"
+                mock_llm.assert_called_once_with("my input")
+
+    mock_get_router.assert_called_with(
+        {"task1": ["example 1"], "task2": ["example 2"]}, "all-MiniLM-L12-v2", margin=0.2
+    )
+    assert "skipping the LLM call" in capsys.readouterr().out
+
+
+def test_semantic_router_rejects_unknown_routes(base_config, mock_context, patched_agent_class):
+    """Routes must name downstream tasks."""
+    operator = LLMBranchDecoratedOperator(
+        model=base_config["model"],
+        system_prompt=base_config["system_prompt"],
+        task_id="test_task",
+        op_args=base_config["op_args"],
+        op_kwargs=base_config["op_kwargs"],
+        python_callable=lambda: "my input",
+        routes={"task1": ["example 1"], "missing": ["example 2"]},
+    )
+    operator.downstream_task_ids = ["task1", "task2"]
+
+    with pytest.raises(ValueError, match="missing"):
+        operator.execute(mock_context)
+
+
+def test_agent_is_cached_per_downstream_set(base_config, mock_context, patched_agent_class):
+    """Agents are built once per process for each model, system prompt and set of downstream tasks."""
+    with patch("airflow_ai_sdk.operators.llm_branch.AgentDecoratedOperator.execute", return_value="task1"):
+        with patch.object(LLMBranchDecoratedOperator, "do_branch", return_value=["task1"]):
+            operators = [
+                LLMBranchDecoratedOperator(
+                    model=base_config["model"],
+                    system_prompt=base_config["system_prompt"],
+                    task_id=f"test_task_{i}",
+                    op_args=base_config["op_args"],
+                    op_kwargs=base_config["op_kwargs"],
+                    python_callable=lambda: "test",
+                )
+                for i in range(3)
+            ]
+            operators[0].downstream_task_ids = ["task1", "task2"]
+            operators[1].downstream_task_ids = ["task2", "task1"]
+            operators[2].downstream_task_ids = ["task1", "task3"]
+
+            for operator in operators:
+                operator.execute(mock_context)
+            operators[0].execute(mock_context)
+
+    assert patched_agent_class.call_count == 2
+    assert operators[0].agent is operators[1].agent
+    output_types = [call.kwargs["output_type"] for call in patched_agent_class.call_args_list]
+    assert [[member.value for member in output_type] for output_type in output_types] == [
+        ["task1", "task2"],
+        ["task1", "task3"],
+    ]
@@ -0,0 +1,164 @@
+"""
+Tests for the instrumentation of model requests and tool calls.
+"""
+
+import asyncio
+from unittest.mock import call, patch
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+from pydantic_ai.usage import Usage
+
+from airflow_ai_sdk.models.tool import WrappedTool
+from airflow_ai_sdk.telemetry.metrics import InstrumentedModel, UsageRecorder, model_cost
+
+
+@pytest.fixture
+def stats():
+    with patch("airflow.stats.Stats") as stats:
+        yield stats
+
+
+def test_model_cost():
+    """Costs use the price of the longest matching model prefix and the cached input price."""
+    assert model_cost("openai:gpt-4o-mini", 1_000_000, 0) == pytest.approx(0.15)
+    assert model_cost("gpt-4o-2024-08-06", 1_000_000, 1_000_000) == pytest.approx(12.5)
+    assert model_cost("gpt-4o", 1_000_000, 0, cached_tokens=1_000_000) == pytest.approx(1.25)
+    assert model_cost("function:echo", 10, 10) is None
+
+
+def test_record_request_emits_metrics(stats):
+    """Requests are emitted as counters and timers tagged with the task and the model."""
+    recorder = UsageRecorder(tags={"dag_id": "dag", "task_id": "task"})
+    usage = Usage(requests=1, request_tokens=1000, response_tokens=100, details={"cached_tokens": 400})
+    recorder.record_request("openai:gpt-4o-mini", usage, latency=0.5, ttfb=0.2)
+
+    tags = {"dag_id": "dag", "task_id": "task", "model": "openai:gpt-4o-mini"}
+    stats.incr.assert_has_calls(
+        [
+            call("ai_sdk.model_request.count", tags=tags),
+            call("ai_sdk.tokens.input", 1000, tags=tags),
+            call("ai_sdk.tokens.output", 100, tags=tags),
+            call("ai_sdk.tokens.cached", 400, tags=tags),
+            call("ai_sdk.cost.micro_usd", 180, tags=tags),
+        ]
+    )
+    assert [c.args[0] for c in stats.timing.call_args_list] == [
+        "ai_sdk.model_request.duration",
+        "ai_sdk.model_request.ttfb",
+    ]
+
+
+def test_summary_and_replay(stats):
+    """Summaries total the requests and tool calls, and records can be replayed by another recorder."""
+    triggerer = UsageRecorder(emit=False)
+    triggerer.record_request("openai:gpt-4o-mini", {"request_tokens": 100, "response_tokens": 10}, latency=1.0)
+    triggerer.record_request("openai:gpt-4o-mini", latency=0.5, error="ModelHTTPError: 429")
+    triggerer.record_tool_call("search", 0.25)
+    stats.incr.assert_not_called()
+
+    task = UsageRecorder(tags={"task_id": "task"})
+    task.replay(triggerer.records())
+    assert stats.incr.call_count > 0
+
+    summary = task.summary()
+    assert summary["model_requests"] == 2
+    assert summary["failed_model_requests"] == 1
+    assert (summary["input_tokens"], summary["output_tokens"]) == (100, 10)
+    assert summary["model_latency_s"] == 1.5
+    assert summary["tool_calls"] == 1
+    assert summary["models"]["openai:gpt-4o-mini"]["cost_usd"] == pytest.approx(0.000021)
+
+
+def test_instrumented_model_records_requests_and_tools(stats):
+    """Every request and every call of a wrapped tool is recorded while the recorder is active."""
+
+    def lookup(city: str) -> str:
+        """Look up the weather."""
+        return "sunny"
+
+    def reply(messages, info):
+        if len(messages) == 1:
+            return ModelResponse(parts=[ToolCallPart("lookup", {"city": "Paris"})])
+        return ModelResponse(parts=[TextPart("It is sunny")])
+
+    recorder = UsageRecorder()
+    agent = Agent(InstrumentedModel(FunctionModel(reply, model_name="weather"), recorder))
+    agent._function_toolset.tools = {"lookup": WrappedTool(lookup)}
+
+    with recorder.active():
+        assert asyncio.run(agent.run("Weather in Paris?")).output == "It is sunny"
+
+    summary = recorder.summary()
+    assert summary["model_requests"] == 2
+    assert summary["input_tokens"] > 0
+    assert summary["mean_ttfb_s"] is None
+    assert summary["tool_calls"] == 1
+    assert recorder.tool_calls[0]["tool"] == "lookup"
+    assert recorder.requests[0]["model"] == "function:weather"
+
+
+def test_wrapped_async_tool_with_context(capsys):
+    """Async tools that take a RunContext keep their schema and are recorded, including retries."""
+    from pydantic_ai import ModelRetry, RunContext
+
+    async def lookup(ctx: RunContext[None], city: str) -> str:
+        """Look up the weather."""
+        if city != "Paris":
+            raise ModelRetry("Only Paris is known.")
+        return "sunny"
+
+    def reply(messages, info):
+        if len(messages) == 1:
+            return ModelResponse(parts=[ToolCallPart("lookup", {"city": "Rome"})])
+        if len(messages) == 3:
+            return ModelResponse(parts=[ToolCallPart("lookup", {"city": "Paris"})])
+        return ModelResponse(parts=[TextPart("It is sunny")])
+
+    tool = WrappedTool(lookup)
+    assert (tool.name, tool.description, tool.takes_ctx) == ("lookup", "Look up the weather.", True)
+    assert list(tool.function_schema.json_schema["properties"]) == ["city"]
+
+    recorder = UsageRecorder()
+    agent = Agent(FunctionModel(reply), tools=[tool])
+    with recorder.active():
+        assert asyncio.run(agent.run("Weather?")).output == "It is sunny"
+
+    assert [(c["tool"], c["error"]) for c in recorder.tool_calls] == [("lookup", True), ("lookup", False)]
+    assert "Calling tool lookup with args {'city': 'Paris'}" in capsys.readouterr().out
+
+
+def test_instrumented_model_records_streams(stats):
+    """Streamed requests are recorded with their usage once the stream ends, and failed streams as errors."""
+
+    async def stream(messages, info):
+        yield "It is "
+        yield "sunny"
+
+    recorder = UsageRecorder()
+    agent = Agent(InstrumentedModel(FunctionModel(stream_function=stream, model_name="weather"), recorder))
+
+    async def run():
+        async with agent.run_stream("Weather in Paris?") as result:
+            return await result.get_output(), result.usage()
+
+    with recorder.active():
+        output, usage = asyncio.run(run())
+
+    assert output == "It is sunny"
+    assert len(recorder.requests) == 1
+    request = recorder.requests[0]
+    assert request["error"] is None
+    assert (request["input_tokens"], request["output_tokens"]) == (usage.request_tokens, usage.response_tokens)
+    assert request["output_tokens"] > 0
+
+    async def fail(messages, info):
+        raise RuntimeError("boom")
+        yield
+
+    agent = Agent(InstrumentedModel(FunctionModel(stream_function=fail, model_name="weather"), recorder))
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(run())
+    assert recorder.requests[-1]["error"] == "RuntimeError: boom"
@@ -0,0 +1,157 @@
+"""
+Tests for the tracing of agent runs, model requests and tool calls.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from opentelemetry.trace import StatusCode
+from pydantic_ai import Agent
+from pydantic_ai.models.function import FunctionModel
+from pydantic_ai.models.test import TestModel
+
+from airflow_ai_sdk.operators.agent import AgentDecoratedOperator
+from airflow_ai_sdk.telemetry.tracing import (
+    agent_run_span,
+    set_tracer_provider,
+    task_attributes,
+    trace_context,
+    use_in_memory_exporter,
+)
+
+
+def lookup(city: str) -> str:
+    """Look up the weather."""
+    return f"sunny in {city}"
+
+
+traced_agent = Agent(TestModel(custom_output_text="traced result"), tools=[lookup], name="weather")
+
+
+@pytest.fixture
+def exporter():
+    exporter = use_in_memory_exporter()
+    yield exporter
+    set_tracer_provider(None)
+
+
+@pytest.fixture
+def context():
+    ti = SimpleNamespace(
+        dag_id="dag", task_id="test_task", run_id="manual__1", try_number=2, map_index=-1, xcom_push=MagicMock()
+    )
+    return {"ti": ti}
+
+
+def _operator(agent: Agent, **kwargs) -> AgentDecoratedOperator:
+    return AgentDecoratedOperator(
+        agent=agent, task_id="test_task", python_callable=lambda: "test", op_args=[], op_kwargs={}, **kwargs
+    )
+
+
+def test_task_attributes(context):
+    """Only the primitive attributes of the task instance are kept."""
+    assert task_attributes(context) == {
+        "airflow.dag_id": "dag",
+        "airflow.task_id": "test_task",
+        "airflow.run_id": "manual__1",
+        "airflow.try_number": 2,
+        "airflow.map_index": -1,
+    }
+    assert task_attributes({"ti": MagicMock()}) == {}
+
+
+def test_execute_emits_nested_spans(exporter, context):
+    """Model requests and tool calls are children of the agent run, with the task instance attributes."""
+    assert _operator(traced_agent).execute(context) == "traced result"
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert set(spans) == {"invoke_agent weather", "chat test", "execute_tool lookup"}
+    run = spans["invoke_agent weather"]
+    assert run.parent is None
+    assert [span.parent.span_id for span in exporter.get_finished_spans() if span is not run] == [
+        run.context.span_id
+    ] * 3
+
+    for span in spans.values():
+        assert span.attributes["airflow.dag_id"] == "dag"
+        assert span.attributes["airflow.run_id"] == "manual__1"
+        assert span.attributes["airflow.try_number"] == 2
+
+    chats = [span for span in exporter.get_finished_spans() if span.name == "chat test"]
+    assert len(chats) == 2
+    assert all(span.attributes["gen_ai.usage.input_tokens"] > 0 for span in chats)
+    assert spans["execute_tool lookup"].attributes["gen_ai.tool.name"] == "lookup"
+    assert run.attributes["gen_ai.usage.input_tokens"] == sum(
+        span.attributes["gen_ai.usage.input_tokens"] for span in chats
+    )
+    assert run.attributes["airflow_ai_sdk.tool_calls"] == 1
+
+
+def test_failed_request_marks_spans(exporter, context):
+    """A failing model request sets the error status on its span and on the agent run."""
+
+    def fail(messages, info):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        _operator(Agent(FunctionModel(fail))).execute(context)
+
+    spans = exporter.get_finished_spans()
+    assert [span.name for span in spans] == ["chat function:fail:", "invoke_agent"]
+    for span in spans:
+        assert span.status.status_code == StatusCode.ERROR
+    assert spans[0].events[0].name == "exception"
+
+
+def test_trigger_continues_trace(exporter, context):
+    """A deferred agent run in the triggerer continues the trace of the task."""
+    from airflow.exceptions import TaskDeferred
+
+    operator = _operator(traced_agent, deferrable=True)
+    with pytest.raises(TaskDeferred) as deferred:
+        operator.execute(context)
+    trigger = deferred.value.trigger
+    assert trigger.serialize()[1]["attributes"]["airflow.task_id"] == "test_task"
+
+    async def run_trigger():
+        return await anext(trigger.run())
+
+    event = asyncio.run(run_trigger()).payload
+    assert event["status"] == "success"
+
+    task_span, *trigger_spans = exporter.get_finished_spans()
+    assert task_span.attributes["airflow.deferred"] is True
+    assert task_span.status.status_code == StatusCode.UNSET
+    trigger_run = trigger_spans[-1]
+    assert trigger_run.name == "invoke_agent weather"
+    assert trigger_run.parent.span_id == task_span.context.span_id
+    assert trigger_run.context.trace_id == task_span.context.trace_id
+    assert trigger_run.attributes["airflow.run_id"] == "manual__1"
+    assert {span.name for span in trigger_spans} == {"invoke_agent weather", "chat test", "execute_tool lookup"}
+
+
+def test_async_tool_spans(exporter, context):
+    """Async tools that take a RunContext are traced as children of the agent run."""
+    from pydantic_ai import RunContext
+
+    async def forecast(ctx: RunContext[None], city: str) -> str:
+        """Forecast the weather."""
+        return f"rain in {city}"
+
+    agent = Agent(TestModel(custom_output_text="done"), tools=[forecast], name="forecaster")
+    assert _operator(agent).execute(context) == "done"
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    tool_span = spans["execute_tool forecast"]
+    assert tool_span.parent.span_id == spans["invoke_agent forecaster"].context.span_id
+    assert tool_span.attributes["airflow.task_id"] == "test_task"
+
+
+def test_trace_context_outside_of_span(exporter):
+    """There is no trace to continue outside of a span."""
+    assert trace_context() == {}
+    with agent_run_span({}):
+        assert "traceparent" in trace_context()
@@ -0,0 +1,206 @@
+"""
+Tests for the shared pooled HTTP client.
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic_ai import Agent
+
+from airflow_ai_sdk import http
+from airflow_ai_sdk.http import (
+    close_loop_connections,
+    configure_http_client,
+    get_http_client,
+    http_client_stats,
+    shared_model,
+)
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """Answers every chat completion with "pong", keeping connections alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps(
+            {
+                "id": "chatcmpl-0",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o-mini",
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": "pong"}, "finish_reason": "stop"}
+                ],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def openai_server(monkeypatch):
+    """Run a stand-in OpenAI API and point the OpenAI provider at it."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    # start every test with a fresh client and providers, with pooling enabled
+    configure_http_client(enabled=True)
+    yield server
+    server.shutdown()
+    server.server_close()
+    http._settings.clear()
+    configure_http_client()
+
+
+def test_agents_share_connections(openai_server):
+    """Agents built from model names share the provider and reuse keep-alive connections."""
+    first, second = shared_model("openai:gpt-4o-mini"), shared_model("gpt-4o-mini")
+    assert first.client is second.client
+
+    before = http_client_stats()
+
+    async def run_agents():
+        for model in (first, second, first):
+            assert (await Agent(model).run("ping")).output == "pong"
+
+    asyncio.run(run_agents())
+
+    stats = http_client_stats()
+    assert stats["requests"] - before["requests"] == 3
+    assert stats["connections_opened"] - before["connections_opened"] == 1
+    assert stats["open_connections"] == 1
+
+
+def test_pools_are_per_event_loop(openai_server):
+    """Each event loop gets its own pool, so the client works across asyncio.run calls and threads."""
+    model = shared_model("openai:gpt-4o-mini")
+    assert asyncio.run(Agent(model).run("ping")).output == "pong"
+    outputs = []
+    thread = threading.Thread(target=lambda: outputs.append(asyncio.run(Agent(model).run("ping")).output))
+    thread.start()
+    thread.join()
+    assert outputs == ["pong"]
+
+
+def test_close_loop_connections(openai_server):
+    """Closing the connections of a loop before it ends keeps the client usable in later loops."""
+    model = shared_model("openai:gpt-4o-mini")
+
+    async def run_and_close():
+        output = (await Agent(model).run("ping")).output
+        assert http_client_stats()["open_connections"] == 1
+        await close_loop_connections()
+        return output
+
+    assert asyncio.run(run_and_close()) == "pong"
+    assert http_client_stats()["open_connections"] == 0
+    assert asyncio.run(run_and_close()) == "pong"
+
+
+def test_llm_batch_operator_closes_connections(openai_server):
+    """@task.llm_batch closes the connections of its event loop when the batch is done."""
+    from airflow_ai_sdk.operators.llm_batch import LLMBatchDecoratedOperator
+
+    operator = LLMBatchDecoratedOperator(
+        task_id="test_task",
+        model="gpt-4o-mini",
+        system_prompt="Reply",
+        python_callable=lambda: ["ping", "ping"],
+        op_args=[],
+        op_kwargs={},
+    )
+    assert operator.execute(MagicMock()) == ["pong", "pong"]
+    assert http_client_stats()["open_connections"] == 0
+
+
+def test_pooling_is_opt_in(monkeypatch):
+    """Without configuration, model names are left to pydantic_ai; the environment can enable pooling."""
+    http._settings.clear()
+    monkeypatch.delenv("AIRFLOW_AI_SDK_HTTP_POOL", raising=False)
+    assert shared_model("openai:gpt-4o-mini") == "openai:gpt-4o-mini"
+
+    monkeypatch.setenv("AIRFLOW_AI_SDK_HTTP_POOL", "1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    assert shared_model("openai:gpt-4o-mini").client is not None
+
+
+def test_shared_model_warns_when_provider_is_missing(openai_server, caplog):
+    """Providers whose package isn't installed fall back to pydantic_ai with a warning."""
+    real_import = http.importlib.import_module
+
+    def import_module(name):
+        if name == "pydantic_ai.models.anthropic":
+            raise ImportError("No module named 'anthropic'")
+        return real_import(name)
+
+    with patch.object(http.importlib, "import_module", import_module), caplog.at_level("WARNING"):
+        assert shared_model("anthropic:claude-3-5-haiku-latest") == "anthropic:claude-3-5-haiku-latest"
+    assert "Not using the shared HTTP client" in caplog.text
+
+
+def test_shared_model_leaves_other_models_alone(openai_server):
+    """Model instances and unknown providers are returned unchanged, and pooling can be disabled."""
+    model = MagicMock()
+    assert shared_model(model) is model
+    assert shared_model("test") == "test"
+    assert shared_model("bedrock:anthropic.claude-3") == "bedrock:anthropic.claude-3"
+
+    configure_http_client(enabled=False)
+    assert shared_model("openai:gpt-4o-mini") == "openai:gpt-4o-mini"
+
+
+def test_configure_http_client(openai_server):
+    """Configuring the client replaces it for agents built afterwards."""
+    client = get_http_client()
+    assert get_http_client() is client
+    configure_http_client(max_connections=4, timeout=30)
+    new_client = get_http_client()
+    assert new_client is not client
+    assert new_client.timeout.read == 30
+    assert new_client._transport.limits.max_connections == 4
+
+
+def test_llm_operator_uses_shared_client(openai_server):
+    """@task.llm runs its agent on the shared client."""
+    from airflow_ai_sdk.operators.llm import LLMDecoratedOperator
+
+    operator = LLMDecoratedOperator(
+        task_id="test_task",
+        model="gpt-4o-mini",
+        system_prompt="Reply",
+        python_callable=lambda: "ping",
+        op_args=[],
+        op_kwargs={},
+    )
+    before = http_client_stats()["requests"]
+    assert operator.execute(MagicMock()) == "pong"
+    assert http_client_stats()["requests"] == before + 1
+
+
+def test_time_to_first_byte(openai_server):
+    """Instrumented models on the shared client record the time until response headers arrive."""
+    from airflow_ai_sdk.telemetry.metrics import InstrumentedModel, UsageRecorder
+
+    recorder = UsageRecorder(emit=False)
+    agent = Agent(InstrumentedModel(shared_model("openai:gpt-4o-mini"), recorder))
+    assert agent.run_sync("ping").output == "pong"
+
+    request = recorder.requests[0]
+    assert 0 < request["ttfb"] <= request["latency"]
+    assert (request["input_tokens"], request["output_tokens"]) == (3, 1)
+    assert request["cost_usd"] > 0
@@ -0,0 +1,25 @@
+"""
+Tests for the local and object storage path helpers.
+"""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from airflow_ai_sdk.storage import is_local, local_path, object_storage_path
+
+
+def test_local_paths():
+    """Paths without a scheme and file:// URLs are local, other URLs go to object storage."""
+    assert is_local("/data/cache.sqlite")
+    assert is_local("file:///data/cache.sqlite")
+    assert not is_local("s3://bucket/cache.jsonl")
+
+    assert local_path("file:///data/cache.sqlite") == Path("/data/cache.sqlite")
+    assert local_path("~/cache.sqlite") == Path.home() / "cache.sqlite"
+
+
+def test_object_storage_path():
+    """Remote paths are opened through Airflow's object storage."""
+    with patch("airflow.io.path.ObjectStoragePath") as path_class:
+        assert object_storage_path("s3://bucket/key") is path_class.return_value
+    path_class.assert_called_once_with("s3://bucket/key")
@@ -0,0 +1,99 @@
+"""
+Tests for the AgentRunTrigger and agent references.
+"""
+
+import asyncio
+import textwrap
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from airflow_ai_sdk.models.base import BaseModel
+from airflow_ai_sdk.triggers.agent import (
+    AgentRunTrigger,
+    find_reference,
+    load_agent,
+    object_reference,
+    resolve_reference,
+)
+
+
+class Answer(BaseModel):
+    text: str
+
+
+module_agent = Agent(TestModel(custom_output_text="hello"), system_prompt="Say hello")
+
+
+def first_event(trigger):
+    async def run():
+        return await anext(trigger.run())
+
+    return asyncio.run(run()).payload
+
+
+def test_references():
+    """Top-level objects are referenced by module and name, local ones are rejected."""
+    assert resolve_reference(object_reference(Answer)) is Answer
+    assert resolve_reference(find_reference(module_agent, __name__)) is module_agent
+
+    class Local(BaseModel):
+        pass
+
+    with pytest.raises(ValueError, match="top level"):
+        object_reference(Local)
+    with pytest.raises(ValueError, match="top-level variable"):
+        find_reference(Agent(TestModel()), __name__)
+
+
+def test_resolve_reference_from_file(tmp_path):
+    """Modules that can't be imported by name, like DAG files, are loaded from their file once."""
+    path = tmp_path / "my_dag.py"
+    path.write_text(
+        textwrap.dedent(
+            """
+            LOADS = []
+            LOADS.append(1)
+
+            class Summary:
+                pass
+            """
+        )
+    )
+    reference = {"module": "unusual_prefix_123_my_dag", "file": str(path), "name": "Summary"}
+
+    summary = resolve_reference(reference)
+    assert summary.__name__ == "Summary"
+    assert resolve_reference(reference) is summary
+    assert resolve_reference({**reference, "name": "LOADS"}) == [1]
+
+
+def test_trigger_runs_referenced_agent():
+    """The trigger runs an agent bound to a module variable and returns its output and usage."""
+    trigger = AgentRunTrigger(agent={"reference": find_reference(module_agent, __name__)}, prompt="hi")
+    classpath, kwargs = trigger.serialize()
+    assert classpath == "airflow_ai_sdk.triggers.agent.AgentRunTrigger"
+
+    event = first_event(AgentRunTrigger(**kwargs))
+    assert event["status"] == "success"
+    assert event["output"] == "hello"
+    assert event["usage"]["requests"] == 1
+
+
+def test_trigger_builds_llm_agent():
+    """LLM specs are built into an agent with the referenced output type, once per process."""
+    spec = {"model": "test", "system_prompt": "Answer", "output_type": object_reference(Answer)}
+    assert load_agent(spec) is load_agent(spec)
+
+    event = first_event(AgentRunTrigger(agent=spec, prompt="hi"))
+    assert event["status"] == "success"
+    assert Answer.model_validate(event["output"])
+
+
+def test_trigger_reports_errors():
+    """Errors are reported in the event instead of crashing the triggerer."""
+    spec = {"reference": {"module": "missing_module", "file": "/missing.py", "name": "agent"}}
+    event = first_event(AgentRunTrigger(agent=spec, prompt="hi"))
+    assert event["status"] == "error"
+    assert "missing" in event["error"]